@@ -1,15 +1,28 @@
 import os
 import sys
 import json
+import signal
+import time
 from src.query_queue.query_queue_connection import QueryQueueConnection
+from src.query_queue.query_worker_pool import QueryWorkerPool
+from src.query_queue.worker_supervisor import WorkerSupervisor
+from src.query_queue.traffic_capture import TrafficCapture
+from src import reset_engine, session_scope, pool_metrics, prepare_models
 from src.document_save.document_save_service import DocumentSaveService
+from src.document_save.result_cache_service import ResultCacheService
+from src.document_save.request_coalescing_service import RequestCoalescingService
 from src.email.dto.report_delivery_dto import ReportDeliveryDTO
 from src.email.dto.recipient_dto import RecipientDTO
 from src.email.query_report_delivered import query_report_delivered
+from src.email.email_dispatcher import EmailDispatcher
 from src.admin.query_log.query_log_service import QueryLogService
+from src.admin.query_log.query_log_writer import QueryLogWriter
 from config import Queue, AppConfig
 import pika
 from src.monitoring.sentry_service import SentryService
+from src.monitoring.pipeline_metrics import PipelineMetrics
+from src.monitoring.metrics_server import MetricsServer
+from src.monitoring.message_profiler import MessageProfiler
 import traceback
 ROOT_PATH = os.path.dirname(os.path.realpath(__file__))
 os.environ.update({'ROOT_PATH': ROOT_PATH})
@@ -21,235 +34,451 @@ from src.queries.query_service import QueryService
 sentry_config = AppConfig.get_sentry_config()
 SentryService.initialize(sentry_config)
 
-if __name__ == '__main__':
-    connection = QueryQueueConnection()
-    channel = connection.channel
 
-    def callback(ch, method, properties, body):
-        # Start transaction for entire message processing
-        with SentryService.start_transaction(
-            name="process_query_message",
-            op="rabbitmq.consumer"
-        ) as transaction:
+def export_report(query_dto, result_cache):
+    """
+    Run the report query and write its CSV, then offer it to the result cache.
+
+    Returns:
+        (save_path, row_count)
+    """
+    # Execute query
+    with PipelineMetrics.time_stage("db.query"), SentryService.start_span(
+        op="db.query",
+        description=f"Execute query: {query_dto.name}"
+    ) as span:
+        results = QueryService().execute_query_from_rabbitmq(query=query_dto)
+
+        # Rows are streamed, so the row count is only known after the write
+        span.set_data("column_count", len(results.column_names) if results else 0)
+        pool = pool_metrics()
+        span.set_data("pool_checked_out", pool.checked_out)
+        span.set_data("pool_waits", pool.waits)
+        span.set_data("pool_max_wait_seconds", pool.max_wait_seconds)
+
+        SentryService.add_breadcrumb(
+            message="Query executed successfully",
+            category="database",
+            level="info",
+            data={"column_count": len(results.column_names) if results else 0}
+        )
+
+    # Save to CSV
+    with PipelineMetrics.time_stage("file.write"), SentryService.start_span(
+        op="file.write",
+        description="Save results to CSV"
+    ) as span:
+        save_path = DocumentSaveService().save_to_csv(
+            results=results,
+            query=query_dto
+        )
+        # Add performance metrics
+        row_count = results.row_count
+        span.set_data("file_path", save_path)
+        span.set_data("row_count", row_count)
+        span.set_data("byte_count", results.byte_count)
+        PipelineMetrics.record_export(row_count=row_count, byte_count=results.byte_count)
+        if results.pipeline_stats:
+            span.set_data("max_queue_depth", results.pipeline_stats.max_queue_depth)
+            span.set_data("fetch_stall_seconds", results.pipeline_stats.fetch_stall_seconds)
+            span.set_data("write_stall_seconds", results.pipeline_stats.write_stall_seconds)
+
+        SentryService.add_breadcrumb(
+            message="Results saved to CSV",
+            category="file_io",
+            level="info",
+            data={"save_path": save_path, "row_count": row_count}
+        )
+
+    try:
+        result_cache.store(query=query_dto, save_path=save_path, results=results)
+    except Exception as cache_error:
+        # A cache failure must never fail a report that was delivered
+        print(f"Failed to cache query result: {cache_error}")
+        SentryService.capture_exception(cache_error)
+
+    return save_path, row_count
+
+
+def process_message(body, publish):
+    """
+    Run one report request end to end: query, CSV, email, query log and cleanup.
+
+    The whole message is one database unit of work; its Session is closed
+    before the message is acknowledged.
+
+    Args:
+        body: Raw RabbitMQ message body
+        publish: Callable taking basic_publish keyword arguments
+    """
+    # Start transaction for entire message processing
+    with session_scope(), SentryService.start_transaction(
+        name="process_query_message",
+        op="rabbitmq.consumer"
+    ) as transaction:
+
+        SentryService.add_breadcrumb(
+            message="Received message from RabbitMQ",
+            category="rabbitmq",
+            level="info",
+            data={"body_size": len(body)}
+        )
+
+        print(f" [x] Received {body}")
+
+        query = None
+        query_dto = None
+        log_ticket = None
+        received_at = time.time()
+        started = time.perf_counter()
+        status = "failed"
+        save_path = None
+        row_count = None
+        capture = TrafficCapture.enabled()
+        if capture:
+            PipelineMetrics.begin_message()
+        profiler = MessageProfiler.start() if MessageProfiler.enabled() else None
+
+        try:
+            # Reflected models are mapped on first use, not at import
+            prepare_models()
+
+            # Parse message
+            with PipelineMetrics.time_stage("deserialize"), SentryService.start_span(
+                op="deserialize",
+                description="Parse RabbitMQ message to dict"
+            ):
+                query = json.loads(body)
+                SentryService.add_breadcrumb(
+                    message="Message deserialized successfully",
+                    category="processing",
+                    level="info",
+                    data={"query_id": query.get("id")}
+                )
 
-            SentryService.add_breadcrumb(
-                message="Received message from RabbitMQ",
-                category="rabbitmq",
-                level="info",
-                data={"body_size": len(body)}
-            )
+            # Convert to DTO
+            with PipelineMetrics.time_stage("dto.conversion"), SentryService.start_span(
+                op="dto.conversion",
+                description="Convert to ExecuteQueryDTO"
+            ):
+                query_dto = QueryService().to_execute_query_dto(query=query)
+                if profiler:
+                    profiler.identify(query_id=query_dto.query_id, user_id=query_dto.user_id)
+
+                # Set Sentry context with user and query information
+                SentryService.set_user_context(
+                    user_id=query_dto.user_id,
+                    email=query_dto.email,
+                    department=query_dto.department
+                )
 
-            print(f" [x] Received {body}")
+                SentryService.set_query_context(
+                    query_id=query_dto.query_id,
+                    query_name=query_dto.name,
+                    query_params=query_dto.query_params
+                )
 
-            query = None
-            query_dto = None
+                SentryService.add_breadcrumb(
+                    message="DTO created and context set",
+                    category="processing",
+                    level="info",
+                    data={
+                        "query_id": query_dto.query_id,
+                        "query_name": query_dto.name,
+                        "user_id": query_dto.user_id
+                    }
+                )
 
+            # Reuse an earlier identical report if one is still valid
+            result_cache = ResultCacheService()
             try:
-                # Parse message
-                with SentryService.start_span(
-                    op="deserialize",
-                    description="Parse RabbitMQ message to dict"
-                ):
-                    query = json.loads(body)
-                    SentryService.add_breadcrumb(
-                        message="Message deserialized successfully",
-                        category="processing",
-                        level="info",
-                        data={"query_id": query.get("id")}
-                    )
-
-                # Convert to DTO
-                with SentryService.start_span(
-                    op="dto.conversion",
-                    description="Convert to ExecuteQueryDTO"
-                ):
-                    query_dto = QueryService().to_execute_query_dto(query=query)
-
-                    # Set Sentry context with user and query information
-                    SentryService.set_user_context(
-                        user_id=query_dto.user_id,
-                        email=query_dto.email,
-                        department=query_dto.department
-                    )
-
-                    SentryService.set_query_context(
-                        query_id=query_dto.query_id,
-                        query_name=query_dto.name,
-                        query_params=query_dto.query_params
-                    )
-
-                    SentryService.add_breadcrumb(
-                        message="DTO created and context set",
-                        category="processing",
-                        level="info",
-                        data={
-                            "query_id": query_dto.query_id,
-                            "query_name": query_dto.name,
-                            "user_id": query_dto.user_id
-                        }
-                    )
-
-                # Execute query
-                with SentryService.start_span(
-                    op="db.query",
-                    description=f"Execute query: {query_dto.name}"
+                cached_result = result_cache.lookup(query=query_dto)
+            except Exception as cache_error:
+                # A cache failure must never fail a report; run it from the database
+                print(f"Failed to look up cached query result: {cache_error}")
+                SentryService.capture_exception(cache_error)
+                result_cache.discard(query=query_dto)
+                cached_result = None
+
+            if cached_result:
+                with PipelineMetrics.time_stage("cache.hit"), SentryService.start_span(
+                    op="cache.hit",
+                    description="Reuse cached query result"
                 ) as span:
-                    results = QueryService().execute_query_from_rabbitmq(query=query_dto)
-
-                    # Add performance metrics
-                    row_count = len(results.rows) if results and hasattr(results, 'rows') else 0
+                    save_path = result_cache.reuse(entry=cached_result, query=query_dto)
+                    row_count = cached_result.row_count
+                    span.set_data("file_path", save_path)
                     span.set_data("row_count", row_count)
-                    span.set_data("column_count", len(results.column_names) if results else 0)
 
                     SentryService.add_breadcrumb(
-                        message="Query executed successfully",
-                        category="database",
+                        message="Reused cached query result",
+                        category="cache",
                         level="info",
-                        data={"row_count": row_count}
+                        data={"save_path": save_path, "cache_key": cached_result.key}
                     )
-
-                # Save to CSV
-                with SentryService.start_span(
-                    op="file.write",
-                    description="Save results to CSV"
+            else:
+                # Identical requests already running elsewhere are waited on, not re-run
+                coalescer = RequestCoalescingService()
+                with PipelineMetrics.time_stage("coalesce.acquire"), SentryService.start_span(
+                    op="coalesce.acquire",
+                    description="Acquire request lease"
                 ) as span:
-                    save_path = DocumentSaveService().save_to_csv(
-                        results=results,
-                        query=query_dto
-                    )
-                    span.set_data("file_path", save_path)
+                    lease = coalescer.acquire(query=query_dto)
+                    span.set_data("coalesced", bool(lease.save_path))
 
+                if lease.save_path:
+                    # This user's own link to the leader's report, cleaned up like any other
+                    save_path, row_count = lease.save_path, lease.row_count
                     SentryService.add_breadcrumb(
-                        message="Results saved to CSV",
-                        category="file_io",
+                        message="Reused result of identical in-flight request",
+                        category="cache",
                         level="info",
                         data={"save_path": save_path}
                     )
+                else:
+                    try:
+                        save_path, row_count = export_report(query_dto, result_cache)
+                        coalescer.complete(lease=lease, save_path=save_path, row_count=row_count)
+                    finally:
+                        coalescer.release(lease=lease)
+
+            # Generate download link
+            download_path = DocumentSaveService().get_download_path(save_path=save_path)
+
+            # Send email
+            with PipelineMetrics.time_stage("email.send"), SentryService.start_span(
+                op="email.send",
+                description="Send report delivery email"
+            ):
+                data = ReportDeliveryDTO(
+                    first_name=query_dto.first_name,
+                    query_name=query_dto.name,
+                    link=download_path
+                )
+                email_recipient = RecipientDTO(
+                    email_address=query_dto.email,
+                    data=data
+                )
+                query_report_confirmation = query_report_delivered()
+                query_report_confirmation.send(recipients=[email_recipient], background=True)
 
-                # Generate download link
-                download_path = DocumentSaveService().get_download_path(save_path=save_path)
-
-                # Send email
-                with SentryService.start_span(
-                    op="email.send",
-                    description="Send report delivery email"
-                ):
-                    data = ReportDeliveryDTO(
-                        first_name=query_dto.first_name,
-                        query_name=query_dto.name,
-                        link=download_path
-                    )
-                    email_recipient = RecipientDTO(
-                        email_address=query_dto.email,
-                        data=data
-                    )
-                    query_report_confirmation = query_report_delivered()
-                    query_report_confirmation.send(recipients=[email_recipient])
-
-                    SentryService.add_breadcrumb(
-                        message="Email sent successfully",
-                        category="email",
-                        level="info",
-                        data={"recipient": query_dto.email}
-                    )
-
-                # Update query log
-                with SentryService.start_span(
-                    op="db.update",
-                    description="Update query log status"
-                ):
-                    QueryLogService().update_query_log(
-                        log_id=query["query_log_id"],
-                        status='SUCCESS'
-                    )
+                SentryService.add_breadcrumb(
+                    message="Email queued for delivery",
+                    category="email",
+                    level="info",
+                    data={"recipient": query_dto.email}
+                )
 
-                # Publish cleanup message
-                with SentryService.start_span(
-                    op="rabbitmq.publish",
-                    description="Publish cleanup message"
-                ):
-                    cleanup_message = json.dumps({'save_path': save_path})
-                    channel.basic_publish(
-                        exchange=Queue.NIB_QUEUE_EXCHANGE,
-                        routing_key=Queue.QUERY_REPORT_CLEANUP_QUEUE,
-                        body=cleanup_message,
-                        properties=pika.BasicProperties(
-                            headers={'x-delay': Queue.DELAY_RATE}
+            # Update query log (buffered; flushed before the message is acked)
+            with PipelineMetrics.time_stage("db.update"), SentryService.start_span(
+                op="db.update",
+                description="Update query log status"
+            ):
+                # A cache hit keeps the SUCCESS status; the log row carries its cache key
+                log_ticket = QueryLogService().update_query_log(
+                    log_id=query["query_log_id"],
+                    status='SUCCESS',
+                    write_behind=True
+                )
+                if cached_result:
+                    try:
+                        QueryLogService().record_cache_hit(
+                            log_id=query["query_log_id"],
+                            cache_key=cached_result.key
                         )
-                    )
+                    except Exception as log_error:
+                        # The report was delivered; a missing marker must not fail it
+                        print(f"Failed to record cache hit: {log_error}")
+                        SentryService.capture_exception(log_error)
 
-                    SentryService.add_breadcrumb(
-                        message="Cleanup message published",
-                        category="rabbitmq",
-                        level="info"
+            # Publish cleanup message
+            with PipelineMetrics.time_stage("rabbitmq.publish"), SentryService.start_span(
+                op="rabbitmq.publish",
+                description="Publish cleanup message"
+            ):
+                cleanup_message = json.dumps({'save_path': save_path})
+                publish(
+                    exchange=Queue.NIB_QUEUE_EXCHANGE,
+                    routing_key=Queue.QUERY_REPORT_CLEANUP_QUEUE,
+                    body=cleanup_message,
+                    properties=pika.BasicProperties(
+                        headers={'x-delay': Queue.DELAY_RATE}
                     )
+                )
 
-                # Send success event to Sentry
-                SentryService.capture_message(
-                    message=f"Query '{query_dto.name}' completed successfully",
-                    level="info",
-                    tags={
-                        "query_id": str(query_dto.query_id),
-                        "user_id": str(query_dto.user_id),
-                        "row_count": str(row_count)
-                    }
+                SentryService.add_breadcrumb(
+                    message="Cleanup message published",
+                    category="rabbitmq",
+                    level="info"
                 )
 
-                transaction.set_status("ok")
+            # Send success event to Sentry
+            SentryService.capture_message(
+                message=f"Query '{query_dto.name}' completed successfully",
+                level="info",
+                tags={
+                    "query_id": str(query_dto.query_id),
+                    "user_id": str(query_dto.user_id),
+                    "row_count": str(row_count)
+                }
+            )
 
-            except Exception as e:
-                # Set transaction status
-                if transaction:
-                    transaction.set_status("internal_error")
+            transaction.set_status("ok")
+            status = "cached" if cached_result else "success"
 
-                # Log error with full traceback
-                print(f"ERROR processing message: {e}")
-                print(traceback.format_exc())
+        except Exception as e:
+            # Set transaction status
+            if transaction:
+                transaction.set_status("internal_error")
 
-                # Add error breadcrumb
-                SentryService.add_breadcrumb(
-                    message=f"Error occurred: {str(e)}",
-                    category="error",
-                    level="error",
-                    data={"exception_type": type(e).__name__}
-                )
+            # Log error with full traceback
+            print(f"ERROR processing message: {e}")
+            print(traceback.format_exc())
 
-                # Capture exception with context
-                SentryService.capture_exception(
-                    exception=e,
-                    tags={
-                        "query_id": str(query_dto.query_id) if query_dto else "unknown",
-                        "user_id": str(query_dto.user_id) if query_dto else "unknown",
-                        "query_name": query_dto.name if query_dto else "unknown",
-                        "error_type": type(e).__name__
-                    }
+            # Add error breadcrumb
+            SentryService.add_breadcrumb(
+                message=f"Error occurred: {str(e)}",
+                category="error",
+                level="error",
+                data={"exception_type": type(e).__name__}
+            )
+
+            # Capture exception with context
+            SentryService.capture_exception(
+                exception=e,
+                tags={
+                    "query_id": str(query_dto.query_id) if query_dto else "unknown",
+                    "user_id": str(query_dto.user_id) if query_dto else "unknown",
+                    "query_name": query_dto.name if query_dto else "unknown",
+                    "error_type": type(e).__name__
+                }
+            )
+
+            # Update query log to FAILED if we have the log_id
+            if query and "query_log_id" in query:
+                try:
+                    log_ticket = QueryLogService().update_query_log(
+                        log_id=query["query_log_id"],
+                        status='FAILED',
+                        write_behind=True
+                    )
+                except Exception as log_error:
+                    print(f"Failed to update query log: {log_error}")
+                    SentryService.capture_exception(log_error)
+
+        finally:
+            # The query log must be written before the message is acknowledged
+            if log_ticket:
+                try:
+                    with PipelineMetrics.time_stage("db.flush"), SentryService.start_span(
+                        op="db.flush",
+                        description="Flush query log updates"
+                    ):
+                        QueryLogService().flush_query_logs(through=log_ticket)
+                except Exception as flush_error:
+                    print(f"Failed to update query log: {flush_error}")
+                    SentryService.capture_exception(flush_error)
+
+            elapsed = time.perf_counter() - started
+            PipelineMetrics.record_message(status=status, seconds=elapsed)
+            if capture:
+                TrafficCapture.record(
+                    body=body,
+                    received_at=received_at,
+                    status=status,
+                    seconds=elapsed,
+                    stages=PipelineMetrics.end_message(),
+                    row_count=row_count
                 )
 
-                # Update query log to FAILED if we have the log_id
-                if query and "query_log_id" in query:
-                    try:
-                        QueryLogService().update_query_log(
-                            log_id=query["query_log_id"],
-                            status='FAILED'
-                        )
-                    except Exception as log_error:
-                        print(f"Failed to update query log: {log_error}")
-                        SentryService.capture_exception(log_error)
+            if profiler:
+                record_profile(profiler, query, query_dto)
+
+    # Clear Sentry context for next message, after the transaction has decided
+    # what to send so kept events still carry the user and query
+    SentryService.clear_context()
+
 
-            finally:
-                # Always acknowledge the message
-                ch.basic_ack(delivery_tag=method.delivery_tag)
+def record_profile(profiler, query, query_dto):
+    """Write the message's profile, if kept, and reference it from the query log."""
+    log_id = query.get("query_log_id") if isinstance(query, dict) else None
+    name = f"query_{query_dto.query_id if query_dto else 'unknown'}_log_{log_id}"
+    profile_path = profiler.finish(name=name)
+    if profile_path and log_id:
+        try:
+            QueryLogService().record_profile(log_id=log_id, profile_path=profile_path)
+        except Exception as profile_error:
+            print(f"Failed to record profile path: {profile_error}")
 
-                # Clear Sentry context for next message
-                SentryService.clear_context()
-        
-        
-    channel.basic_qos(prefetch_count=100)
+
+def callback(ch, method, properties, body):
+    try:
+        process_message(body, publish=ch.basic_publish)
+    finally:
+        # Always acknowledge the message
+        ch.basic_ack(delivery_tag=method.delivery_tag)
+
+
+def run_consumer():
+    """Consume report requests until the queue connection is told to stop."""
+    try:
+        with session_scope():
+            prepare_models()
+            print(f" [*] Cached {QueryService().warm_sql_cache()} query scripts")
+    except Exception as e:
+        print(f"Failed to warm SQL script cache: {e}")
+
+    connection = QueryQueueConnection()
+    channel = connection.channel
+    worker_pool = None
+    on_message = callback
+    prefetch_count = 100
+
+    if QueryWorkerPool.WORKER_THREADS > 1:
+        worker_pool = QueryWorkerPool(
+            connection=connection.connection,
+            channel=channel,
+            handler=process_message
+        )
+        on_message = worker_pool.on_message
+        prefetch_count = worker_pool.workers
+
+    def stop_consuming(signum, frame):
+        # Let the current message(s) finish, then leave start_consuming()
+        connection.connection.add_callback_threadsafe(channel.stop_consuming)
+
+    signal.signal(signal.SIGTERM, stop_consuming)
+
+    channel.basic_qos(prefetch_count=prefetch_count)
     channel.exchange_declare(exchange=Queue.NIB_QUEUE_EXCHANGE, exchange_type=Queue.type, durable=True)
     channel.queue_declare(queue=Queue.QUERY_REPORT_QUEUE, durable=True)
     channel.basic_consume(
         queue=Queue.QUERY_REPORT_QUEUE,
-        on_message_callback=callback,
+        on_message_callback=on_message,
     )
+    MetricsServer.start()
     print(' [*] Waiting for messages. To exit press CTRL+C')
-    channel.start_consuming()
\ No newline at end of file
+    try:
+        channel.start_consuming()
+    finally:
+        if worker_pool:
+            worker_pool.shutdown()
+        QueryLogWriter.shutdown()
+        EmailDispatcher.shutdown()
+        print(f" [*] Connection pool: {pool_metrics()}")
+        MetricsServer.stop()
+        if connection.connection.is_open:
+            connection.connection.close()
+
+
+def run_worker_process():
+    """Supervisor child entry point: fresh engine, then its own consumer."""
+    reset_engine()
+    run_consumer()
+
+
+if __name__ == '__main__':
+    if WorkerSupervisor.PROCESSES > 1:
+        WorkerSupervisor(target=run_worker_process).run()
+    else:
+        run_consumer()
@@ -0,0 +1 @@
+# End-to-end consumer benchmarks; run with `python -m benchmarks.run_benchmarks`
@@ -0,0 +1,103 @@
+import threading
+from collections import defaultdict, deque
+from dataclasses import dataclass
+
+
+@dataclass
+class Delivery:
+    """The parts of pika's Basic.Deliver the consumer reads."""
+
+    delivery_tag: int
+    routing_key: str = ""
+
+
+class InMemoryChannel:
+    """
+    The subset of pika's BlockingChannel the consumer uses, backed by deques.
+
+    Messages published to a queue are delivered to its consumer by
+    start_consuming(), which returns once every queue is empty (or
+    stop_consuming() is called). Publishes and acks are recorded so a
+    benchmark can check every message was acknowledged.
+    """
+
+    def __init__(self):
+        self.queues = defaultdict(deque)
+        self.published = defaultdict(list)
+        self.acked = set()
+        self.consumers = {}
+        self.prefetch_count = None
+        self._delivery_tag = 0
+        self._consuming = False
+        self._lock = threading.Lock()
+
+    def basic_qos(self, prefetch_count: int = 0, **kwargs) -> None:
+        self.prefetch_count = prefetch_count
+
+    def exchange_declare(self, exchange: str, **kwargs) -> None:
+        pass
+
+    def queue_declare(self, queue: str, **kwargs) -> None:
+        self.queues[queue]
+
+    def basic_consume(self, queue: str, on_message_callback, **kwargs) -> None:
+        self.consumers[queue] = on_message_callback
+
+    def basic_publish(self, exchange: str, routing_key: str, body, properties=None, **kwargs) -> None:
+        with self._lock:
+            self.published[routing_key].append((body, properties))
+            if routing_key in self.consumers:
+                self.queues[routing_key].append(body)
+
+    def enqueue(self, queue: str, body) -> None:
+        """Put a message on a queue as if a producer had published it."""
+        with self._lock:
+            self.queues[queue].append(body)
+
+    def basic_ack(self, delivery_tag: int, **kwargs) -> None:
+        with self._lock:
+            self.acked.add(delivery_tag)
+
+    def start_consuming(self) -> None:
+        self._consuming = True
+        while self._consuming:
+            delivery = self._next()
+            if delivery is None:
+                return
+            queue, method, body = delivery
+            self.consumers[queue](self, method, None, body)
+
+    def stop_consuming(self) -> None:
+        self._consuming = False
+
+    @property
+    def delivered(self) -> int:
+        return self._delivery_tag
+
+    def _next(self):
+        with self._lock:
+            for queue, callback in self.consumers.items():
+                if self.queues[queue]:
+                    self._delivery_tag += 1
+                    return queue, Delivery(self._delivery_tag, queue), self.queues[queue].popleft()
+        return None
+
+
+class InMemoryConnection:
+    """
+    Stands in for pika's BlockingConnection. Thread-safe callbacks run
+    immediately on the calling thread, which the locked channel allows.
+    """
+
+    def __init__(self):
+        self.channel = InMemoryChannel()
+        self.is_open = True
+
+    def add_callback_threadsafe(self, callback) -> None:
+        callback()
+
+    def process_data_events(self, time_limit: float = 0) -> None:
+        pass
+
+    def close(self) -> None:
+        self.is_open = False
@@ -0,0 +1,268 @@
+"""
+End-to-end throughput benchmarks for the report consumer.
+
+Each scenario runs in a forked process that drives the real app.callback
+(or QueryWorkerPool with app.process_message) over an in-memory broker. Data
+comes from a SQLite stand-in for Oracle and mail goes to a stub mail server.
+Messages/s, rows/s, p50/p99 latency and peak RSS are printed and appended to
+benchmarks/results.jsonl with the current commit. Each run is compared with
+the latest stored run of the same scenario from another commit.
+
+    python -m benchmarks.run_benchmarks                  # every scenario
+    python -m benchmarks.run_benchmarks lookup report    # some of them
+    python -m benchmarks.run_benchmarks report --rows 50000 --threads 4
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from datetime import datetime
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, ROOT_PATH)
+
+from src.monitoring.sentry_service import SentryService
+
+# Benchmarks must not report to Sentry; app.py initializes it on import
+SentryService._initialized = True
+
+import app
+from config import NIBEmailService, Queue
+from src import reset_engine, prepare_models
+from src.admin.query_log.query_log_writer import QueryLogWriter
+from src.database.reflection import CachedReflection
+from src.document_save.document_save_service import DocumentSaveService
+from src.email.email_dispatcher import EmailDispatcher
+from src.query_queue.query_worker_pool import QueryWorkerPool
+from benchmarks.in_memory_broker import InMemoryConnection
+from benchmarks.latency import percentile
+from benchmarks.stand_in_database import StandInDatabase
+from benchmarks.stub_mail_server import StubMailServer
+
+RESULTS_PATH = os.path.join(ROOT_PATH, "benchmarks", "results.jsonl")
+USER_ID = 1
+USER_NAME = "bench"
+
+# Tiny lookups dominate the message count, month-end extracts the run time
+SCENARIOS = {
+    "lookup": {"columns": 6, "rows": 20, "messages": 200, "threads": 1},
+    "lookup_concurrent": {"columns": 6, "rows": 20, "messages": 200, "threads": 4},
+    "report": {"columns": 20, "rows": 20000, "messages": 10, "threads": 1},
+    "month_end": {"columns": 60, "rows": 200000, "messages": 2, "threads": 1},
+}
+
+
+def run_scenario(name: str, columns: int, rows: int, messages: int, threads: int, mail_latency: float) -> dict:
+    """Run one scenario in this process; call it in a fresh fork (see measure)."""
+    directory = tempfile.mkdtemp(prefix=f"bench_{name}_")
+    try:
+        return _run_scenario(directory, name, columns, rows, messages, threads, mail_latency)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def _run_scenario(directory: str, name: str, columns: int, rows: int, messages: int, threads: int,
+                  mail_latency: float) -> dict:
+    database = StandInDatabase(directory)
+    database.create_schema(user_id=USER_ID, user_name=USER_NAME)
+    query = database.add_report(name=name, columns=columns, rows=rows)
+
+    reset_engine(database.engine)
+    CachedReflection.CACHE_PATH = os.path.join(directory, "reflection.pickle")
+    prepare_models()
+    DocumentSaveService.base_path = os.path.join(directory, "reports")
+    mail_server = StubMailServer(latency=mail_latency).start()
+    NIBEmailService.root_url = mail_server.url
+
+    connection = InMemoryConnection()
+    channel = connection.channel
+    for index in range(messages):
+        log_id = database.add_query_log(user_id=USER_ID, user_name=USER_NAME, query_id=query["id"])
+        channel.enqueue(Queue.QUERY_REPORT_QUEUE, json.dumps({
+            "id": query["id"],
+            "name": query["name"],
+            "file_path": query["file_path"],
+            "department": query["department"],
+            "user_id": USER_ID,
+            "first_name": "Bench",
+            "email_address": "bench@example.com",
+            # Every id is <= rows, so each message returns the full table; distinct
+            # values keep the coalescing and result caches from merging messages
+            "query_params": {"max_id": rows + index},
+            "query_log_id": log_id,
+        }))
+
+    latencies = []
+
+    def timed(handler):
+        def run(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return handler(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+        return run
+
+    worker_pool = None
+    on_message = timed(app.callback)
+    if threads > 1:
+        worker_pool = QueryWorkerPool(
+            connection=connection, channel=channel, handler=timed(app.process_message), workers=threads
+        )
+        on_message = worker_pool.on_message
+    channel.basic_consume(queue=Queue.QUERY_REPORT_QUEUE, on_message_callback=on_message)
+
+    started = time.perf_counter()
+    channel.start_consuming()
+    if worker_pool:
+        worker_pool.shutdown()
+    QueryLogWriter.shutdown()
+    # Delivery is part of the pipeline: wait for the background mail stage
+    EmailDispatcher.shutdown()
+    elapsed = time.perf_counter() - started
+    mail_server.stop()
+
+    statuses = database.status_counts()
+    succeeded = statuses.get("SUCCESS", 0)
+    return {
+        "messages": messages,
+        "succeeded": succeeded,
+        "acked": len(channel.acked),
+        "emails": mail_server.recipients,
+        "seconds": round(elapsed, 3),
+        "messages_per_second": round(messages / elapsed, 2),
+        "rows_per_second": round(succeeded * rows / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+        # ru_maxrss is in kilobytes on Linux
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def _child(pipe, name: str, settings: dict) -> None:
+    try:
+        pipe.send(run_scenario(name=name, **settings))
+    except Exception:
+        pipe.send({"error": traceback.format_exc()})
+    finally:
+        pipe.close()
+
+
+def measure(name: str, settings: dict) -> dict:
+    """Run a scenario in a forked process so its peak RSS and caches are its own."""
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_child, args=(sender, name, settings), name=f"bench-{name}")
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {"error": f"benchmark process exited with code {process.exitcode}"}
+    process.join()
+    return result
+
+
+def current_commit() -> str:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_PATH, capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               cwd=ROOT_PATH, capture_output=True, text=True).stdout.strip()
+        return commit + ("-dirty" if dirty else "")
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path) as results_file:
+        return [json.loads(line) for line in results_file if line.strip()]
+
+
+def previous_result(results: list, scenario: str, settings: dict, commit: str):
+    """Latest stored run of the same scenario and settings from another commit."""
+    for entry in reversed(results):
+        if entry["scenario"] == scenario and entry["settings"] == settings and entry["commit"] != commit:
+            return entry
+    return None
+
+
+def compare(metrics: dict, previous: dict) -> str:
+    changes = []
+    for key in ("messages_per_second", "rows_per_second", "p50_ms", "p99_ms", "peak_rss_mb"):
+        before, after = previous["metrics"].get(key), metrics.get(key)
+        if before:
+            changes.append(f"{key} {(after - before) / before:+.1%}")
+    return f"vs {previous['commit']}: " + ", ".join(changes)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="End-to-end report consumer benchmarks")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("--columns", type=int, help="Override the report width")
+    parser.add_argument("--rows", type=int, help="Override the rows per report")
+    parser.add_argument("--messages", type=int, help="Override the number of messages")
+    parser.add_argument("--threads", type=int, help="Override the worker threads")
+    parser.add_argument("--mail-latency", type=float, default=0.0, help="Stub mail server response time in seconds")
+    parser.add_argument("--results", default=RESULTS_PATH, help="JSON lines file the results are appended to")
+    parser.add_argument("--no-save", action="store_true", help="Print results without storing them")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario(s): {', '.join(unknown)}")
+
+    commit = current_commit()
+    stored = load_results(args.results)
+    failed = False
+    for name in args.scenarios or SCENARIOS:
+        settings = dict(SCENARIOS[name], mail_latency=args.mail_latency)
+        for key in ("columns", "rows", "messages", "threads"):
+            if getattr(args, key) is not None:
+                settings[key] = getattr(args, key)
+
+        metrics = measure(name, settings)
+        if "error" in metrics:
+            failed = True
+            print(f" [!] {name} failed:\n{metrics['error']}")
+            continue
+        if metrics["succeeded"] != metrics["messages"] or metrics["acked"] != metrics["messages"]:
+            failed = True
+            print(f" [!] {name}: only {metrics['succeeded']} of {metrics['messages']} messages succeeded")
+
+        print(
+            f" [*] {name}: {metrics['messages_per_second']} msg/s, {metrics['rows_per_second']} rows/s, "
+            f"p50 {metrics['p50_ms']} ms, p99 {metrics['p99_ms']} ms, peak RSS {metrics['peak_rss_mb']} MB"
+        )
+        previous = previous_result(stored, name, settings, commit)
+        if previous:
+            print(f"     {compare(metrics, previous)}")
+
+        entry = {
+            "scenario": name,
+            "settings": settings,
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "metrics": metrics,
+        }
+        stored.append(entry)
+        if not args.no_save:
+            with open(args.results, "a") as results_file:
+                results_file.write(json.dumps(entry) + "\n")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
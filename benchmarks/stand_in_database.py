@@ -0,0 +1,153 @@
+import os
+import random
+import sqlite3
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+import sqlalchemy as sa
+from config import OracleDB
+from src.database.engine_factory import EngineFactory
+
+# Declared types cycle across the synthetic columns; PARSE_DECLTYPES turns
+# them back into the Decimal/date/datetime values the Oracle driver returns
+COLUMN_TYPES = ("integer", "varchar(40)", "decimal(12,2)", "date", "timestamp")
+INSERT_CHUNK = 5000
+
+sqlite3.register_adapter(Decimal, str)
+sqlite3.register_converter("decimal", lambda value: Decimal(value.decode("ascii")))
+
+
+class StandInDatabase:
+    """
+    SQLite files laid out like the Oracle schemas the consumer reads.
+
+    The application schema (OracleDB().userName) and nib_admin_auth are
+    attached databases, so the models' schema-qualified tables and the
+    reflection cache work unchanged. Report tables are synthetic, with a
+    chosen number of columns and rows and a script per table.
+    """
+
+    AUTH_SCHEMA = "nib_admin_auth"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.app_schema = OracleDB().userName
+        self.schemas = {self.app_schema: "app.db", self.AUTH_SCHEMA: "auth.db"}
+        self.engine = self._create_engine()
+        self._next_query_id = 1
+        self._next_log_id = 1
+
+    def _create_engine(self) -> sa.engine.Engine:
+        engine = sa.create_engine(
+            f"sqlite:///{os.path.join(self.directory, 'main.db')}",
+            connect_args={"detect_types": sqlite3.PARSE_DECLTYPES, "check_same_thread": False, "timeout": 30},
+            **EngineFactory.pool_options(),
+        )
+        EngineFactory.instrument(engine)
+
+        @sa.event.listens_for(engine, "connect")
+        def attach(dbapi_connection, connection_record):
+            for schema, file_name in self.schemas.items():
+                path = os.path.join(self.directory, file_name)
+                dbapi_connection.execute(f"attach database '{path}' as \"{schema}\"")
+
+        return engine
+
+    def create_schema(self, user_id: int, user_name: str) -> None:
+        """The tables behind QueryTable, QueryLogTable and NIBUser, with one user."""
+        with self.engine.begin() as connection:
+            connection.execute(sa.text(
+                f'create table "{self.app_schema}".query_table '
+                "(id integer primary key, name varchar(40), file_path varchar(400), department varchar(40))"
+            ))
+            connection.execute(sa.text(
+                f'create table "{self.app_schema}".query_log_table '
+                "(id integer primary key, user_id integer, query_id integer, user_name varchar(40), "
+                "status varchar(20), inserted_by varchar(40), inserted_date timestamp)"
+            ))
+            connection.execute(sa.text(
+                f"create table {self.AUTH_SCHEMA}.nib_users "
+                "(id integer primary key, user_id integer, user_name varchar(40), first_name varchar(40), "
+                "last_name varchar(40), middle_name varchar(40), email varchar(80))"
+            ))
+            connection.execute(
+                sa.text(f"insert into {self.AUTH_SCHEMA}.nib_users (id, user_id, user_name, first_name, email) "
+                        "values (:id, :id, :name, 'Bench', 'bench@example.com')"),
+                {"id": user_id, "name": user_name},
+            )
+
+    def add_report(self, name: str, columns: int, rows: int, seed: int = 42) -> dict:
+        """
+        Create a synthetic report table, its script and its query_table row.
+
+        Returns:
+            The query row: id, name, file_path and department
+        """
+        table = f'"{self.app_schema}".bench_{name}'
+        definitions = ["id integer primary key"] + [
+            f"c{index} {COLUMN_TYPES[index % len(COLUMN_TYPES)]}" for index in range(1, columns)
+        ]
+        generator = random.Random(seed)
+        with self.engine.begin() as connection:
+            connection.execute(sa.text(f"create table {table} ({', '.join(definitions)})"))
+            placeholders = ", ".join("?" * columns)
+            cursor = connection.connection.cursor()
+            for start in range(1, rows + 1, INSERT_CHUNK):
+                cursor.executemany(
+                    f"insert into {table} values ({placeholders})",
+                    [self._row(row_id, columns, generator) for row_id in range(start, min(start + INSERT_CHUNK, rows + 1))],
+                )
+
+        file_path = os.path.join(self.directory, "scripts", f"bench_{name}.sql")
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, "w") as script:
+            script.write(
+                "-- Parameters: Max Id:max_id\n"
+                "-- Order By: id\n"
+                f"select * from {table} where id <= :max_id order by id\n"
+            )
+
+        query = {"id": self._next_query_id, "name": f"Bench {name}", "file_path": file_path, "department": "BENCH"}
+        self._next_query_id += 1
+        with self.engine.begin() as connection:
+            connection.execute(
+                sa.text(f'insert into "{self.app_schema}".query_table values (:id, :name, :file_path, :department)'),
+                query,
+            )
+        return query
+
+    @staticmethod
+    def _row(row_id: int, columns: int, generator: random.Random) -> tuple:
+        values = [row_id]
+        for index in range(1, columns):
+            column_type = COLUMN_TYPES[index % len(COLUMN_TYPES)]
+            if column_type == "integer":
+                values.append(generator.randrange(1_000_000))
+            elif column_type.startswith("varchar"):
+                text = f"value {generator.randrange(1_000_000)}"
+                # Some values need CSV quoting, as real names and addresses do
+                values.append(text + ', "quoted"' if row_id % 97 == 0 else text)
+            elif column_type.startswith("decimal"):
+                values.append(Decimal(generator.randrange(10_000_000)) / 100)
+            elif column_type == "date":
+                values.append(date(2020, 1, 1) + timedelta(days=generator.randrange(2000)))
+            else:
+                values.append(datetime(2020, 1, 1) + timedelta(seconds=generator.randrange(10 ** 8)))
+        return tuple(values)
+
+    def add_query_log(self, user_id: int, user_name: str, query_id: int) -> int:
+        log_id = self._next_log_id
+        self._next_log_id += 1
+        with self.engine.begin() as connection:
+            connection.execute(
+                sa.text(f'insert into "{self.app_schema}".query_log_table '
+                        "values (:id, :user_id, :query_id, :user_name, 'PENDING', :user_name, :inserted)"),
+                {"id": log_id, "user_id": user_id, "query_id": query_id, "user_name": user_name,
+                 "inserted": datetime.now()},
+            )
+        return log_id
+
+    def status_counts(self) -> dict:
+        with self.engine.connect() as connection:
+            return dict(connection.execute(sa.text(
+                f'select status, count(*) from "{self.app_schema}".query_log_table group by status'
+            )).all())
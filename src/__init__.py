@@ -1,12 +1,68 @@
-import sqlalchemy as sa
-from config import OracleDB
+from contextlib import contextmanager
 from sqlalchemy import orm
 from sqlalchemy.ext.declarative import declarative_base
+from src.database.engine_factory import EngineFactory, PoolMetrics
+from src.database.dto.pool_metrics_dto import PoolMetricsDTO
+from src.database.reflection import CachedReflection
+
+# Rows fetched per Oracle round trip; also the batch size for streamed results
+ORACLE_ARRAYSIZE = EngineFactory.ARRAYSIZE
+
+
+def create_db_engine():
+    return EngineFactory.create()
+
 
 base=declarative_base()
-engine=sa.create_engine(f"oracle+oracledb://{OracleDB.dbaUser}:{OracleDB.dbaPassword}@{OracleDB.host}:{OracleDB.port}?service_name={OracleDB.sid}",
-                        echo=True)
+engine=create_db_engine()
 base.metadata.bind = engine
 session= orm.scoped_session(orm.sessionmaker(bind=engine))
 session.configure(bind=engine)
-Session=session()
\ No newline at end of file
+# Thread-local proxy: each thread (e.g. QueryWorkerPool workers) gets its own Session
+Session=session
+
+
+@contextmanager
+def session_scope():
+    """
+    Unit of work for one message: the thread's Session is rolled back on
+    error and always closed on exit, so no transaction or identity map
+    outlives the message. Repos still commit their own writes.
+    """
+    try:
+        yield session()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.remove()
+
+
+def prepare_models() -> None:
+    """Map the reflected models (QueryTable, QueryLogTable, NIBUser) before first use."""
+    CachedReflection.prepare_once(engine)
+
+
+def pool_metrics() -> PoolMetricsDTO:
+    """Checkout and wait counters of the current engine's connection pool."""
+    return EngineFactory.pool_metrics(engine)
+
+
+# The metrics endpoint reads the pool of whichever engine is current
+PoolMetrics.watch(pool_metrics)
+
+
+def reset_engine(new_engine=None):
+    """
+    Give a freshly forked worker process its own engine, or point every
+    Session at new_engine (e.g. the benchmark harness's stand-in database).
+
+    The parent's pooled connections are dropped without being closed, so the
+    parent's sockets are never shared with (or closed by) a child.
+    """
+    global engine
+    engine.dispose(close=False)
+    engine = new_engine or create_db_engine()
+    base.metadata.bind = engine
+    session.remove()
+    session.configure(bind=engine)
@@ -10,3 +10,5 @@ class QueryLogSearchCriteriaDTO:
     user_name: Optional[str] = None
     query_id: Optional[int] = None
     date: Optional[DateRangeDTO] = None
+    page: int = 1
+    per_page: int = 50
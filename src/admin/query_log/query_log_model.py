@@ -1,8 +1,9 @@
 from sqlalchemy import *
-from src import engine, base
+from src import base
+from src.database.reflection import CachedReflection
 from config import OracleDB
 
 
-class QueryLogTable(base):
+class QueryLogTable(CachedReflection, base):
     __tablename__ = 'query_log_table'
-    __table_args__ = ({'schema': OracleDB().userName, 'autoload_with': engine, "extend_existing" : True})
+    __table_args__ = ({'schema': OracleDB().userName, "extend_existing" : True})
@@ -1,4 +1,7 @@
 from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Tuple
+from sqlalchemy import bindparam, func, update
 from src.admin.query_log.query_log_model import QueryLogTable
 from src.queries.query_model import QueryTable
 from src.admin.query_log.dto.create_query_log_dto import CreateQueryLogDTO
@@ -13,6 +16,10 @@ from src import Session
 @dataclass
 class QueryLogRepo:
     db = Session
+    # Optional column; profiles are only referenced if the table has it
+    PROFILE_COLUMN = "profile_path"
+    # Optional column; set to the result cache key when a report was served from the cache
+    CACHE_KEY_COLUMN = "cache_key"
 
     def add_benefit_log(self, query_log_dto: CreateQueryLogDTO) -> QueryLogDTO:
         query_log = QueryLogTable(
@@ -28,36 +35,61 @@ class QueryLogRepo:
 
     def filter_query_log(
         self, query_log_search_criteria: QueryLogSearchCriteriaDTO
-    ) -> list:
+    ) -> Tuple[List[QueryLogDTO], int]:
+        """
+        One page of matching logs, oldest first, and the total match count.
+
+        The count is a separate COUNT(*) without ordering, so neither query
+        materializes more than a page of rows.
+        """
+        query_log = self._search(query_log_search_criteria)
+        total = query_log.with_entities(func.count(QueryLogTable.id)).order_by(None).scalar()
+        page = max(query_log_search_criteria.page, 1)
+        per_page = query_log_search_criteria.per_page
+        query_logs = (
+            query_log.order_by(QueryLogTable.inserted_date.asc(), QueryLogTable.id.asc())
+            .offset((page - 1) * per_page)
+            .limit(per_page)
+        )
+        return self.to_query_log_dtos(query_logs), total
+
+    def iter_query_log(
+        self, query_log_search_criteria: QueryLogSearchCriteriaDTO, chunk_size: int = 1000
+    ) -> Iterator[QueryLogDTO]:
+        """Every matching log, oldest first, fetched chunk_size rows at a time for exports."""
+        query_logs = (
+            self._search(query_log_search_criteria)
+            .order_by(QueryLogTable.inserted_date.asc(), QueryLogTable.id.asc())
+            .yield_per(chunk_size)
+        )
+        for query_log in query_logs:
+            yield self.to_query_log_dto(query_log)
+
+    def _search(self, query_log_search_criteria: QueryLogSearchCriteriaDTO):
+        # Inner joins: logs of deleted users or queries stay out of the listing
         query_log = (
             self.db.query(QueryLogTable)
             .join(NIBUser, NIBUser.id == QueryLogTable.user_id)
             .join(QueryTable, QueryTable.id == QueryLogTable.query_id)
         )
-        for attr, value in query_log_search_criteria.__dict__.items():
-            if "user_name" in attr and value:
-                query_log = query_log.filter(
-                    getattr(getattr(NIBUser, attr), "ilike")(f"%{value}%")
-                )
-                continue
-
-            if "query_id" == attr and value:
-                query_log = query_log.filter(getattr(QueryTable, attr) == value)
-                continue
-
-            if attr == "inserted_date":
-                date_range: DateRangeDTO = value
-                if date_range.start:
-                    query_log = query_log.filter(
-                        getattr(QueryLogTable, attr) >= date_range.start
-                    )
-                if date_range.end:
-                    query_log = query_log.filter(getattr(QueryLogTable, attr) <= date_range.end)
-                continue
-
-        query_logs = query_log.order_by(QueryLogTable.inserted_date.asc())
-        query_dtos = self.to_query_log_dtos(query_logs)
-        return query_dtos, query_logs.total
+        user_name = query_log_search_criteria.user_name
+        if user_name:
+            # Prefix match: lower(user_name) LIKE 'abc%' can use a function-based index
+            prefix = user_name.lower().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query_log = query_log.filter(func.lower(NIBUser.user_name).like(f"{prefix}%", escape="\\"))
+        if query_log_search_criteria.query_id:
+            query_log = query_log.filter(QueryLogTable.query_id == query_log_search_criteria.query_id)
+        date_range: DateRangeDTO = query_log_search_criteria.date
+        if date_range and date_range.start:
+            query_log = query_log.filter(QueryLogTable.inserted_date >= date_range.start)
+        if date_range and date_range.end:
+            end = date_range.end
+            if isinstance(end, date) and not isinstance(end, datetime):
+                # A whole end day, as a half-open range the date index can seek
+                query_log = query_log.filter(QueryLogTable.inserted_date < end + timedelta(days=1))
+            else:
+                query_log = query_log.filter(QueryLogTable.inserted_date <= end)
+        return query_log
 
     def update_query_log(
         self, query_id: int, status: str
@@ -67,6 +99,52 @@ class QueryLogRepo:
         self.db.commit()
         return self.to_query_log_dto(query_log)
 
+    def update_query_log_statuses(self, statuses: Dict[int, str]) -> None:
+        """Set many log statuses with one executemany UPDATE and one commit."""
+        table = QueryLogTable.__table__
+        statement = (
+            update(table)
+            .where(table.c.id == bindparam("log_id"))
+            .values(status=bindparam("new_status"))
+        )
+        self.db.execute(
+            statement,
+            [{"log_id": log_id, "new_status": status} for log_id, status in statuses.items()],
+        )
+        self.db.commit()
+
+    def update_query_log_profile(self, log_id: int, profile_path: str) -> bool:
+        """
+        Record where a message's profile was written.
+
+        Returns:
+            False if query_log_table has no PROFILE_COLUMN to hold it
+        """
+        table = QueryLogTable.__table__
+        if self.PROFILE_COLUMN not in table.c:
+            return False
+        self.db.execute(
+            update(table).where(table.c.id == log_id).values({self.PROFILE_COLUMN: profile_path})
+        )
+        self.db.commit()
+        return True
+
+    def update_query_log_cache_key(self, log_id: int, cache_key: str) -> bool:
+        """
+        Mark a log as served from the result cache.
+
+        Returns:
+            False if query_log_table has no CACHE_KEY_COLUMN to hold it
+        """
+        table = QueryLogTable.__table__
+        if self.CACHE_KEY_COLUMN not in table.c:
+            return False
+        self.db.execute(
+            update(table).where(table.c.id == log_id).values({self.CACHE_KEY_COLUMN: cache_key})
+        )
+        self.db.commit()
+        return True
+
     def to_query_log_dto(self, query_log: QueryLogTable) -> QueryLogDTO:
         return QueryLogDTO(
             id=query_log.id,
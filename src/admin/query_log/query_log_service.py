@@ -1,6 +1,7 @@
 from src.admin.query_log.dto.create_query_log_dto import CreateQueryLogDTO
 from src.admin.query_log.enum.query_log_exception_messages import QueryLogException
 from src.admin.query_log.query_log_repo import QueryLogRepo
+from src.admin.query_log.query_log_writer import QueryLogWriter
 from src.nib_user.nib_user_repo import NIBUserRepo
 from werkzeug.exceptions import BadRequest
 from src.admin.query_log.dto.query_log_search_criteria_dto import (
@@ -26,14 +27,35 @@ class QueryLogService:
             raise BadRequest(QueryLogException.NO_QUERY_LOGS_FOUND.value)
         return queries, total
 
+    def stream_query_logs(self, query_log_search_criteria: QueryLogSearchCriteriaDTO):
+        """Iterator over every matching log for exports; rows are fetched in chunks."""
+        return self.query_log_repo.iter_query_log(query_log_search_criteria)
+
     def create_query_log(self, query_log_dto: CreateQueryLogDTO):
         if not query_log_dto:
             raise BadRequest(QueryLogException.QUERY_LOG_NOT_SENT.value)
         return self.query_log_repo.add_benefit_log(query_log_dto)
 
-    def update_query_log(self, log_id: int, status: str):
+    def update_query_log(self, log_id: int, status: str, write_behind: bool = False):
+        """
+        With write_behind the update is buffered and a ticket is returned;
+        pass it to flush_query_logs() before acknowledging the message.
+        """
         if not log_id:
             raise BadRequest(QueryLogException.QUERY_ID_NOT_SENT.value)
+        if write_behind:
+            return QueryLogWriter.update(log_id=log_id, status=status)
         return self.query_log_repo.update_query_log(
             query_id=log_id, status=status
         )
+
+    def flush_query_logs(self, through: int = None) -> None:
+        QueryLogWriter.flush(through=through)
+
+    def record_profile(self, log_id: int, profile_path: str) -> None:
+        if not self.query_log_repo.update_query_log_profile(log_id=log_id, profile_path=profile_path):
+            print(f"Query log {log_id} has no {QueryLogRepo.PROFILE_COLUMN} column; profile at {profile_path}")
+
+    def record_cache_hit(self, log_id: int, cache_key: str) -> None:
+        if not self.query_log_repo.update_query_log_cache_key(log_id=log_id, cache_key=cache_key):
+            print(f"Query log {log_id} has no {QueryLogRepo.CACHE_KEY_COLUMN} column; served from cache {cache_key}")
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+from typing import Dict, Tuple
+from src import session
+from src.admin.query_log.query_log_repo import QueryLogRepo
+
+
+class QueryLogWriter:
+    """
+    Write-behind buffer for query log status updates.
+
+    update() records a transition and returns at once. One daemon thread per
+    process writes every buffered transition with a single executemany
+    UPDATE when QUERY_LOG_BATCH_SIZE are waiting, the oldest has waited
+    QUERY_LOG_FLUSH_INTERVAL milliseconds, or someone calls flush(). Only the
+    latest status per log is written.
+
+    flush(through=ticket) blocks until that update is in the database, so the
+    consumer can still guarantee the log is written before it acks. Worker
+    threads flushing at the same time share one round trip. A failed write
+    is raised only to flushers whose tickets were in that batch; the others
+    keep waiting for the retry.
+    """
+
+    BATCH_SIZE = int(os.environ.get("QUERY_LOG_BATCH_SIZE", "50"))
+    FLUSH_INTERVAL = float(os.environ.get("QUERY_LOG_FLUSH_INTERVAL", "500")) / 1000
+    FLUSH_TIMEOUT = 30  # seconds flush() waits for the writer thread
+
+    _pending: Dict[int, Tuple[str, int]] = {}
+    _sequence = 0
+    _requested_through = 0
+    _written_through = 0
+    _failures = 0
+    _failed_through = 0
+    _last_error = None
+    _oldest = None
+    _thread = None
+    _pid = None
+    _stopping = False
+    _lock = threading.Lock()
+    _changed = threading.Condition(_lock)
+
+    @classmethod
+    def update(cls, log_id: int, status: str) -> int:
+        """Buffer a status change; returns the ticket to pass to flush()."""
+        cls._ensure_started()
+        with cls._lock:
+            cls._sequence += 1
+            cls._pending[log_id] = (status, cls._sequence)
+            if cls._oldest is None:
+                # The writer may be waiting without a timeout; start its interval
+                cls._oldest = time.monotonic()
+                cls._changed.notify_all()
+            elif len(cls._pending) >= cls.BATCH_SIZE:
+                cls._changed.notify_all()
+            return cls._sequence
+
+    @classmethod
+    def flush(cls, through: int = None) -> None:
+        """
+        Wait until updates up to ticket `through` (everything buffered if None) are written.
+
+        Raises:
+            RuntimeError: if the write failed or timed out; the updates stay buffered
+        """
+        with cls._lock:
+            target = cls._sequence if through is None else through
+            if cls._written_through >= target:
+                return
+            if not cls._running():
+                raise RuntimeError("Query log writer is not running")
+            failures = cls._failures
+            cls._requested_through = max(cls._requested_through, target)
+            cls._changed.notify_all()
+            # Every unwritten update up to a batch's highest ticket is in that
+            # batch (or superseded by a newer status that is), so a failure
+            # only concerns flushers whose target is not beyond it
+            done = cls._changed.wait_for(
+                lambda: cls._written_through >= target
+                or (cls._failures > failures and cls._failed_through >= target),
+                timeout=cls.FLUSH_TIMEOUT,
+            )
+            if cls._written_through < target:
+                reason = cls._last_error if done else "timed out"
+                raise RuntimeError(f"Query log update not written: {reason}")
+
+    @classmethod
+    def shutdown(cls) -> None:
+        """Write everything still buffered and stop the background thread."""
+        with cls._lock:
+            if not cls._running():
+                return
+            cls._stopping = True
+            cls._changed.notify_all()
+            thread = cls._thread
+        thread.join(cls.FLUSH_TIMEOUT)
+        if cls.pending():
+            print(f" [!] Query log writer stopped with {cls.pending()} updates unwritten")
+
+    @classmethod
+    def pending(cls) -> int:
+        with cls._lock:
+            return len(cls._pending)
+
+    @classmethod
+    def _running(cls) -> bool:
+        return cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive()
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        with cls._lock:
+            if cls._running():
+                return
+            if cls._pid != os.getpid():
+                # Updates buffered by a parent process are the parent's to write
+                cls._pending = {}
+                cls._oldest = None
+            cls._pid = os.getpid()
+            cls._stopping = False
+            cls._thread = threading.Thread(target=cls._run, name="query-log-writer", daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def _due(cls) -> bool:
+        if not cls._pending:
+            return False
+        return (
+            cls._stopping
+            or cls._requested_through > cls._written_through
+            or len(cls._pending) >= cls.BATCH_SIZE
+            or time.monotonic() - cls._oldest >= cls.FLUSH_INTERVAL
+        )
+
+    @classmethod
+    def _run(cls) -> None:
+        while True:
+            with cls._lock:
+                while not cls._due():
+                    if cls._stopping:
+                        return
+                    timeout = None if cls._oldest is None else cls._oldest + cls.FLUSH_INTERVAL - time.monotonic()
+                    cls._changed.wait(timeout)
+                batch = cls._pending
+                cls._pending = {}
+                cls._oldest = None
+                stopping = cls._stopping
+            if not cls._write(batch):
+                if stopping:
+                    # Failed on the way out; shutdown() reports what is left
+                    return
+                with cls._lock:
+                    # Back off before retrying, unless a flush() or shutdown() asks sooner
+                    cls._changed.wait(cls.FLUSH_INTERVAL)
+
+    @classmethod
+    def _write(cls, batch: Dict[int, Tuple[str, int]]) -> bool:
+        try:
+            QueryLogRepo().update_query_log_statuses(
+                {log_id: status for log_id, (status, _) in batch.items()}
+            )
+        except Exception as e:
+            print(f"Query log flush failed: {e}")
+            with cls._lock:
+                for log_id, (status, ticket) in batch.items():
+                    # A newer status buffered meanwhile wins over the failed one
+                    cls._pending.setdefault(log_id, (status, ticket))
+                if cls._oldest is None:
+                    cls._oldest = time.monotonic()
+                cls._failures += 1
+                cls._failed_through = max(ticket for _, ticket in batch.values())
+                cls._last_error = e
+                cls._changed.notify_all()
+            return False
+        finally:
+            session.remove()
+        with cls._lock:
+            cls._written_through = max(cls._written_through, max(ticket for _, ticket in batch.values()))
+            cls._changed.notify_all()
+        return True
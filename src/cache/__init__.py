@@ -0,0 +1 @@
+# In-process caches shared by the repositories and services
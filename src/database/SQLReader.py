@@ -1,9 +1,35 @@
+import os
+from typing import Iterable
+from src.cache.ttl_cache import TTLCache
+
+
 class SQLReader():
+    # Shared by every reader in the process. Keys include the file's mtime and
+    # size, so an edited script is a miss and its old text ages out of the LRU
+    script_cache = TTLCache(max_size=int(os.environ.get("SQL_SCRIPT_CACHE_SIZE", "512")))
+
     def __init__(self):
         pass
-    
+
     def getSQL(self, scriptPath : str) -> str:
-        sql : str = None
+        stat = os.stat(scriptPath)
+        key = (scriptPath, stat.st_mtime_ns, stat.st_size)
+        sql : str = self.script_cache.get(key)
+        if sql is not TTLCache.MISSING:
+            return sql
+
         with open(scriptPath,"r") as sqlFile:
             sql = sqlFile.read()
-        return sql
\ No newline at end of file
+        self.script_cache.set(key, sql)
+        return sql
+
+    def warm(self, scriptPaths: Iterable[str]) -> int:
+        """Pre-load scripts (e.g. every query_table file) and return how many were read."""
+        loaded = 0
+        for scriptPath in scriptPaths:
+            try:
+                self.getSQL(scriptPath)
+                loaded += 1
+            except OSError as e:
+                print(f"Could not cache SQL script {scriptPath}: {e}")
+        return loaded
@@ -0,0 +1,9 @@
+from dataclasses import dataclass, field
+from typing import Any, Dict
+
+
+@dataclass
+class BoundParametersDTO:
+    values: Dict[str, Any] = field(default_factory=dict)
+    bind_types: Dict[str, Any] = field(default_factory=dict)
+    input_sizes: Dict[str, Any] = field(default_factory=dict)
@@ -0,0 +1,7 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class OrderColumnDTO:
+    name: str
+    descending: bool = False
@@ -0,0 +1,21 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class PoolMetricsDTO:
+    pool_size: int = 0
+    checked_out: int = 0
+    overflow: int = 0
+    checkouts: int = 0
+    connects: int = 0
+    invalidations: int = 0
+    waits: int = 0
+    timeouts: int = 0
+    checkout_seconds: float = 0.0
+    max_checkout_seconds: float = 0.0
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+    @property
+    def average_checkout_seconds(self) -> float:
+        return self.checkout_seconds / self.checkouts if self.checkouts else 0.0
@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class SQLParameterDTO:
+    label: str
+    name: str
+    type_name: Optional[str] = None
+    length: Optional[int] = None
+    is_list: bool = False
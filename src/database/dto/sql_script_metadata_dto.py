@@ -0,0 +1,15 @@
+from dataclasses import dataclass, field
+from typing import List
+from src.database.dto.sql_parameter_dto import SQLParameterDTO
+from src.database.dto.order_column_dto import OrderColumnDTO
+
+
+@dataclass
+class SQLScriptMetadataDTO:
+    bind_names: List[str] = field(default_factory=list)
+    declared_params: List[str] = field(default_factory=list)
+    declared_names: List[str] = field(default_factory=list)
+    undeclared_names: List[str] = field(default_factory=list)
+    unused_names: List[str] = field(default_factory=list)
+    parameters: List[SQLParameterDTO] = field(default_factory=list)
+    order_columns: List[OrderColumnDTO] = field(default_factory=list)
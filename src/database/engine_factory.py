@@ -0,0 +1,194 @@
+import os
+import threading
+import time
+from typing import Callable
+import sqlalchemy as sa
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
+from config import OracleDB
+from src.database.dto.pool_metrics_dto import PoolMetricsDTO
+from src.database.typed_parameters import set_input_sizes
+from src.monitoring.metrics import registry
+
+# Checkouts are usually sub-millisecond; waits run up to DB_POOL_TIMEOUT
+POOL_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _env_flag(name: str, default: str) -> bool:
+    return os.environ.get(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
+class PoolMetrics:
+    """
+    Thread-safe checkout counters for one connection pool.
+
+    Every event is also recorded in the process-wide metrics registry, so
+    MetricsServer serves the totals across pools (dispose() replaces the pool
+    and its counters, not the registry's). watch() points the pool gauges
+    at the current engine.
+    """
+
+    CHECKOUT_DURATION = registry.histogram(
+        "query_db_pool_checkout_duration_seconds",
+        "Time to check out a database connection, including connects and pre-pings.",
+        buckets=POOL_BUCKETS,
+    )
+    WAIT_DURATION = registry.histogram(
+        "query_db_pool_wait_duration_seconds",
+        "Time blocked checking out a connection from an exhausted pool.",
+        buckets=POOL_BUCKETS,
+    )
+    TIMEOUTS = registry.counter("query_db_pool_timeouts", "Checkouts that gave up after DB_POOL_TIMEOUT.")
+    CONNECTS = registry.counter("query_db_pool_connects", "New database connections opened.")
+    INVALIDATIONS = registry.counter("query_db_pool_invalidations", "Database connections invalidated.")
+    POOL_SIZE = registry.gauge("query_db_pool_size", "Configured connection pool size.")
+    CHECKED_OUT = registry.gauge("query_db_pool_checked_out", "Connections currently checked out.")
+    OVERFLOW = registry.gauge("query_db_pool_overflow", "Connections open beyond the pool size.")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics = PoolMetricsDTO()
+
+    def record_checkout(self, seconds: float, waited: bool) -> None:
+        with self._lock:
+            metrics = self._metrics
+            metrics.checkouts += 1
+            metrics.checkout_seconds += seconds
+            metrics.max_checkout_seconds = max(metrics.max_checkout_seconds, seconds)
+            if waited:
+                metrics.waits += 1
+                metrics.wait_seconds += seconds
+                metrics.max_wait_seconds = max(metrics.max_wait_seconds, seconds)
+        self.CHECKOUT_DURATION.observe(seconds)
+        if waited:
+            self.WAIT_DURATION.observe(seconds)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self._metrics.timeouts += 1
+        self.TIMEOUTS.inc()
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self._metrics.connects += 1
+        self.CONNECTS.inc()
+
+    def record_invalidation(self) -> None:
+        with self._lock:
+            self._metrics.invalidations += 1
+        self.INVALIDATIONS.inc()
+
+    @classmethod
+    def watch(cls, snapshot: Callable[[], PoolMetricsDTO]) -> None:
+        """Serve the pool gauges from snapshot(), read on every scrape."""
+        cls.POOL_SIZE.set_function(lambda: snapshot().pool_size)
+        cls.CHECKED_OUT.set_function(lambda: snapshot().checked_out)
+        cls.OVERFLOW.set_function(lambda: snapshot().overflow)
+
+    def snapshot(self, pool: QueuePool) -> PoolMetricsDTO:
+        with self._lock:
+            metrics = PoolMetricsDTO(**vars(self._metrics))
+        metrics.pool_size = pool.size()
+        metrics.checked_out = pool.checkedout()
+        metrics.overflow = pool.overflow()
+        return metrics
+
+
+class TimedQueuePool(QueuePool):
+    """
+    QueuePool that times every checkout.
+
+    A checkout counts as a wait when every connection, overflow included,
+    was already in use; its time is how long the caller blocked. Checkout
+    time also covers opening new connections and the pre-ping.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        exhausted = self._max_overflow > -1 and self.checkedout() >= self.size() + self._max_overflow
+        started = time.monotonic()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        finally:
+            self.metrics.record_checkout(time.monotonic() - started, waited=exhausted)
+
+
+class EngineFactory:
+    """
+    Builds the Oracle engine from environment settings.
+
+    Pool size should cover QUERY_WORKER_THREADS (one connection per worker
+    thread) plus the occasional query log write.
+    """
+
+    # Rows fetched per Oracle round trip; also the batch size for streamed results
+    ARRAYSIZE = int(os.environ.get("ORACLE_ARRAYSIZE", "5000"))
+    # Parsed statements kept per connection by the driver
+    STATEMENT_CACHE_SIZE = int(os.environ.get("ORACLE_STMT_CACHE_SIZE", "50"))
+    POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "5"))
+    MAX_OVERFLOW = int(os.environ.get("DB_MAX_OVERFLOW", "5"))
+    POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "30"))
+    # Oracle and firewalls drop idle sessions; replace connections before they do
+    POOL_RECYCLE = int(os.environ.get("DB_POOL_RECYCLE", "1800"))
+    POOL_PRE_PING = _env_flag("DB_POOL_PRE_PING", "true")
+    # SQLAlchemy compiled-statement cache entries
+    QUERY_CACHE_SIZE = int(os.environ.get("DB_QUERY_CACHE_SIZE", "500"))
+    ECHO = _env_flag("DB_ECHO", "false")
+
+    @classmethod
+    def url(cls) -> str:
+        return f"oracle+oracledb://{OracleDB.dbaUser}:{OracleDB.dbaPassword}@{OracleDB.host}:{OracleDB.port}?service_name={OracleDB.sid}"
+
+    @classmethod
+    def pool_options(cls) -> dict:
+        """create_engine keyword arguments that are not specific to Oracle."""
+        return {
+            "poolclass": TimedQueuePool,
+            "pool_size": cls.POOL_SIZE,
+            "max_overflow": cls.MAX_OVERFLOW,
+            "pool_timeout": cls.POOL_TIMEOUT,
+            "pool_recycle": cls.POOL_RECYCLE,
+            "pool_pre_ping": cls.POOL_PRE_PING,
+            "query_cache_size": cls.QUERY_CACHE_SIZE,
+            "echo": cls.ECHO,
+        }
+
+    @classmethod
+    def create(cls) -> sa.engine.Engine:
+        engine = sa.create_engine(
+            cls.url(),
+            arraysize=cls.ARRAYSIZE,
+            connect_args={"stmtcachesize": cls.STATEMENT_CACHE_SIZE},
+            **cls.pool_options(),
+        )
+        cls.instrument(engine)
+        return engine
+
+    @classmethod
+    def instrument(cls, engine: sa.engine.Engine) -> None:
+        """Attach the typed-bind listener and pool counters to an engine."""
+        sa.event.listen(engine, "before_cursor_execute", set_input_sizes)
+
+        # engine.pool is looked up per event: dispose() swaps in a new pool with fresh metrics
+        def on_connect(dbapi_connection, connection_record):
+            if isinstance(engine.pool, TimedQueuePool):
+                engine.pool.metrics.record_connect()
+
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            if isinstance(engine.pool, TimedQueuePool):
+                engine.pool.metrics.record_invalidation()
+
+        sa.event.listen(engine, "connect", on_connect)
+        sa.event.listen(engine, "invalidate", on_invalidate)
+
+    @staticmethod
+    def pool_metrics(engine: sa.engine.Engine) -> PoolMetricsDTO:
+        if not isinstance(engine.pool, TimedQueuePool):
+            return PoolMetricsDTO()
+        return engine.pool.metrics.snapshot(engine.pool)
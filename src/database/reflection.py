@@ -0,0 +1,162 @@
+import os
+import pickle
+import stat
+import threading
+import sqlalchemy as sa
+from sqlalchemy.ext.declarative import DeferredReflection
+
+
+class CachedReflection(DeferredReflection):
+    """
+    Declarative mixin for models whose columns are reflected from Oracle.
+
+    Nothing is reflected at import. prepare_once() maps the models on first
+    use: from the local cache file when it matches SCHEMA_VERSION and the
+    database URL, otherwise by reflecting (one round trip per schema) and
+    rewriting the cache. Bump DB_SCHEMA_VERSION whenever a reflected table
+    changes.
+
+    The cache is a pickle, so it lives in a directory only this user can
+    write (created with mode 0700) and is only loaded if this user owns it
+    and nobody else can write to it.
+    """
+
+    __abstract__ = True
+
+    CACHE_PATH = os.environ.get(
+        "REFLECTION_CACHE_PATH",
+        os.path.join(os.path.expanduser("~"), ".cache", "query_tool", "reflection.pickle"),
+    )
+    SCHEMA_VERSION = os.environ.get("DB_SCHEMA_VERSION", "1")
+
+    _lock = threading.Lock()
+    _models = []
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not cls.__dict__.get("__abstract__"):
+            CachedReflection._models.append(cls)
+
+    @classmethod
+    def pending(cls) -> list:
+        """Models declared under cls and not mapped yet."""
+        return [
+            model for model in CachedReflection._models
+            if issubclass(model, cls) and "__mapper__" not in model.__dict__
+        ]
+
+    @classmethod
+    def prepare_once(cls, engine: sa.engine.Engine) -> bool:
+        """
+        Map every pending model; cheap once they are all mapped.
+
+        Returns:
+            True if tables came from the cache file, False if reflected or nothing was pending
+        """
+        if not cls.pending():
+            return False
+        with cls._lock:
+            models = cls.pending()
+            if not models:
+                return False
+            tables = [model.__table__ for model in models]
+            cache_key = cls._cache_key(engine, tables)
+            cached = cls._read_cache(cache_key)
+            if cached is not None and all(table.key in cached.tables for table in tables):
+                for table in tables:
+                    cls._copy_columns(cached.tables[table.key], table)
+                if cls._prepare_from_cache(tables):
+                    return True
+            cls.prepare(engine)
+            cls._write_cache(cache_key, tables)
+            return False
+
+    @classmethod
+    def _prepare_from_cache(cls, tables: list) -> bool:
+        """
+        Map the pending models on tables already filled in from the cache.
+
+        prepare() always reflects, so it is handed an in-memory SQLite
+        database with an untyped stand-in of each table. Reflection keeps
+        columns that are already present (autoload_replace=False), so the
+        models end up with the cached Oracle columns and Oracle is never
+        contacted.
+        """
+        stand_in = sa.create_engine("sqlite://")
+        try:
+            with stand_in.connect() as connection:
+                for schema in {table.schema for table in tables if table.schema}:
+                    connection.exec_driver_sql(f"attach database ':memory:' as \"{schema}\"")
+                for table in tables:
+                    columns = ", ".join(f'"{column.name}"' for column in table.columns)
+                    prefix = f'"{table.schema}".' if table.schema else ""
+                    connection.exec_driver_sql(f'create table {prefix}"{table.name}" ({columns})')
+                cls.prepare(connection)
+            return True
+        except sa.exc.SQLAlchemyError as e:
+            # A model declared since the cache was read only costs a reflection
+            print(f"Reflecting instead of using the reflection cache: {e}")
+            return False
+        finally:
+            stand_in.dispose()
+
+    @classmethod
+    def _cache_key(cls, engine: sa.engine.Engine, tables: list) -> tuple:
+        return (
+            cls.SCHEMA_VERSION,
+            sa.__version__,
+            engine.url.render_as_string(hide_password=True),
+            tuple(sorted(table.key for table in tables)),
+        )
+
+    @staticmethod
+    def _copy_columns(source: sa.Table, target: sa.Table) -> None:
+        for column in source.columns:
+            if column.key not in target.columns:
+                target.append_column(column._copy())
+
+    @classmethod
+    def _read_cache(cls, cache_key: tuple):
+        try:
+            with open(cls.CACHE_PATH, "rb") as cache_file:
+                problem = cls._untrusted(os.stat(os.path.dirname(cls.CACHE_PATH)), "directory") \
+                    or cls._untrusted(os.fstat(cache_file.fileno()), "file")
+                if problem:
+                    print(f"Ignoring reflection cache {cls.CACHE_PATH}: {problem}")
+                    return None
+                entry = pickle.load(cache_file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # An unreadable cache only costs a reflection
+            print(f"Ignoring reflection cache {cls.CACHE_PATH}: {e}")
+            return None
+        if entry.get("key") != cache_key:
+            return None
+        return entry.get("metadata")
+
+    @staticmethod
+    def _untrusted(status: os.stat_result, kind: str):
+        """Why a cache path could have been planted by another user, or None."""
+        if hasattr(os, "getuid") and status.st_uid != os.getuid():
+            return f"{kind} is owned by uid {status.st_uid}"
+        if status.st_mode & (stat.S_IWGRP | stat.S_IWOTH):
+            return f"{kind} is writable by other users"
+        return None
+
+    @classmethod
+    def _write_cache(cls, cache_key: tuple, tables: list) -> None:
+        metadata = sa.MetaData()
+        for table in tables:
+            table.to_metadata(metadata)
+        temp_path = f"{cls.CACHE_PATH}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(cls.CACHE_PATH), mode=0o700, exist_ok=True)
+            descriptor = os.open(temp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            with os.fdopen(descriptor, "wb") as cache_file:
+                pickle.dump({"key": cache_key, "metadata": metadata}, cache_file)
+            os.replace(temp_path, cls.CACHE_PATH)
+        except Exception as e:
+            print(f"Failed to write reflection cache {cls.CACHE_PATH}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
@@ -0,0 +1,173 @@
+import os
+import re
+from typing import List, Tuple
+from src.cache.ttl_cache import TTLCache
+from src.database.dto.sql_parameter_dto import SQLParameterDTO
+from src.database.dto.order_column_dto import OrderColumnDTO
+from src.database.dto.sql_script_metadata_dto import SQLScriptMetadataDTO
+
+HEADER_MARKER = "Parameters:"
+# Result columns that order the script's rows uniquely, e.g. 'Order By: registered desc, employer_no'.
+# Declaring them enables keyset pagination for previews
+ORDER_MARKER = "Order By:"
+_IDENTIFIER = re.compile(r"^[A-Za-z][A-Za-z0-9_$#]*$")
+
+# Type annotations accepted as the third part of a header entry, e.g. 'Start Date:start_date:date'.
+# Any of them may be wrapped as list<...> to bind a collection, e.g. 'Employers:employers:list<number>'
+PARAMETER_TYPES = {"date", "timestamp", "number", "integer", "varchar"}
+_TYPE_PATTERN = re.compile(r"^(\w+?)2?\s*(?:\(\s*(\d+)\s*\))?$")
+_LIST_PATTERN = re.compile(r"^list\s*<\s*(.+?)\s*>$")
+
+_NAME_START = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+_NAME_CHARS = _NAME_START | set("0123456789$#")
+_Q_QUOTE_CLOSERS = {"[": "]", "{": "}", "(": ")", "<": ">"}
+
+# Parsed metadata per script text. SQLReader hands back the same str object
+# for an unchanged file and str caches its hash, so repeat lookups are O(1)
+_metadata_cache = TTLCache(max_size=int(os.environ.get("SQL_SCRIPT_CACHE_SIZE", "512")))
+
+
+def tokenize(sql: str) -> Tuple[List[str], List[str]]:
+    """
+    Scan a SQL script for bind placeholders.
+
+    String literals ('...', q'[...]'), quoted identifiers and comments are
+    skipped, as are '::' and ':=' which are not binds.
+
+    Returns:
+        (bind names in order of first appearance, comment texts)
+    """
+    binds = []
+    comments = []
+    length = len(sql)
+    index = 0
+    while index < length:
+        char = sql[index]
+        following = sql[index + 1] if index + 1 < length else ""
+        after_name = index > 0 and sql[index - 1] in _NAME_CHARS
+
+        if char == "-" and following == "-":
+            end = sql.find("\n", index)
+            end = length if end == -1 else end
+            comments.append(sql[index + 2:end])
+            index = end
+        elif char == "/" and following == "*":
+            end = sql.find("*/", index + 2)
+            end = length if end == -1 else end
+            comments.append(sql[index + 2:end])
+            index = end + 2
+        elif not after_name and (
+                char in "qQnN" and following == "'"
+                or char in "nN" and following in "qQ" and sql[index + 2:index + 3] == "'"):
+            index = _skip_literal(sql, index)
+        elif char == "'":
+            index = _skip_quoted(sql, index, "'")
+        elif char == '"':
+            index = _skip_quoted(sql, index, '"')
+        elif char == ":":
+            if following in (":", "="):
+                index += 2
+            elif following in _NAME_START and not after_name:
+                end = index + 1
+                while end < length and sql[end] in _NAME_CHARS:
+                    end += 1
+                name = sql[index + 1:end]
+                if name not in binds:
+                    binds.append(name)
+                index = end
+            else:
+                index += 1
+        else:
+            index += 1
+    return binds, comments
+
+
+def _skip_quoted(sql: str, index: int, quote: str) -> int:
+    # A doubled quote inside the literal is an escaped quote
+    index += 1
+    while index < len(sql):
+        if sql[index] == quote:
+            if sql[index + 1:index + 2] == quote:
+                index += 2
+                continue
+            return index + 1
+        index += 1
+    return index
+
+
+def _skip_literal(sql: str, index: int) -> int:
+    # N'...', q'X...X' and nq'X...X' (Oracle alternative quoting)
+    start = index
+    while sql[index] != "'":
+        index += 1
+    if sql[start:index].lower().endswith("q") and index + 1 < len(sql):
+        opener = sql[index + 1]
+        closer = _Q_QUOTE_CLOSERS.get(opener, opener)
+        end = sql.find(closer + "'", index + 2)
+        return len(sql) if end == -1 else end + 2
+    return _skip_quoted(sql, index, "'")
+
+
+def parse_header(comments: List[str], marker: str = HEADER_MARKER) -> List[str]:
+    """Entries of the first header line starting at marker, e.g. ['Start Date:start_date:date']."""
+    for comment in comments:
+        if marker in comment:
+            line = comment.split(marker, 1)[1].splitlines()[0]
+            return [entry.strip() for entry in line.split(",") if entry.strip()]
+    return []
+
+
+def parse_order_columns(entries: List[str]) -> List[OrderColumnDTO]:
+    """'column [asc|desc]' entries; any malformed entry disables keyset ordering for the script."""
+    columns = []
+    for entry in entries:
+        parts = entry.split()
+        direction = parts[1].lower() if len(parts) == 2 else "asc"
+        if len(parts) not in (1, 2) or not _IDENTIFIER.match(parts[0]) or direction not in ("asc", "desc"):
+            print(f"Ignoring '{ORDER_MARKER}' header: cannot order by '{entry}'")
+            return []
+        columns.append(OrderColumnDTO(name=parts[0], descending=direction == "desc"))
+    return columns
+
+
+def parse_parameter(entry: str) -> SQLParameterDTO:
+    """Split a 'Label:name[:type]' header entry; an unknown type leaves the parameter untyped."""
+    parts = [part.strip() for part in entry.split(":")]
+    parameter = SQLParameterDTO(label=parts[0], name=parts[1] if len(parts) > 1 else "")
+    if len(parts) < 3 or not parts[2]:
+        return parameter
+    annotation = parts[2].lower()
+    list_match = _LIST_PATTERN.match(annotation)
+    match = _TYPE_PATTERN.match(list_match.group(1) if list_match else annotation)
+    if not match or match.group(1) not in PARAMETER_TYPES:
+        print(f"Unknown type '{parts[2]}' for parameter {parameter.name}; binding as text")
+        return parameter
+    parameter.type_name = match.group(1)
+    parameter.length = int(match.group(2)) if match.group(2) else None
+    parameter.is_list = bool(list_match)
+    return parameter
+
+
+def get_script_metadata(sql: str) -> SQLScriptMetadataDTO:
+    """Bind names and declared parameters of a script, parsed once per script text."""
+    metadata = _metadata_cache.get(sql)
+    if metadata is not TTLCache.MISSING:
+        return metadata
+
+    bind_names, comments = tokenize(sql)
+    declared_params = parse_header(comments)
+    parameters = [parse_parameter(entry) for entry in declared_params if ":" in entry]
+    declared_names = [parameter.name for parameter in parameters]
+    declared_lower = {name.lower() for name in declared_names}
+    bind_lower = {name.lower() for name in bind_names}
+    metadata = SQLScriptMetadataDTO(
+        bind_names=bind_names,
+        declared_params=declared_params,
+        declared_names=declared_names,
+        undeclared_names=[name for name in bind_names if name.lower() not in declared_lower],
+        unused_names=[name for name in declared_names if name.lower() not in bind_lower],
+        parameters=parameters,
+        order_columns=parse_order_columns(parse_header(comments, marker=ORDER_MARKER)),
+    )
+    _metadata_cache.set(sql, metadata)
+    return metadata
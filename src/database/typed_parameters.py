@@ -0,0 +1,181 @@
+import json
+import re
+from datetime import date, datetime
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, List
+import sqlalchemy as sa
+from dateutil import parser as date_parser
+from src.database.dto.bound_parameters_dto import BoundParametersDTO
+from src.database.dto.sql_script_metadata_dto import SQLScriptMetadataDTO
+
+# Execution option carrying {bind name: input size} for set_input_sizes
+INPUT_SIZES_OPTION = "oracle_input_sizes"
+
+# Input sizes are named by driver attribute and resolved on the live dbapi module
+_INPUT_SIZES = {
+    "date": "DB_TYPE_DATE",
+    "timestamp": "DB_TYPE_TIMESTAMP",
+    "number": "DB_TYPE_NUMBER",
+    "integer": "DB_TYPE_NUMBER",
+}
+
+# list<...> parameters travel as one JSON array in a CLOB, so neither the
+# statement text nor the 1000-item IN-list limit depends on the list's length
+LIST_INPUT_SIZE = "DB_TYPE_CLOB"
+_LIST_SEPARATORS = re.compile(r"[,\r\n]+")
+
+
+def _to_datetime(value: Any) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return date_parser.parse(text)
+
+
+def _to_number(value: Any) -> Decimal:
+    try:
+        number = Decimal(str(value).strip().replace(",", ""))
+    except InvalidOperation:
+        raise ValueError(f"'{value}' is not a number")
+    if not number.is_finite():
+        raise ValueError(f"'{value}' is not a number")
+    return number
+
+
+def _to_integer(value: Any) -> int:
+    number = _to_number(value)
+    if number != number.to_integral_value():
+        raise ValueError(f"'{value}' is not a whole number")
+    return int(number)
+
+
+def _coerce(type_name: str, length: int, value: Any) -> Any:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        # Oracle treats '' as NULL anyway; a typed NULL keeps the cursor shareable
+        return None
+    if type_name in ("date", "timestamp"):
+        return _to_datetime(value)
+    if type_name == "number":
+        return _to_number(value)
+    if type_name == "integer":
+        return _to_integer(value)
+    text = str(value)
+    if length and len(text) > length:
+        raise ValueError(f"longer than {length} characters")
+    return text
+
+
+def _split_list(value: Any) -> List[Any]:
+    if isinstance(value, (list, tuple, set)):
+        return list(value)
+    text = str(value).strip()
+    if text.startswith("["):
+        return json.loads(text)
+    return _LIST_SEPARATORS.split(text)
+
+
+def _to_json_item(item: Any) -> str:
+    if isinstance(item, datetime):
+        return json.dumps(item.isoformat())
+    if isinstance(item, (Decimal, int)):
+        # Emitted as a JSON number without passing through float
+        return str(item)
+    return json.dumps(item)
+
+
+def _coerce_list(type_name: str, length: int, value: Any) -> str:
+    """
+    Encode a list parameter as a JSON array for JSON_TABLE, e.g.
+
+        where e.employer_no in (
+            select value from json_table(:employers, '$[*]' columns (value number path '$')))
+
+    Accepts a JSON array, a Python list or a comma/newline separated string;
+    blank items are dropped.
+    """
+    if value is None:
+        return "[]"
+    items = []
+    for position, item in enumerate(_split_list(value), start=1):
+        try:
+            item = _coerce(type_name, length, item)
+        except (ValueError, OverflowError) as error:
+            raise ValueError(f"item {position}: {error}")
+        if item is not None:
+            items.append(_to_json_item(item))
+    return "[" + ",".join(items) + "]"
+
+
+def _bind_type(type_name: str, length: int):
+    if type_name == "date":
+        return sa.DateTime()
+    if type_name == "timestamp":
+        return sa.TIMESTAMP()
+    if type_name == "number":
+        return sa.Numeric(asdecimal=True)
+    if type_name == "integer":
+        return sa.Integer()
+    return sa.String(length)
+
+
+def bind_parameters(metadata: SQLScriptMetadataDTO, query_params: Dict[str, Any]) -> BoundParametersDTO:
+    """
+    Coerce the message's string values to the types declared in the script header.
+
+    Values are keyed by the bind name as written in the SQL (message and header
+    names match it case-insensitively); undeclared or untyped parameters keep
+    their values unchanged.
+
+    Raises:
+        ValueError: naming the parameter whose value does not fit its type
+    """
+    bind_names = {name.lower(): name for name in metadata.bind_names}
+    bound = BoundParametersDTO(values={
+        bind_names.get(name.lower(), name): value for name, value in (query_params or {}).items()
+    })
+    supplied = {name.lower(): name for name in bound.values}
+    for parameter in metadata.parameters:
+        key = parameter.name.lower()
+        if not parameter.type_name or key not in bind_names or key not in supplied:
+            continue
+        bind_name = bind_names[key]
+        value = bound.values.pop(supplied[key])
+        try:
+            if parameter.is_list:
+                bound.values[bind_name] = _coerce_list(parameter.type_name, parameter.length, value)
+            else:
+                bound.values[bind_name] = _coerce(parameter.type_name, parameter.length, value)
+        except (ValueError, OverflowError) as error:
+            raise ValueError(f"{parameter.label} ({parameter.name}): {error}")
+        if parameter.is_list:
+            bound.bind_types[bind_name] = sa.Text()
+            bound.input_sizes[bind_name] = LIST_INPUT_SIZE
+            continue
+        bound.bind_types[bind_name] = _bind_type(parameter.type_name, parameter.length)
+        size = _INPUT_SIZES.get(parameter.type_name, parameter.length)
+        if size:
+            bound.input_sizes[bind_name] = size
+    return bound
+
+
+def set_input_sizes(conn, cursor, statement, parameters, context, executemany):
+    """
+    before_cursor_execute listener passing declared bind types to cursor.setinputsizes.
+
+    SQLAlchemy skips setinputsizes for text() statements, which is how every
+    report script runs, so the sizes travel as an execution option instead.
+    """
+    sizes = context.execution_options.get(INPUT_SIZES_OPTION) if context is not None else None
+    if not sizes:
+        return
+    dbapi = context.dialect.dbapi
+    escaped = getattr(context.compiled, "escaped_bind_names", None) or {}
+    cursor.setinputsizes(**{
+        escaped.get(name, name): getattr(dbapi, size) if isinstance(size, str) else size
+        for name, size in sizes.items()
+    })
@@ -0,0 +1,184 @@
+import os
+import re
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Callable, Iterable, List, Optional
+from src.document_save.dto.csv_format_dto import CsvFormatDTO
+
+QUOTING_MODES = ("minimal", "all", "nonnumeric")
+
+# Oracle column types (oracledb DbType names) whose values are always numbers,
+# date/times or text, so their formatter needs no per-value type dispatch
+_NUMBER_TYPES = {"DB_TYPE_NUMBER", "DB_TYPE_BINARY_INTEGER", "DB_TYPE_BINARY_FLOAT", "DB_TYPE_BINARY_DOUBLE"}
+_DATETIME_TYPES = {"DB_TYPE_DATE", "DB_TYPE_TIMESTAMP", "DB_TYPE_TIMESTAMP_TZ", "DB_TYPE_TIMESTAMP_LTZ"}
+_STRING_TYPES = {"DB_TYPE_VARCHAR", "DB_TYPE_NVARCHAR", "DB_TYPE_CHAR", "DB_TYPE_NCHAR", "DB_TYPE_LONG"}
+
+# Characters str() of a number or date/time can contain; a delimiter or quote
+# character among them would make those fields need quoting checks too
+_NUMBER_AND_DATE_CHARS = set("0123456789.-+: eEinfINFaN")
+
+
+def _line_terminator(value: str) -> str:
+    return {"crlf": "\r\n", "lf": "\n"}.get(value.lower(), value)
+
+
+class CsvEncoder:
+    """
+    Writes result rows as CSV with one formatter per column.
+
+    Formatters are chosen once from the cursor description (Oracle type
+    codes), so NUMBER, DATE and VARCHAR2 columns skip csv.writer's per-value
+    type checks, and only text is scanned for characters that need quoting.
+    Columns of unknown type dispatch on each value's type. Encoded rows are
+    joined in memory and written BUFFER_SIZE characters at a time.
+
+    With the default CsvFormatDTO the output is byte-for-byte what
+    csv.writer(file) produces. CSV_DELIMITER, CSV_QUOTING, CSV_LINE_TERMINATOR
+    (crlf/lf), CSV_DATE_FORMAT, CSV_DATETIME_FORMAT and CSV_NUMBER_FORMAT
+    change the defaults.
+    """
+
+    BUFFER_SIZE = int(os.environ.get("CSV_BUFFER_SIZE", str(1024 * 1024)))
+
+    def __init__(self, file, column_count: int, description: Optional[list] = None,
+                 csv_format: CsvFormatDTO = None):
+        """
+        Args:
+            file: Text file opened with newline=''
+            column_count: Number of columns in every row
+            description: DB-API cursor.description, if the rows come from a cursor
+            csv_format: Dialect and value formats (defaults to default_format())
+        """
+        self.file = file
+        self.format = csv_format or self.default_format()
+        if self.format.quoting not in QUOTING_MODES:
+            raise ValueError(f"Unknown CSV quoting '{self.format.quoting}', expected one of {', '.join(QUOTING_MODES)}")
+        if len(self.format.delimiter) != 1 or len(self.format.quotechar) != 1:
+            raise ValueError("CSV delimiter and quote character must be single characters")
+        self.column_count = column_count
+        special = self.format.delimiter + self.format.quotechar + "\r\n" + self.format.line_terminator
+        self._needs_quotes = re.compile("[" + re.escape("".join(sorted(set(special)))) + "]").search
+        self._doubled_quote = self.format.quotechar * 2
+        self._by_kind = {kind: self._column_formatter(kind) for kind in ("number", "datetime", "string", "bool", "other")}
+        self._by_type = {
+            int: self._by_kind["number"], float: self._by_kind["number"], Decimal: self._by_kind["number"],
+            datetime: self._by_kind["datetime"], date: self._by_kind["datetime"],
+            str: self._by_kind["string"], bool: self._by_kind["bool"],
+        }
+        self.formatters = self._formatters(description)
+        self._pending: List[str] = []
+        self._pending_size = 0
+
+    @classmethod
+    def default_format(cls) -> CsvFormatDTO:
+        return CsvFormatDTO(
+            delimiter=os.environ.get("CSV_DELIMITER", ","),
+            quoting=os.environ.get("CSV_QUOTING", "minimal").lower(),
+            line_terminator=_line_terminator(os.environ.get("CSV_LINE_TERMINATOR", "crlf")),
+            date_format=os.environ.get("CSV_DATE_FORMAT") or None,
+            datetime_format=os.environ.get("CSV_DATETIME_FORMAT") or None,
+            number_format=os.environ.get("CSV_NUMBER_FORMAT") or None,
+        )
+
+    def write_header(self, column_names: Iterable) -> None:
+        string = self._by_kind["string"]
+        self._append([string(str(name)) for name in column_names])
+
+    def write_rows(self, rows: Iterable) -> int:
+        """Encode rows into the buffer, writing it out whenever it fills; returns the row count."""
+        formatters = self.formatters
+        join = self.format.delimiter.join
+        terminator = self.format.line_terminator
+        pending = self._pending
+        size = self._pending_size
+        single_column = self.column_count == 1
+        count = 0
+        for row in rows:
+            line = join([format_value(value) for format_value, value in zip(formatters, row)])
+            if single_column and not line:
+                # csv.writer quotes a lone empty field so the row is not a blank line
+                line = self._quote("")
+            pending.append(line)
+            size += len(line)
+            count += 1
+            if size >= self.BUFFER_SIZE:
+                self.file.write(terminator.join(pending) + terminator)
+                pending.clear()
+                size = 0
+        self._pending_size = size
+        return count
+
+    def flush(self) -> None:
+        if self._pending:
+            terminator = self.format.line_terminator
+            self.file.write(terminator.join(self._pending) + terminator)
+            self._pending.clear()
+            self._pending_size = 0
+
+    def _append(self, fields: list) -> None:
+        line = self.format.delimiter.join(fields)
+        self._pending.append(line)
+        self._pending_size += len(line)
+
+    def _formatters(self, description: Optional[list]) -> List[Callable]:
+        kinds = ["other"] * self.column_count
+        for index, column in enumerate((description or [])[:self.column_count]):
+            type_name = getattr(column[1], "name", None)
+            if type_name in _NUMBER_TYPES:
+                kinds[index] = "number"
+            elif type_name in _DATETIME_TYPES:
+                kinds[index] = "datetime"
+            elif type_name in _STRING_TYPES:
+                kinds[index] = "string"
+        return [self._by_kind[kind] if kind != "other" else self._format_any for kind in kinds]
+
+    def _format_any(self, value) -> str:
+        return self._by_type.get(type(value), self._by_kind["other"])(value)
+
+    def _quote(self, text: str) -> str:
+        quotechar = self.format.quotechar
+        return quotechar + text.replace(quotechar, self._doubled_quote) + quotechar
+
+    def _text(self, kind: str) -> Callable:
+        """value (never None) -> unquoted text for one kind of column."""
+        csv_format = self.format
+        if kind == "number" and csv_format.number_format:
+            spec = csv_format.number_format
+            return lambda value: format(value, spec)
+        if kind == "datetime" and (csv_format.date_format or csv_format.datetime_format):
+            date_format, datetime_format = csv_format.date_format, csv_format.datetime_format
+
+            def format_datetime(value):
+                pattern = datetime_format if isinstance(value, datetime) else date_format
+                return value.strftime(pattern) if pattern else str(value)
+            return format_datetime
+        if kind == "string":
+            return lambda value: value
+        return str
+
+    def _column_formatter(self, kind: str) -> Callable:
+        text = self._text(kind)
+        quoting = self.format.quoting
+        numeric = kind in ("number", "bool")
+        quote, needs_quotes = self._quote, self._needs_quotes
+        empty = "" if quoting == "minimal" else quote("")
+
+        if quoting == "all" or (quoting == "nonnumeric" and not numeric):
+            def always_quoted(value):
+                return empty if value is None else quote(text(value))
+            return always_quoted
+
+        custom_format = (kind == "number" and self.format.number_format) or (
+            kind == "datetime" and (self.format.date_format or self.format.datetime_format))
+        plain_safe = not set(self.format.delimiter + self.format.quotechar) & _NUMBER_AND_DATE_CHARS
+        if kind in ("number", "datetime", "bool") and plain_safe and not custom_format:
+            def unquoted(value):
+                return empty if value is None else text(value)
+            return unquoted
+
+        def quoted_if_needed(value):
+            if value is None:
+                return empty
+            encoded = text(value)
+            return quote(encoded) if needs_quotes(encoded) else encoded
+        return quoted_if_needed
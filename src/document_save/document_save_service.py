@@ -1,14 +1,63 @@
-import csv
 import os
+from typing import Optional
 from config import FileRepo, QueryToolBackend
 from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+from src.queries.dto.query_result_dto import QueryResultDTO
 from src.document_save.filename_service import FilenameService
+from src.document_save.export_pipeline import ExportPipeline
+from src.document_save.csv_encoder import CsvEncoder
+from src.document_save.dto.csv_format_dto import CsvFormatDTO
+from src import ORACLE_ARRAYSIZE
 from datetime import datetime
 
 class DocumentSaveService:
     base_path = FileRepo.base_drive
-    def save_to_csv(self, results, query:ExecuteQueryDTO):
-        """Save query results with improved filename format."""
+    # "stream": fetch and write in turn; "pipelined": overlap them with ExportPipeline
+    export_mode = os.environ.get("QUERY_EXPORT_MODE", "stream")
+
+    def save_to_csv(self, results: QueryResultDTO, query:ExecuteQueryDTO, csv_format: Optional[CsvFormatDTO] = None):
+        """
+        Save query results with improved filename format.
+
+        Rows are written as they are iterated, so a streamed result never has
+        to fit in memory. Sets results.row_count and results.byte_count.
+        Each column is encoded by CsvEncoder with a formatter picked from the
+        cursor's column types; csv_format overrides the CSV_* defaults.
+        """
+        file_path = self.build_file_path(query=query)
+
+        try:
+            if os.path.exists(file_path):
+                os.remove(file_path)
+
+            print(os.path.dirname(file_path))
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+            with open(file_path, 'w', newline='', encoding='utf-8') as file:
+                encoder = CsvEncoder(
+                    file,
+                    column_count=len(results.column_names),
+                    description=self._description(results),
+                    csv_format=csv_format,
+                )
+                encoder.write_header(results.column_names)
+                if self.export_mode == "pipelined":
+                    self._write_pipelined(encoder, results)
+                else:
+                    results.row_count = encoder.write_rows(results.rows)
+                encoder.flush()
+            results.byte_count = os.path.getsize(file_path)
+        except Exception as e:
+            print(f"Error saving CSV: {e}")
+            # Never leave a truncated report behind for the download link
+            if os.path.exists(file_path):
+                os.remove(file_path)
+            raise  # Re-raise for Sentry to capture
+
+        return file_path
+
+    def build_file_path(self, query: ExecuteQueryDTO) -> str:
+        """Full path for a new report file for this user and query."""
         # Generate filename using FilenameService
         filename = FilenameService.generate_filename(
             user_id=query.user_id,
@@ -18,7 +67,7 @@ class DocumentSaveService:
         )
 
         # Construct full path
-        file_path = os.path.join(
+        return os.path.join(
             self.base_path,
             'query_results',
             str(query.user_id),
@@ -26,22 +75,18 @@ class DocumentSaveService:
             filename
         )
 
-        try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
+    def _write_pipelined(self, encoder: CsvEncoder, results: QueryResultDTO) -> None:
+        """Write batches while the next ones are fetched on the producer thread."""
+        pipeline = ExportPipeline(rows=results.rows, batch_size=ORACLE_ARRAYSIZE)
+        results.row_count = 0
+        for batch in pipeline:
+            results.row_count += encoder.write_rows(batch)
+        results.pipeline_stats = pipeline.stats
 
-            print(os.path.dirname(file_path))
-            os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-            with open(file_path, 'w', newline='', encoding='utf-8') as file:
-                writer = csv.writer(file)
-                writer.writerow(results.column_names)
-                writer.writerows(results.rows)
-        except Exception as e:
-            print(f"Error saving CSV: {e}")
-            raise  # Re-raise for Sentry to capture
-
-        return file_path
+    @staticmethod
+    def _description(results: QueryResultDTO) -> Optional[list]:
+        """DB-API column description of a streamed result; None for rows already in memory."""
+        return getattr(getattr(results.rows, "cursor", None), "description", None)
     
     def get_download_path(self, save_path: str):
         download_path =  QueryToolBackend().service_url + QueryToolBackend().route + save_path
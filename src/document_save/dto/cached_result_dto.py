@@ -0,0 +1,13 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CachedResultDTO:
+    key: str
+    file_path: str
+    query_id: int
+    created: float
+    last_used: float
+    row_count: Optional[int] = None
+    byte_count: Optional[int] = None
@@ -0,0 +1,16 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class CsvFormatDTO:
+    delimiter: str = ","
+    quotechar: str = '"'
+    # "minimal", "all" or "nonnumeric", as in the csv module's QUOTE_* constants
+    quoting: str = "minimal"
+    line_terminator: str = "\r\n"
+    # strftime formats; None keeps str(), i.e. ISO 8601 with a space separator
+    date_format: Optional[str] = None
+    datetime_format: Optional[str] = None
+    # format() spec for numbers, e.g. ".2f" or ",.2f"; None keeps str()
+    number_format: Optional[str] = None
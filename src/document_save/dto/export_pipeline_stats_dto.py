@@ -0,0 +1,14 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class ExportPipelineStatsDTO:
+    batches: int = 0
+    max_queue_depth: int = 0
+    total_queue_depth: int = 0
+    fetch_stall_seconds: float = 0.0
+    write_stall_seconds: float = 0.0
+
+    @property
+    def average_queue_depth(self) -> float:
+        return self.total_queue_depth / self.batches if self.batches else 0.0
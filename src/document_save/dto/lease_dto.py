@@ -0,0 +1,11 @@
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass
+class LeaseDTO:
+    key: Optional[str]
+    lease_id: Optional[str]
+    owned: bool
+    save_path: Optional[str] = None
+    row_count: Optional[int] = None
@@ -0,0 +1,95 @@
+import itertools
+import os
+import queue
+import threading
+import time
+from typing import Iterable, Iterator
+from src.document_save.dto.export_pipeline_stats_dto import ExportPipelineStatsDTO
+
+
+class ExportPipeline:
+    """
+    Double-buffered export: a producer thread fetches row batches from the
+    cursor while the calling thread encodes and writes the previous ones.
+
+    The two sides are joined by a bounded queue of batches, so at most
+    QUEUE_DEPTH batches are held in memory. Stall times show which side is
+    the bottleneck:
+    - write_stall_seconds: producer blocked because the queue was full (disk is slower)
+    - fetch_stall_seconds: writer blocked because the queue was empty (Oracle is slower)
+    """
+
+    QUEUE_DEPTH = int(os.environ.get("EXPORT_QUEUE_DEPTH", "4"))
+    POLL_INTERVAL = 0.5  # seconds; how often a blocked producer checks for cancellation
+
+    _DONE = object()
+
+    def __init__(self, rows: Iterable, batch_size: int, queue_depth: int = None):
+        """
+        Args:
+            rows: Streamed result (CursorResult) or any row iterable
+            batch_size: Rows per fetchmany batch
+            queue_depth: Maximum batches buffered between fetch and write
+        """
+        self.rows = rows
+        self.batch_size = batch_size
+        self.batches = queue.Queue(maxsize=queue_depth or self.QUEUE_DEPTH)
+        self.stats = ExportPipelineStatsDTO()
+        self._cancelled = threading.Event()
+        self._error = None
+        # Named after the consuming thread so a StackSampler can attribute it
+        self._producer = threading.Thread(
+            target=self._produce, name=f"export-fetch-{threading.get_ident()}", daemon=True
+        )
+
+    def __iter__(self) -> Iterator[list]:
+        """Yield fetched batches in order; re-raises any fetch error."""
+        self._producer.start()
+        try:
+            while True:
+                started = time.perf_counter()
+                batch = self.batches.get()
+                self.stats.fetch_stall_seconds += time.perf_counter() - started
+                if batch is self._DONE:
+                    break
+                yield batch
+        finally:
+            # Writer failed or stopped early: release a producer blocked on put()
+            self._cancelled.set()
+            self._producer.join()
+
+        if self._error:
+            raise self._error
+
+    def _produce(self) -> None:
+        try:
+            for batch in self._fetch_batches():
+                if not self._put(batch):
+                    return
+                depth = self.batches.qsize()
+                self.stats.batches += 1
+                self.stats.total_queue_depth += depth
+                self.stats.max_queue_depth = max(self.stats.max_queue_depth, depth)
+        except Exception as e:
+            self._error = e
+        self._put(self._DONE)
+
+    def _fetch_batches(self) -> Iterator[list]:
+        # CursorResult.partitions() is fetchmany(); plain iterables are chunked
+        if hasattr(self.rows, "partitions"):
+            return self.rows.partitions(self.batch_size)
+        rows = iter(self.rows)
+        return iter(lambda: list(itertools.islice(rows, self.batch_size)), [])
+
+    def _put(self, item) -> bool:
+        started = time.perf_counter()
+        try:
+            while not self._cancelled.is_set():
+                try:
+                    self.batches.put(item, timeout=self.POLL_INTERVAL)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            self.stats.write_stall_seconds += time.perf_counter() - started
@@ -0,0 +1,196 @@
+import json
+import os
+import socket
+import time
+import uuid
+from typing import Optional
+from src.document_save.document_save_service import DocumentSaveService
+from src.document_save.dto.lease_dto import LeaseDTO
+from src.document_save.result_cache_service import ResultCacheService
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+
+
+class RequestCoalescingService:
+    """
+    Runs identical in-flight report requests once.
+
+    The first worker to see a (query id, params, SQL fingerprint) key takes a
+    lease; later requests for the same key wait for it and get their own link
+    to the leader's output file (see ResultCacheService.link_for_user)
+    instead of running the same statement again. Leases are
+    files created with O_EXCL on the shared drive, so they coordinate threads,
+    processes and worker containers alike.
+
+    Off unless QUERY_COALESCE_REQUESTS=1, since a follower holds its consumer
+    thread while it waits. A lease older than LEASE_TTL is treated as
+    abandoned (its worker died) and can be taken over. A follower that has
+    waited WAIT_TIMEOUT seconds runs the report itself. Followers pick up a
+    leader's result within a poll or two, so result files older than
+    RESULT_TTL are removed whenever a leader completes.
+    """
+
+    ENABLED = os.environ.get("QUERY_COALESCE_REQUESTS", "0") == "1"
+    LEASE_TTL = int(os.environ.get("QUERY_COALESCE_LEASE_TTL", "7200"))
+    WAIT_TIMEOUT = int(os.environ.get("QUERY_COALESCE_WAIT_TIMEOUT", "300"))
+    POLL_INTERVAL = 2  # seconds between lease checks while following
+    RESULT_TTL = 60  # seconds a leader's result file is kept for its followers
+
+    def __init__(self):
+        self.lease_path = os.path.join(DocumentSaveService.base_path, 'query_leases')
+
+    def acquire(self, query: ExecuteQueryDTO) -> LeaseDTO:
+        """
+        Take the lease for this request, or wait for the worker that holds it.
+
+        Returns:
+            An owned lease (run the report, then complete() it), a lease
+            carrying this user's own copy of the leader's report as
+            save_path, or an unowned lease without a result when coalescing
+            is off, the script cannot be read or the wait timed out.
+        """
+        if not self.ENABLED:
+            return LeaseDTO(key=None, lease_id=None, owned=False)
+
+        try:
+            key = ResultCacheService().make_key(query)
+        except OSError:
+            # Let the query service report the missing script as usual
+            return LeaseDTO(key=None, lease_id=None, owned=False)
+        os.makedirs(self.lease_path, exist_ok=True)
+        started = time.time()
+        deadline = time.monotonic() + self.WAIT_TIMEOUT
+        followed_lease_id = None
+
+        while True:
+            result = self._followed_result(key, followed_lease_id, query)
+            if result:
+                return result
+
+            lease = self._try_create(key)
+            if lease:
+                # The leader may have finished just before we took over
+                result = self._followed_result(key, followed_lease_id, query)
+                if result:
+                    self.release(lease)
+                    return result
+                return lease
+
+            current = self._read_json(self._lease_file(key))
+            if current and current["expires"] < time.time():
+                print(f" [!] Lease {current['lease_id']} held by {current['owner']} expired, taking over")
+                self._remove(self._lease_file(key), lease_id=current["lease_id"])
+                continue
+            if current:
+                followed_lease_id = current["lease_id"]
+            else:
+                # The lease went away between _try_create and the read; its
+                # leader may have completed while we were looking
+                # (mtimes on the share can be coarse, hence the slack)
+                recent_lease_id = self._recent_result_lease_id(key, since=started - self.POLL_INTERVAL)
+                if recent_lease_id and recent_lease_id != followed_lease_id:
+                    followed_lease_id = recent_lease_id
+                    continue
+
+            if time.monotonic() > deadline:
+                return LeaseDTO(key=key, lease_id=None, owned=False)
+            time.sleep(self.POLL_INTERVAL)
+
+    def complete(self, lease: LeaseDTO, save_path: str, row_count: Optional[int]) -> None:
+        """Publish the leader's output to followers, then drop the lease."""
+        if not lease.owned:
+            return
+        result_file = self._result_file(lease.key)
+        temp_file = f"{result_file}.{lease.lease_id}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as result:
+            json.dump({"lease_id": lease.lease_id, "save_path": save_path, "row_count": row_count}, result)
+        os.replace(temp_file, result_file)
+        self.release(lease)
+        self._remove_expired_results()
+
+    def release(self, lease: LeaseDTO) -> None:
+        """Drop an owned lease; followers of a failed leader retry for themselves."""
+        if lease.owned:
+            self._remove(self._lease_file(lease.key), lease_id=lease.lease_id)
+
+    def _remove_expired_results(self) -> None:
+        """Delete result files (and temp files of crashed leaders) older than RESULT_TTL."""
+        cutoff = time.time() - self.RESULT_TTL
+        for file_name in os.listdir(self.lease_path):
+            if not (file_name.endswith(".result") or file_name.endswith(".tmp")):
+                continue
+            path = os.path.join(self.lease_path, file_name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _try_create(self, key: str) -> Optional[LeaseDTO]:
+        try:
+            descriptor = os.open(self._lease_file(key), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return None
+
+        lease_id = uuid.uuid4().hex
+        with os.fdopen(descriptor, "w", encoding="utf-8") as lease_file:
+            json.dump({
+                "lease_id": lease_id,
+                "owner": f"{socket.gethostname()}:{os.getpid()}",
+                "expires": time.time() + self.LEASE_TTL,
+            }, lease_file)
+        return LeaseDTO(key=key, lease_id=lease_id, owned=True)
+
+    def _followed_result(self, key: str, lease_id: Optional[str],
+                         query: ExecuteQueryDTO) -> Optional[LeaseDTO]:
+        if not lease_id:
+            return None
+        result = self._read_json(self._result_file(key))
+        if not result or result["lease_id"] != lease_id:
+            return None
+        try:
+            # Each user gets a file in their own folder, with its own cleanup
+            save_path = ResultCacheService().link_for_user(source=result["save_path"], query=query)
+        except FileNotFoundError:
+            # The leader's report is already gone; run the report instead
+            return None
+        return LeaseDTO(
+            key=key,
+            lease_id=lease_id,
+            owned=False,
+            save_path=save_path,
+            row_count=result["row_count"],
+        )
+
+    def _recent_result_lease_id(self, key: str, since: float) -> Optional[str]:
+        """Lease id of a result published at or after since, if there is one."""
+        result_file = self._result_file(key)
+        try:
+            if os.path.getmtime(result_file) < since:
+                return None
+        except FileNotFoundError:
+            return None
+        result = self._read_json(result_file)
+        return result["lease_id"] if result else None
+
+    def _lease_file(self, key: str) -> str:
+        return os.path.join(self.lease_path, f"{key}.lease")
+
+    def _result_file(self, key: str) -> str:
+        return os.path.join(self.lease_path, f"{key}.result")
+
+    def _read_json(self, path: str) -> Optional[dict]:
+        # A lease that is still being written reads as empty and is retried
+        try:
+            with open(path, "r", encoding="utf-8") as json_file:
+                return json.load(json_file)
+        except (OSError, ValueError):
+            return None
+
+    def _remove(self, path: str, lease_id: str) -> None:
+        current = self._read_json(path)
+        if current and current["lease_id"] != lease_id:
+            return
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
@@ -0,0 +1,209 @@
+import hashlib
+import json
+import os
+import shutil
+import time
+import uuid
+from dataclasses import asdict
+from typing import Dict, Optional
+from src.document_save.document_save_service import DocumentSaveService
+from src.document_save.dto.cached_result_dto import CachedResultDTO
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+from src.queries.dto.query_result_dto import QueryResultDTO
+
+
+def _parse_ttls(value: str) -> Dict[int, int]:
+    """Parse "423:3600,17:600" into {423: 3600, 17: 600}."""
+    ttls = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        query_id, ttl = item.split(":")
+        ttls[int(query_id)] = int(ttl)
+    return ttls
+
+
+class ResultCacheService:
+    """
+    Reuses a still-valid CSV from an earlier run of the same report instead of
+    going back to Oracle.
+
+    Entries are keyed on query id, normalized query_params and the .sql file's
+    mtime and size, so editing the script invalidates its entries. An entry is
+    a hard link to the original report (so it outlives the user's copy being
+    cleaned up) plus a JSON index file, both on the shared drive so every
+    worker sees them.
+
+    TTLs are per query in seconds: QUERY_RESULT_CACHE_TTLS="423:3600,17:600"
+    overrides the QUERY_RESULT_CACHE_TTL default, and 0 disables caching.
+    Expired entries are dropped and, beyond MAX_ENTRIES, the least recently
+    used ones are evicted.
+    """
+
+    DEFAULT_TTL = int(os.environ.get("QUERY_RESULT_CACHE_TTL", "0"))
+    QUERY_TTLS = _parse_ttls(os.environ.get("QUERY_RESULT_CACHE_TTLS", ""))
+    MAX_ENTRIES = int(os.environ.get("QUERY_RESULT_CACHE_MAX_ENTRIES", "500"))
+
+    def __init__(self):
+        self.cache_path = os.path.join(DocumentSaveService.base_path, 'query_cache')
+
+    def get_ttl(self, query_id: int) -> int:
+        return self.QUERY_TTLS.get(int(query_id), self.DEFAULT_TTL)
+
+    def make_key(self, query: ExecuteQueryDTO) -> str:
+        """Cache key for (query id, normalized params, SQL file fingerprint)."""
+        sql_stat = os.stat(query.file_path)
+        params = {
+            key: value.strip() if isinstance(value, str) else value
+            for key, value in (query.query_params or {}).items()
+        }
+        key_source = json.dumps(
+            {
+                "query_id": int(query.query_id),
+                "params": params,
+                "sql": f"{sql_stat.st_mtime_ns}:{sql_stat.st_size}",
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(key_source.encode("utf-8")).hexdigest()
+
+    def lookup(self, query: ExecuteQueryDTO) -> Optional[CachedResultDTO]:
+        """Return a fresh cache entry for this report, or None."""
+        if self.get_ttl(query.query_id) <= 0:
+            return None
+        try:
+            key = self.make_key(query)
+        except OSError:
+            return None
+
+        entry = self._read_entry(key)
+        if not entry:
+            return None
+        if self._expired(entry) or not os.path.exists(entry.file_path):
+            self._remove(key)
+            return None
+
+        entry.last_used = time.time()
+        self._write_entry(entry)
+        return entry
+
+    def discard(self, query: ExecuteQueryDTO) -> None:
+        """Drop this report's entry, e.g. after it failed to load; never raises."""
+        try:
+            self._remove(self.make_key(query))
+        except OSError as e:
+            print(f"Failed to discard cached query result: {e}")
+
+    def reuse(self, entry: CachedResultDTO, query: ExecuteQueryDTO) -> str:
+        """Give this user their own report file backed by the cached one."""
+        return self.link_for_user(source=entry.file_path, query=query)
+
+    def link_for_user(self, source: str, query: ExecuteQueryDTO) -> str:
+        """
+        Link (or copy) source to a new report file in this user's folder.
+
+        Report file names only go down to the second, so a repeat request can
+        land on a path that already exists (often the user's own earlier
+        report, hard-linked into the cache). Such paths are never reused; a
+        numbered suffix is added instead, so every delivery has its own file
+        and its own cleanup.
+        """
+        save_path = DocumentSaveService().build_file_path(query=query)
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        base, extension = os.path.splitext(save_path)
+        suffix = 1
+        while True:
+            try:
+                self._link_or_copy(source, save_path)
+                return save_path
+            except FileExistsError:
+                suffix += 1
+                save_path = f"{base}-{suffix}{extension}"
+
+    def store(self, query: ExecuteQueryDTO, save_path: str,
+              results: QueryResultDTO) -> Optional[CachedResultDTO]:
+        """Keep a freshly written report for later runs of the same request."""
+        if self.get_ttl(query.query_id) <= 0:
+            return None
+
+        key = self.make_key(query)
+        os.makedirs(self.cache_path, exist_ok=True)
+        cached_file = os.path.join(self.cache_path, f"{key}.csv")
+        temp_file = f"{cached_file}.{uuid.uuid4().hex}.tmp"
+        self._link_or_copy(save_path, temp_file)
+        os.replace(temp_file, cached_file)
+
+        now = time.time()
+        entry = CachedResultDTO(
+            key=key,
+            file_path=cached_file,
+            query_id=int(query.query_id),
+            created=now,
+            last_used=now,
+            row_count=results.row_count,
+            byte_count=results.byte_count,
+        )
+        self._write_entry(entry)
+        self.evict()
+        return entry
+
+    def evict(self) -> int:
+        """Drop expired entries and the least recently used beyond MAX_ENTRIES."""
+        if not os.path.isdir(self.cache_path):
+            return 0
+
+        entries = []
+        for file_name in os.listdir(self.cache_path):
+            if file_name.endswith(".json"):
+                entry = self._read_entry(file_name[:-len(".json")])
+                if entry:
+                    entries.append(entry)
+
+        expired = [entry for entry in entries if self._expired(entry)]
+        live = sorted(
+            (entry for entry in entries if not self._expired(entry)),
+            key=lambda entry: entry.last_used,
+            reverse=True,
+        )
+        evicted = expired + live[self.MAX_ENTRIES:]
+        for entry in evicted:
+            self._remove(entry.key)
+        return len(evicted)
+
+    def _expired(self, entry: CachedResultDTO) -> bool:
+        return time.time() - entry.created > self.get_ttl(entry.query_id)
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_path, f"{key}.json")
+
+    def _read_entry(self, key: str) -> Optional[CachedResultDTO]:
+        try:
+            with open(self._entry_path(key), "r", encoding="utf-8") as entry_file:
+                return CachedResultDTO(**json.load(entry_file))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def _write_entry(self, entry: CachedResultDTO) -> None:
+        entry_path = self._entry_path(entry.key)
+        temp_path = f"{entry_path}.{uuid.uuid4().hex}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as entry_file:
+            json.dump(asdict(entry), entry_file)
+        os.replace(temp_path, entry_path)
+
+    def _remove(self, key: str) -> None:
+        for path in (self._entry_path(key), os.path.join(self.cache_path, f"{key}.csv")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _link_or_copy(self, source: str, destination: str) -> None:
+        # Hard links are free and independent of each other's cleanup; fall
+        # back to a copy where the share does not support them. An existing
+        # destination is never overwritten: it may share the source's inode.
+        try:
+            os.link(source, destination)
+        except FileExistsError:
+            raise
+        except OSError:
+            with open(source, "rb") as source_file, open(destination, "xb") as destination_file:
+                shutil.copyfileobj(source_file, destination_file)
@@ -0,0 +1,59 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Stops calling a failing dependency for a cooldown period.
+
+    After failure_threshold consecutive failures the circuit opens and allow()
+    returns False until reset_timeout seconds have passed; then a single trial
+    call is let through (half-open). A success closes the circuit again, a
+    failure re-opens it for another cooldown.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    @property
+    def retry_after(self) -> float:
+        """Seconds until a trial call will be allowed (0 when closed)."""
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def ready(self) -> bool:
+        """Whether allow() would let a call through, without taking the trial slot."""
+        with self._lock:
+            return self.opened_at is None or (not self._trial_in_flight and self.retry_after <= 0)
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if self._trial_in_flight or self.retry_after > 0:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
@@ -0,0 +1,145 @@
+import os
+import queue
+import threading
+import time
+from typing import List, Tuple
+from src.email.email_service import EmailService
+from src.email.dto.email_request_dto import EmailRequestDTO
+
+
+class EmailDispatcher:
+    """
+    Background email stage, so the consumer hands off a delivery and moves
+    on to the next report instead of waiting on the mail API.
+
+    Requests are sent in order by one daemon thread per process, which is
+    started on first use (and again after a fork). While the sender's circuit
+    breaker is open the thread waits rather than dropping mail. The queue is
+    bounded, so a long outage eventually applies back-pressure to submit().
+    A request that still fails after the sender's own retries is logged and
+    dropped.
+
+    With EMAIL_BATCH_WINDOW > 0 the thread collects deliveries for up to that
+    many seconds (or EMAIL_BATCH_SIZE recipients) and sends one request per
+    sender/template, with every recipient keeping its own data payload.
+    """
+
+    QUEUE_SIZE = int(os.environ.get("EMAIL_QUEUE_SIZE", "1000"))
+    BATCH_WINDOW = float(os.environ.get("EMAIL_BATCH_WINDOW", "0"))
+    BATCH_SIZE = int(os.environ.get("EMAIL_BATCH_SIZE", "50"))
+    SHUTDOWN_TIMEOUT = 60  # seconds to flush queued emails on shutdown
+
+    _queue = None
+    _thread = None
+    _pid = None
+    _lock = threading.Lock()
+    _STOP = object()
+
+    @classmethod
+    def submit(cls, sender: EmailService, request: EmailRequestDTO) -> None:
+        """Queue request to be sent by sender on the background thread."""
+        cls._ensure_started()
+        cls._queue.put((sender, request))
+
+    @classmethod
+    def shutdown(cls, timeout: float = None) -> None:
+        """
+        Stop the background thread once everything already queued has been
+        attempted, waiting at most timeout seconds; mail still queued after
+        that is reported, not sent.
+        """
+        timeout = cls.SHUTDOWN_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        with cls._lock:
+            if not cls._running():
+                return
+            work, thread = cls._queue, cls._thread
+        try:
+            # Outside the lock: a full queue blocks until the thread drains it
+            work.put((None, cls._STOP), timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            print(f" [!] Email dispatcher stopped with {work.qsize()} emails unsent")
+
+    @classmethod
+    def pending(cls) -> int:
+        return cls._queue.qsize() if cls._running() else 0
+
+    @classmethod
+    def _running(cls) -> bool:
+        return cls._pid == os.getpid() and cls._thread is not None and cls._thread.is_alive()
+
+    @classmethod
+    def _ensure_started(cls) -> None:
+        with cls._lock:
+            if cls._running():
+                return
+            cls._queue = queue.Queue(maxsize=cls.QUEUE_SIZE)
+            cls._pid = os.getpid()
+            cls._thread = threading.Thread(target=cls._run, name="email-dispatcher", daemon=True)
+            cls._thread.start()
+
+    @classmethod
+    def merge(cls, batch: List[Tuple[EmailService, EmailRequestDTO]]) -> List[Tuple[EmailService, EmailRequestDTO]]:
+        """
+        Combine requests for the same sender type and template into as few
+        requests as possible, at most BATCH_SIZE recipients each, in
+        submission order.
+        """
+        groups = {}
+        for sender, request in batch:
+            key = (type(sender), request.email_from, request.subject, request.template_id)
+            groups.setdefault(key, (sender, request, []))[2].extend(request.email_to)
+
+        merged = []
+        for sender, request, recipients in groups.values():
+            for start in range(0, len(recipients), cls.BATCH_SIZE):
+                merged.append((sender, EmailRequestDTO(
+                    email_from=request.email_from,
+                    email_to=recipients[start:start + cls.BATCH_SIZE],
+                    subject=request.subject,
+                    template_id=request.template_id,
+                )))
+        return merged
+
+    @classmethod
+    def _run(cls) -> None:
+        work = cls._queue
+        stopping = False
+        while not stopping:
+            item = work.get()
+            if item[1] is cls._STOP:
+                return
+            batch = [item]
+
+            if cls.BATCH_WINDOW > 0:
+                deadline = time.monotonic() + cls.BATCH_WINDOW
+                recipients = len(item[1].email_to)
+                while recipients < cls.BATCH_SIZE:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = work.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if item[1] is cls._STOP:
+                        stopping = True
+                        break
+                    batch.append(item)
+                    recipients += len(item[1].email_to)
+                batch = cls.merge(batch)
+
+            for sender, request in batch:
+                cls._send(sender, request)
+
+    @classmethod
+    def _send(cls, sender: EmailService, request: EmailRequestDTO) -> None:
+        while not sender.circuit_breaker.ready():
+            time.sleep(max(sender.circuit_breaker.retry_after, 1))
+        try:
+            sender.send_request(request)
+        except Exception as e:
+            print(f"Email dispatch failed: {e}")
@@ -1,14 +1,51 @@
 import json
+import os
+import threading
+import time
 import requests
 from dataclasses import dataclass, asdict
 from typing import Dict, List
+from requests.adapters import HTTPAdapter
 from config import NIBEmailService
 from src.email.dto.email_request_dto import EmailRequestDTO
+from src.email.circuit_breaker import CircuitBreaker
 
 @dataclass
 class EmailService:
-    
-    def send_request(self, request: EmailRequestDTO) -> None:
+    CONNECT_TIMEOUT = float(os.environ.get("EMAIL_CONNECT_TIMEOUT", "5"))
+    READ_TIMEOUT = float(os.environ.get("EMAIL_READ_TIMEOUT", "30"))
+    MAX_RETRIES = int(os.environ.get("EMAIL_MAX_RETRIES", "3"))
+    RETRY_BACKOFF = 1  # seconds, doubled after every attempt
+    # Gateway/overload responses: the request was not processed, so resending is safe
+    RETRY_STATUSES = {429, 502, 503, 504}
+
+    circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+    _session = None
+    _session_lock = threading.Lock()
+
+    @classmethod
+    def get_session(cls) -> requests.Session:
+        """Keep-alive session shared by every sender in this process."""
+        with cls._session_lock:
+            if cls._session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+                session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=10))
+                EmailService._session = session
+            return cls._session
+
+    def send_request(self, request: EmailRequestDTO) -> bool:
+        """
+        POST the request to the mail API.
+
+        Connection failures and gateway errors are retried with exponential
+        backoff. Read timeouts are not, because the mail may already have gone
+        out. Repeated failures open the circuit breaker, and sends are then
+        skipped until it lets a trial request through.
+
+        Returns:
+            True if the mail API accepted the request
+        """
         try:
             submit_request_endpoint = f"{NIBEmailService.root_url}/email"
             headers = {
@@ -19,8 +56,39 @@ class EmailService:
                         "App-Name": NIBEmailService.app_name
                       }
             data = json.dumps(asdict(request))
-            req = requests.post(url=submit_request_endpoint,data=data,headers=headers)
-            if not req.ok:
-                print(req.text)
         except Exception as e:
             print(str(e))
+            return False
+
+        if not self.circuit_breaker.allow():
+            print(f"Email service unavailable, retry in {self.circuit_breaker.retry_after:.0f}s")
+            return False
+
+        for attempt in range(self.MAX_RETRIES + 1):
+            if attempt:
+                time.sleep(self.RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                req = self.get_session().post(
+                    url=submit_request_endpoint,
+                    data=data,
+                    headers=headers,
+                    timeout=(self.CONNECT_TIMEOUT, self.READ_TIMEOUT),
+                )
+            except requests.exceptions.ConnectionError as e:
+                print(str(e))
+                continue
+            except Exception as e:
+                print(str(e))
+                break
+
+            if req.ok:
+                self.circuit_breaker.record_success()
+                return True
+            print(req.text)
+            if req.status_code not in self.RETRY_STATUSES:
+                # The service answered; the request itself was rejected
+                self.circuit_breaker.record_success()
+                return False
+
+        self.circuit_breaker.record_failure()
+        return False
@@ -2,6 +2,7 @@ from dataclasses import dataclass
 from typing import List
 from config import NIBEmailService
 from src.email.email_service import EmailService
+from src.email.email_dispatcher import EmailDispatcher
 from src.email.dto.recipient_dto import RecipientDTO
 from src.email.dto.email_request_dto import EmailRequestDTO
 
@@ -16,7 +17,7 @@ class query_report_delivered(EmailService):
     def __init__(self) -> None:
         super().__init__()
 
-    def send(self, recipients: List[RecipientDTO]) -> None:
+    def send(self, recipients: List[RecipientDTO], background: bool = False) -> None:
         self.email_to = recipients
         email_request = EmailRequestDTO(
             email_from=self.email_from,
@@ -24,4 +25,7 @@ class query_report_delivered(EmailService):
             subject=self.subject,
             template_id=self.template_id,
         )
-        self.send_request(email_request)
\ No newline at end of file
+        if background:
+            EmailDispatcher.submit(sender=self, request=email_request)
+        else:
+            self.send_request(email_request)
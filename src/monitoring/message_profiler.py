@@ -0,0 +1,151 @@
+import cProfile
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Optional
+from config import FileRepo
+
+
+def _parse_ids(value: str) -> set:
+    return {part.strip() for part in value.split(",") if part.strip()}
+
+
+class StackSampler:
+    """
+    Samples the Python stack of one thread (and its export-fetch helper) on a
+    background thread, counting collapsed stacks for flame graph tools.
+
+    Cost is one sys._current_frames() call per interval, independent of how
+    much code the profiled thread runs.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._helper_prefix = f"export-fetch-{thread_id}"
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"stack-sampler-{thread_id}", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            threads = {self.thread_id: "message"}
+            for thread in threading.enumerate():
+                if thread.name.startswith(self._helper_prefix):
+                    threads[thread.ident] = "export-fetch"
+            frames = sys._current_frames()
+            for ident, role in threads.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.stacks[self._collapse(role, frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(role: str, frame) -> str:
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        names.append(role)
+        return ";".join(reversed(names))
+
+    def write(self, path: str) -> None:
+        """Write "frame;frame;frame count" lines, the collapsed-stack format."""
+        with open(path, "w", encoding="utf-8") as profile_file:
+            for stack, count in self.stacks.most_common():
+                profile_file.write(f"{stack} {count}\n")
+
+
+class MessageProfiler:
+    """
+    Opt-in CPU profile of one report message.
+
+    Messages for a query id in PROFILE_QUERY_IDS or a user in PROFILE_USER_IDS
+    run under cProfile and always leave a pstats file (.prof). With
+    PROFILE_SLOW_SECONDS set, every other message is watched by a StackSampler
+    and its collapsed stacks (.folded) are kept only if the message took at
+    least that long. Profiles always go under PROFILE_DIR, never into the
+    users' result folders, which the cleanup queue empties report by report.
+    """
+
+    QUERY_IDS = _parse_ids(os.environ.get("PROFILE_QUERY_IDS", ""))
+    USER_IDS = _parse_ids(os.environ.get("PROFILE_USER_IDS", ""))
+    SLOW_SECONDS = float(os.environ.get("PROFILE_SLOW_SECONDS", "0"))
+    SAMPLE_INTERVAL = float(os.environ.get("PROFILE_SAMPLE_INTERVAL", "10")) / 1000
+    PROFILE_DIR = os.environ.get("PROFILE_DIR", os.path.join(FileRepo.base_drive, "query_profiles"))
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.profile = None
+        self.sampler = None
+
+    @classmethod
+    def enabled(cls) -> bool:
+        return bool(cls.QUERY_IDS or cls.USER_IDS or cls.SLOW_SECONDS)
+
+    @classmethod
+    def start(cls) -> "MessageProfiler":
+        """Begin watching the calling thread's message."""
+        profiler = cls()
+        if cls.SLOW_SECONDS:
+            profiler.sampler = StackSampler(threading.get_ident(), cls.SAMPLE_INTERVAL)
+            profiler.sampler.start()
+        return profiler
+
+    def identify(self, query_id: int, user_id: int) -> None:
+        """Switch to cProfile once the message turns out to be a profiling target."""
+        if self.profile or not (str(query_id) in self.QUERY_IDS or str(user_id) in self.USER_IDS):
+            return
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError as e:
+            # Python 3.12+ allows one cProfile at a time; keep sampling instead
+            print(f"cProfile unavailable for query {query_id}: {e}")
+            return
+        self.profile = profile
+
+    def finish(self, name: str) -> Optional[str]:
+        """
+        Stop profiling and write the profile if this message is to be kept.
+
+        Args:
+            name: File name stem under PROFILE_DIR; a timestamp is appended
+
+        Returns:
+            Path of the profile file, or None if nothing was written
+        """
+        elapsed = time.monotonic() - self.started
+        if self.profile:
+            self.profile.disable()
+        if self.sampler:
+            self.sampler.stop()
+
+        if self.profile:
+            extension, write = ".prof", self.profile.dump_stats
+        elif self.sampler and self.sampler.samples and elapsed >= self.SLOW_SECONDS:
+            extension, write = ".folded", self.sampler.write
+        else:
+            return None
+
+        path = os.path.join(self.PROFILE_DIR, f"{name}_{datetime.now():%Y%m%d_%H%M%S}{extension}")
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            write(path)
+        except Exception as e:
+            print(f"Failed to write profile {path}: {e}")
+            return None
+        print(f" [*] Profile of {elapsed:.1f}s message written to {path}")
+        return path
@@ -0,0 +1,79 @@
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.monitoring.metrics import registry
+
+CONTENT_TYPE = "application/openmetrics-text; version=1.0.0; charset=utf-8"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would drown the consumer's own output
+        pass
+
+
+class MetricsServer:
+    """
+    Serves the process's metrics registry at http://METRICS_HOST:METRICS_PORT/metrics.
+
+    Binds to localhost by default; METRICS_PORT=0 disables the endpoint.
+    Supervisor children listen on METRICS_PORT + their slot number so each
+    process can be scraped separately.
+    """
+
+    HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+    PORT = int(os.environ.get("METRICS_PORT", "9102"))
+
+    _server = None
+    _thread = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def start(cls, port: int = None) -> int:
+        """
+        Start serving on a daemon thread; a no-op if already running.
+
+        Returns:
+            The bound port, or 0 if the endpoint is disabled or could not bind
+        """
+        with cls._lock:
+            if cls._server is not None:
+                return cls._server.server_address[1]
+            if port is None:
+                if not cls.PORT:
+                    return 0
+                port = cls.PORT + int(os.environ.get("QUERY_WORKER_SLOT", "0"))
+            try:
+                cls._server = ThreadingHTTPServer((cls.HOST, port), _MetricsHandler)
+            except OSError as e:
+                # Metrics are optional; a taken port must not stop the consumer
+                print(f"Metrics endpoint disabled, cannot bind {cls.HOST}:{port}: {e}")
+                return 0
+            cls._server.daemon_threads = True
+            cls._thread = threading.Thread(target=cls._server.serve_forever, name="metrics-server", daemon=True)
+            cls._thread.start()
+            bound = cls._server.server_address[1]
+        print(f" [*] Serving metrics on http://{cls.HOST}:{bound}/metrics")
+        return bound
+
+    @classmethod
+    def stop(cls) -> None:
+        with cls._lock:
+            server, cls._server = cls._server, None
+            thread, cls._thread = cls._thread, None
+        if server is None:
+            return
+        server.shutdown()
+        server.server_close()
+        thread.join()
@@ -0,0 +1,70 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict
+from src.monitoring.metrics import registry
+
+
+class PipelineMetrics:
+    """
+    Latency and volume metrics for every report message, recorded in-process.
+
+    Unlike Sentry spans these are never sampled: every stage of every message
+    is observed, and MetricsServer exposes the totals for scraping.
+    """
+
+    STAGE_DURATION = registry.histogram(
+        "query_stage_duration_seconds",
+        "Time spent in each consumer pipeline stage.",
+        labels=("stage",),
+    )
+    MESSAGE_DURATION = registry.histogram(
+        "query_message_duration_seconds",
+        "Time to process one report message end to end.",
+    )
+    MESSAGES = registry.counter(
+        "query_messages",
+        "Report messages processed, by final status.",
+        labels=("status",),
+    )
+    ROWS = registry.counter("query_export_rows", "Result rows written to report files.")
+    BYTES = registry.counter("query_export_bytes", "Bytes written to report files.")
+
+    # Per-thread stage totals of the current message, while one is being collected
+    _local = threading.local()
+
+    @classmethod
+    @contextmanager
+    def time_stage(cls, stage: str):
+        """Observe the duration of the wrapped block, whether or not it raises."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - started
+            cls.STAGE_DURATION.labels(stage=stage).observe(seconds)
+            stages = getattr(cls._local, "stages", None)
+            if stages is not None:
+                stages[stage] = stages.get(stage, 0) + seconds
+
+    @classmethod
+    def begin_message(cls) -> None:
+        """Start collecting this thread's stage timings for one message."""
+        cls._local.stages = {}
+
+    @classmethod
+    def end_message(cls) -> Dict[str, float]:
+        """Stage timings collected since begin_message(), in seconds."""
+        stages = getattr(cls._local, "stages", None) or {}
+        cls._local.stages = None
+        return stages
+
+    @classmethod
+    def record_export(cls, row_count: int, byte_count: int) -> None:
+        cls.ROWS.inc(row_count or 0)
+        cls.BYTES.inc(byte_count or 0)
+
+    @classmethod
+    def record_message(cls, status: str, seconds: float) -> None:
+        cls.MESSAGES.labels(status=status).inc()
+        cls.MESSAGE_DURATION.observe(seconds)
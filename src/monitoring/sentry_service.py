@@ -2,16 +2,84 @@ import sentry_sdk
 from sentry_sdk.integrations.sqlalchemy import SqlalchemyIntegration
 from sentry_sdk.integrations.logging import LoggingIntegration
 import logging
+import os
+import random
+import threading
+import time
+from collections import deque
 from typing import Optional, Dict, Any
 
 
+def _parse_thresholds(value: str) -> Dict[str, float]:
+    """Parse "query_id:seconds,query_id:seconds" into a lookup by query id."""
+    thresholds = {}
+    for entry in filter(None, (part.strip() for part in value.split(","))):
+        query_id, _, seconds = entry.partition(":")
+        thresholds[query_id.strip()] = float(seconds)
+    return thresholds
+
+
+class _MessageTrace:
+    """What one message buffered while its keep/drop decision is pending."""
+
+    __slots__ = ("started", "query_id", "failed", "breadcrumbs", "messages")
+
+    def __init__(self, max_breadcrumbs: int):
+        self.started = time.monotonic()
+        self.query_id = None
+        self.failed = False
+        self.breadcrumbs = deque(maxlen=max_breadcrumbs)
+        self.messages = []
+
+
+class _TailSampledTransaction:
+    """Buffers one message's trace and decides on exit whether Sentry gets it."""
+
+    def __init__(self, service, transaction):
+        self.service = service
+        self.transaction = transaction
+
+    def __enter__(self):
+        self.service._local.trace = _MessageTrace(self.service.MAX_BREADCRUMBS)
+        return self.transaction.__enter__()
+
+    def __exit__(self, exc_type, exc_value, tb):
+        trace = self.service._local.trace
+        self.service._local.trace = None
+        if exc_type is not None:
+            trace.failed = True
+        try:
+            self.service._finish_trace(trace, self.transaction)
+        except Exception as e:
+            # Sampling must never fail the message it describes
+            print(f"Failed to finish Sentry trace: {e}")
+        return self.transaction.__exit__(exc_type, exc_value, tb)
+
+
 class SentryService:
     """
     Centralized Sentry service for error tracking and performance monitoring.
     Provides methods to initialize Sentry, add context, and track custom events.
+
+    With tail sampling (SENTRY_TAIL_SAMPLING, on by default) every message's
+    transaction is recorded, but its spans, breadcrumbs and info messages stay
+    in process until the message ends. They are sent only if the message
+    failed, took longer than its latency threshold, or won the random sample
+    (SENTRY_TAIL_SAMPLE_RATE, defaulting to the config's traces_sample_rate).
+    Fast successful messages cost no serialization and no network call.
+    Errors are always sent immediately, with the breadcrumbs buffered so far.
     """
 
+    TAIL_SAMPLING = os.environ.get("SENTRY_TAIL_SAMPLING", "true").lower() == "true"
+    # Messages slower than this are always kept; override per query id with
+    # SENTRY_SLOW_SECONDS_BY_QUERY="12:300,15:900"
+    SLOW_SECONDS = float(os.environ.get("SENTRY_SLOW_SECONDS", "60"))
+    SLOW_SECONDS_BY_QUERY = _parse_thresholds(os.environ.get("SENTRY_SLOW_SECONDS_BY_QUERY", ""))
+    MAX_BREADCRUMBS = 100  # Sentry's own per-event limit
+
     _initialized = False
+    _sample_rate = 0.0
+    _local = threading.local()
 
     @classmethod
     def initialize(cls, config_class):
@@ -33,11 +101,20 @@ class SentryService:
         # Configure SQLAlchemy integration for query tracking
         sqlalchemy_integration = SqlalchemyIntegration()
 
+        traces_sample_rate = config_class.traces_sample_rate
+        profiles_sample_rate = config_class.profiles_sample_rate
+        if cls.TAIL_SAMPLING:
+            cls._sample_rate = float(os.environ.get("SENTRY_TAIL_SAMPLE_RATE", traces_sample_rate or 0))
+            # Record every transaction; _finish_trace decides which are sent.
+            # Profiles stay at the same share of all transactions as before.
+            profiles_sample_rate = (profiles_sample_rate or 0) * (traces_sample_rate or 0)
+            traces_sample_rate = 1.0
+
         sentry_sdk.init(
             dsn=config_class.dsn,
             environment=config_class.get_environment(),
-            traces_sample_rate=config_class.traces_sample_rate,
-            profiles_sample_rate=config_class.profiles_sample_rate,
+            traces_sample_rate=traces_sample_rate,
+            profiles_sample_rate=profiles_sample_rate,
             send_default_pii=config_class.send_default_pii,
             enable_tracing=config_class.enable_tracing,
             integrations=[
@@ -81,6 +158,10 @@ class SentryService:
             query_name: Name of the query
             query_params: Parameters passed to the query
         """
+        trace = cls._trace()
+        if trace:
+            trace.query_id = str(query_id)
+
         sentry_sdk.set_tag("query_id", str(query_id))
         sentry_sdk.set_tag("query_name", query_name)
 
@@ -103,6 +184,10 @@ class SentryService:
             level: Severity level ('debug', 'info', 'warning', 'error')
             data: Additional data dictionary
         """
+        trace = cls._trace()
+        if trace:
+            trace.breadcrumbs.append((message, category, level, data))
+            return
         sentry_sdk.add_breadcrumb(
             message=message,
             category=category,
@@ -116,11 +201,24 @@ class SentryService:
         """
         Capture a custom message event (for successful completions, warnings, etc.).
 
+        Under tail sampling, debug and info messages are only sent if the
+        current message's trace is kept.
+
         Args:
             message: Message to send
             level: Severity level ('debug', 'info', 'warning', 'error', 'fatal')
             tags: Additional tags for this event
         """
+        trace = cls._trace()
+        if trace:
+            if level in ("debug", "info"):
+                trace.messages.append((message, level, tags))
+                return
+            cls._flush_breadcrumbs(trace)
+        cls._send_message(message, level, tags)
+
+    @classmethod
+    def _send_message(cls, message: str, level: str, tags: Optional[Dict]):
         with sentry_sdk.push_scope() as scope:
             if tags:
                 for key, value in tags.items():
@@ -136,6 +234,10 @@ class SentryService:
             exception: Exception to capture
             tags: Additional tags for this event
         """
+        trace = cls._trace()
+        if trace:
+            trace.failed = True
+            cls._flush_breadcrumbs(trace)
         with sentry_sdk.push_scope() as scope:
             if tags:
                 for key, value in tags.items():
@@ -147,6 +249,9 @@ class SentryService:
         """
         Start a Sentry transaction for performance monitoring.
 
+        Under tail sampling the transaction is only sent if it is kept when
+        the block exits.
+
         Args:
             name: Transaction name (e.g., "process_query_message")
             op: Operation type (e.g., "task", "http", "db.query")
@@ -154,7 +259,10 @@ class SentryService:
         Returns:
             Transaction object (use as context manager)
         """
-        return sentry_sdk.start_transaction(name=name, op=op)
+        transaction = sentry_sdk.start_transaction(name=name, op=op)
+        if not cls.TAIL_SAMPLING:
+            return transaction
+        return _TailSampledTransaction(cls, transaction)
 
     @classmethod
     def start_span(cls, op: str, description: str):
@@ -170,6 +278,51 @@ class SentryService:
         """
         return sentry_sdk.start_span(op=op, description=description)
 
+    @classmethod
+    def _keep_reason(cls, trace: _MessageTrace, status: Optional[str]) -> Optional[str]:
+        """
+        Decide whether a finished message's trace is sent.
+
+        Returns:
+            Why it is kept ("error", "slow" or "sampled"), or None to drop it
+        """
+        if trace.failed or status not in (None, "ok"):
+            return "error"
+        threshold = cls.SLOW_SECONDS_BY_QUERY.get(trace.query_id, cls.SLOW_SECONDS)
+        if time.monotonic() - trace.started >= threshold:
+            return "slow"
+        if random.random() < cls._sample_rate:
+            return "sampled"
+        return None
+
+    @classmethod
+    def _finish_trace(cls, trace: _MessageTrace, transaction) -> None:
+        try:
+            reason = cls._keep_reason(trace, transaction.status)
+            if reason is None:
+                # Finishing an unsampled transaction discards it and its spans
+                transaction.sampled = False
+                return
+            transaction.set_tag("sampling.reason", reason)
+            cls._flush_breadcrumbs(trace)
+            for message, level, tags in trace.messages:
+                cls._send_message(message, level, tags)
+        finally:
+            # Breadcrumbs flushed for this message must not leak into the next one
+            trace.breadcrumbs.clear()
+            trace.messages = []
+            sentry_sdk.get_isolation_scope().clear_breadcrumbs()
+
+    @classmethod
+    def _flush_breadcrumbs(cls, trace: _MessageTrace) -> None:
+        while trace.breadcrumbs:
+            message, category, level, data = trace.breadcrumbs.popleft()
+            sentry_sdk.add_breadcrumb(message=message, category=category, level=level, data=data or {})
+
+    @classmethod
+    def _trace(cls) -> Optional[_MessageTrace]:
+        return getattr(cls._local, "trace", None)
+
     @classmethod
     def clear_context(cls):
         """Clear user and query context (useful between message processing)."""
@@ -1,7 +1,8 @@
 from sqlalchemy import *
-from src import engine, base
+from src import base
+from src.database.reflection import CachedReflection
 
-class NIBUser(base):
+class NIBUser(CachedReflection, base):
     __tablename__ = 'nib_users'
-    __table_args__ = ({'schema': 'nib_admin_auth','autoload_with': engine, "extend_existing" : True})
+    __table_args__ = ({'schema': 'nib_admin_auth', "extend_existing" : True})
     
@@ -1,11 +1,13 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from src.nib_user.nib_user_model import NIBUser
 from src.nib_user.dto.nib_user_dto import NIBUserDTO
 from src.database.SQLReader import SQLReader
 import os
-from typing import List
+from typing import Any, Callable, Dict, Hashable, List
 from sqlalchemy.sql import text
 from src import Session
+from src.cache.ttl_cache import TTLCache
+from src.monitoring.metrics import registry
 
 # from sqlalchemy import CursorResult
 
@@ -15,13 +17,95 @@ class NIBUserRepo(SQLReader):
     db = Session
     scriptPath = os.path.dirname(__file__) + os.sep + "scripts"
 
+    # User, role and office lookups shared by every repo in the process, keyed
+    # (lookup, user_id or role). Misses (no user, no roles) are cached too, for
+    # a shorter time, so a bad id cannot hammer Oracle either.
+    CACHE_TTL = float(os.environ.get("NIB_USER_CACHE_TTL", "300"))
+    NEGATIVE_CACHE_TTL = float(os.environ.get("NIB_USER_NEGATIVE_CACHE_TTL", "60"))
+    lookup_cache = TTLCache(
+        max_size=int(os.environ.get("NIB_USER_CACHE_MAX_ENTRIES", "4096")),
+        ttl=CACHE_TTL,
+    )
+    CACHE_LOOKUPS = registry.counter(
+        "query_nib_user_cache_lookups",
+        "NIB user, role and office lookups, by lookup and cache hit or miss.",
+        labels=("lookup", "result"),
+    )
+    CACHE_ENTRIES = registry.gauge("query_nib_user_cache_entries", "Entries held by the NIB user lookup cache.")
+    CACHE_ENTRIES.set_function(lambda: len(NIBUserRepo.lookup_cache))
+
     def find_by_user_id(self, user_id: int) -> NIBUserDTO:
-        return self.to_nib_user_dto(self._find_by_user_id(user_id=user_id))
+        user_dto = self._cached(
+            ("user", user_id),
+            lambda: self.to_nib_user_dto(self._find_by_user_id(user_id=user_id)),
+        )
+        # Callers get their own DTO, so they cannot change the cached one
+        return replace(user_dto) if user_dto else None
 
     def find_by_id(self, nib_user_id: int) -> NIBUserDTO:
         return self.to_nib_user_dto(self._find_by_id(nib_user_id=nib_user_id))
 
     def get_user_local_office(self, user_id: int) -> int:
+        return self._cached(
+            ("local_office", user_id), lambda: self._get_user_local_office(user_id=user_id)
+        )
+
+    def get_user_nib_number(self, user_id: int) -> int:
+        return self._cached(
+            ("nib_number", user_id), lambda: self._get_user_nib_number(user_id=user_id)
+        )
+
+    def get_role(self, role: str) -> str:
+        return self._cached(("role", role), lambda: self._get_role(role=role))
+
+    def get_user_roles(self, user_id: int) -> List[str]:
+        # Callers get their own list, so they cannot change the cached one
+        return list(self._cached(
+            ("roles", user_id), lambda: self._get_user_roles(user_id=user_id)
+        ))
+
+    @classmethod
+    def invalidate_user(cls, user_id: int) -> int:
+        """Forget everything cached for a user, e.g. after a role change; returns the entries dropped."""
+        user_key = cls._user_key(user_id)
+        return cls.lookup_cache.invalidate_where(
+            lambda key: key[0] != "role" and key[1] == user_key
+        )
+
+    @classmethod
+    def invalidate_role(cls, role: str) -> bool:
+        return cls.lookup_cache.invalidate(("role", role))
+
+    @classmethod
+    def clear_cache(cls) -> None:
+        cls.lookup_cache.clear()
+
+    @classmethod
+    def cache_stats(cls) -> Dict[str, Any]:
+        """Size, hits, misses, evictions and hit_rate of the lookup cache."""
+        return cls.lookup_cache.stats()
+
+    @staticmethod
+    def _user_key(user_id: Any) -> Hashable:
+        """The id as cached: callers pass both "42" and 42 for the same user."""
+        try:
+            return int(user_id)
+        except (TypeError, ValueError):
+            return user_id
+
+    def _cached(self, key: Hashable, load: Callable[[], Any]) -> Any:
+        if key[0] != "role":
+            key = (key[0], self._user_key(key[1]))
+        value = self.lookup_cache.get(key)
+        if value is not TTLCache.MISSING:
+            self.CACHE_LOOKUPS.labels(lookup=key[0], result="hit").inc()
+            return value
+        self.CACHE_LOOKUPS.labels(lookup=key[0], result="miss").inc()
+        value = load()
+        self.lookup_cache.set(key, value, ttl=self.CACHE_TTL if value else self.NEGATIVE_CACHE_TTL)
+        return value
+
+    def _get_user_local_office(self, user_id: int) -> int:
         local_office = None
         sqlFilePath = self.scriptPath + os.sep + "get_local_office.sql"
         script = self.getSQL(sqlFilePath)
@@ -30,7 +114,7 @@ class NIBUserRepo(SQLReader):
             local_office = result["local_office"]
         return local_office
 
-    def get_user_nib_number(self, user_id: int) -> int:
+    def _get_user_nib_number(self, user_id: int) -> int:
         nib_number = None
         sqlFilePath = self.scriptPath + os.sep + "get_nib_number.sql"
         script = self.getSQL(sqlFilePath)
@@ -39,7 +123,7 @@ class NIBUserRepo(SQLReader):
             nib_number = result["alt_identifier"]
         return nib_number
 
-    def get_role(self, role: str) -> str:
+    def _get_role(self, role: str) -> str:
         role_result = None
         sqlFilePath = self.scriptPath + os.sep + "get_role.sql"
         script = self.getSQL(sqlFilePath)
@@ -48,7 +132,7 @@ class NIBUserRepo(SQLReader):
             role_result = result["display_name"]
         return role_result
 
-    def get_user_roles(self, user_id: int) -> List[str]:
+    def _get_user_roles(self, user_id: int) -> List[str]:
         sqlFilePath = self.scriptPath + os.sep + "get_user_roles.sql"
         script = self.getSQL(sqlFilePath)
         results = self.db.execute(text(script), {"user_id": user_id})
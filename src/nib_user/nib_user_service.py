@@ -40,6 +40,6 @@ class NIBUserService:
         return True
     
     def validate_user_exist(self, user_id: int) -> bool:
-      if not self.nib_user_repo._find_by_user_id(user_id=user_id):
+      if not self.nib_user_repo.find_by_user_id(user_id=user_id):
           raise BadRequest(NIBUserExceptions.USER_DOESNT_EXIST.value)
       return True
\ No newline at end of file
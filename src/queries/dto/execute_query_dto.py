@@ -12,3 +12,6 @@ class ExecuteQueryDTO:
     query_params: Optional[dict] = None
     email: Optional[str] = None
     department: Optional[str] = None
+    page: int = 1
+    per_page: int = 50
+    cursor: Optional[str] = None
@@ -1,9 +1,14 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import Iterable, Optional
+from src.document_save.dto.export_pipeline_stats_dto import ExportPipelineStatsDTO
 
 
 @dataclass
 class QueryResultDTO:
     column_names: list
-    rows: list
+    rows: Iterable
     total_count: Optional[int] = 0
+    row_count: Optional[int] = None
+    byte_count: Optional[int] = None
+    pipeline_stats: Optional[ExportPipelineStatsDTO] = None
+    next_cursor: Optional[str] = None
@@ -10,6 +10,9 @@ class QueryException(Enum):
     QUERY_FILE_NOT_DELETED = "Query file not deleted"
     QUERY_FILE_NOT_AVAILABLE = "Query file not available"
     QUERY_PARAMS_NOT_SENT = "The query_params key was not sent"
+    QUERY_PARAMS_MISSING = "No value was sent for the query parameters"
+    QUERY_PARAM_INVALID = "A query parameter value does not match its declared type"
+    QUERY_CURSOR_INVALID = "The page cursor is not valid for this query"
     QUERY_USER_NOT_SENT = "The user_id key was not sent"
     QUERY_USER_EMAIL_DOESNT_EXIST = "Query user does not have an email"
     QUERY_USER_DOESENT_EXIST = "Query user does not exist"
@@ -0,0 +1,119 @@
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional
+from src.database.dto.order_column_dto import OrderColumnDTO
+
+# Bind names used by the wrapping statements; prefixed to stay clear of report binds
+LIMIT_BIND = "page_limit"
+OFFSET_BIND = "page_offset"
+_AFTER_BIND = "page_after_{}"
+
+
+def keyset_query(query: str, order_columns: List[OrderColumnDTO], after: bool) -> str:
+    """
+    Wrap a report script to seek past the previous page's last row.
+
+    The ordering columns must be result columns that are never NULL and
+    together identify a row, otherwise rows can repeat or be skipped.
+    """
+    order_by = ", ".join(
+        f"qy.{column.name} {'desc' if column.descending else 'asc'}" for column in order_columns
+    )
+    where = f"\n where {_seek_predicate(order_columns)}" if after else ""
+    return (
+        "select qy.* \n from (\n"
+        + query
+        + "\n ) qy"
+        + where
+        + f"\n order by {order_by}"
+        + f"\n fetch next :{LIMIT_BIND} rows only"
+    )
+
+
+def _seek_predicate(order_columns: List[OrderColumnDTO]) -> str:
+    # (a > :0) or (a = :0 and b < :1) ... handles mixed directions, unlike a row-value comparison
+    terms = []
+    for index, column in enumerate(order_columns):
+        equal = [f"qy.{previous.name} = :{_AFTER_BIND.format(position)}" for position, previous in enumerate(order_columns[:index])]
+        operator = "<" if column.descending else ">"
+        terms.append("(" + " and ".join(equal + [f"qy.{column.name} {operator} :{_AFTER_BIND.format(index)}"]) + ")")
+    return "(" + " or ".join(terms) + ")"
+
+
+def offset_query(query: str) -> str:
+    """Offset paging for scripts without declared ordering columns."""
+    return (
+        "select qy.* \n from (\n"
+        + query
+        + f"\n ) qy \n offset :{OFFSET_BIND} rows \n fetch next :{LIMIT_BIND} rows only"
+    )
+
+
+def count_query(query: str) -> str:
+    return "select count(*) from (\n" + query + "\n)"
+
+
+def keyset_params(after: Optional[list]) -> dict:
+    return {_AFTER_BIND.format(index): value for index, value in enumerate(after or [])}
+
+
+def row_key(row, column_names: List[str], order_columns: List[OrderColumnDTO]) -> list:
+    """Values of the ordering columns in a result row; names match case-insensitively."""
+    positions = {name.lower(): index for index, name in enumerate(column_names)}
+    try:
+        return [row[positions[column.name.lower()]] for column in order_columns]
+    except KeyError as missing:
+        raise ValueError(f"Ordering column {missing} is not in the query result")
+
+
+def cursor_fingerprint(query_id: int, query_params: dict, order_columns: List[OrderColumnDTO]) -> str:
+    """Ties a cursor to the report, parameters and ordering it was issued for."""
+    material = json.dumps(
+        [query_id, sorted((str(key), str(value)) for key, value in (query_params or {}).items()),
+         [(column.name.lower(), column.descending) for column in order_columns]]
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(fingerprint: str, values: list) -> str:
+    payload = json.dumps({"q": fingerprint, "v": [_encode_value(value) for value in values]}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, fingerprint: str) -> list:
+    """
+    Raises:
+        ValueError: if the token is malformed or was issued for another report or parameters
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        values = [_decode_value(value) for value in payload["v"]]
+    except (ValueError, KeyError, TypeError, AttributeError):
+        raise ValueError("Malformed cursor")
+    if payload.get("q") != fingerprint:
+        raise ValueError("Cursor does not belong to this query")
+    return values
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"t": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, Decimal):
+        return {"n": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if not isinstance(value, dict):
+        return value
+    if "t" in value:
+        return datetime.fromisoformat(value["t"])
+    if "d" in value:
+        return date.fromisoformat(value["d"])
+    return Decimal(value["n"])
@@ -1,7 +1,8 @@
 from sqlalchemy import *
-from src import engine, base
+from src import base
+from src.database.reflection import CachedReflection
 from config import OracleDB
 
-class QueryTable(base):
+class QueryTable(CachedReflection, base):
     __tablename__ = 'query_table'
-    __table_args__ = ({'schema': OracleDB().userName, 'autoload_with': engine, "extend_existing" : True})
\ No newline at end of file
+    __table_args__ = ({'schema': OracleDB().userName, "extend_existing" : True})
\ No newline at end of file
@@ -1,22 +1,37 @@
+import os
 from dataclasses import dataclass
 from src.queries.query_model import QueryTable
 from src.queries.dto.query_dto import QueryDTO
 from src.queries.dto.create_query_dto import CreateQueryDTO
 from src.queries.dto.query_result_dto import QueryResultDTO
 from src.queries.dto.execute_query_dto import ExecuteQueryDTO
-from sqlalchemy.sql import text
+from sqlalchemy.sql import text, bindparam
 from sqlalchemy.engine.cursor import CursorResult
-from typing import List
-from src import Session, engine
+from typing import List, Optional
+from src.database.sql_parameters import get_script_metadata
+from src.database.dto.sql_script_metadata_dto import SQLScriptMetadataDTO
+from src.database.dto.bound_parameters_dto import BoundParametersDTO
+from src.database.typed_parameters import INPUT_SIZES_OPTION
+from src.cache.ttl_cache import TTLCache
+from src.queries import keyset_pagination
+from src import Session, ORACLE_ARRAYSIZE
 
 @dataclass
 class QueryRepo:
     db = Session
+    # Preview totals per (query id, params, script text); an edited script is a new key
+    count_cache = TTLCache(
+        max_size=int(os.environ.get("QUERY_COUNT_CACHE_MAX_ENTRIES", "1024")),
+        ttl=float(os.environ.get("QUERY_COUNT_CACHE_TTL", "300")),
+    )
 
     def get_query(self, query_id: int) -> QueryDTO:
         query = self.db.query(QueryTable).filter(QueryTable.id == query_id).first()
         return self.to_query_dto(query)
 
+    def get_query_file_paths(self) -> List[str]:
+        return [file_path for (file_path,) in self.db.query(QueryTable.file_path).distinct()]
+
     def _get_query(self, query_id: int) -> QueryTable:
         query = QueryTable.query.filter(QueryTable.id == query_id).first()
         return query
@@ -35,45 +50,97 @@ class QueryRepo:
         self.db.commit()
         return self.to_query_dto(query)
 
-    def get_query_params(self, query: str) -> list:
-        params_name = []
-        if "Parameters:" in query:
-            comment: str = (query.split("Parameters:")[1].split("*/")[0]).splitlines()[
-                0
-            ]
-            params_name = comment.rsplit(",")
-        return params_name
-
-
-    def get_query_results(self, query: str, execute_dto: ExecuteQueryDTO) -> list:
-        paginated_query = self.paginate_query(
-            query=query, page=execute_dto.page, per_page=execute_dto.per_page
+
+    def get_query_results(
+        self,
+        query: str,
+        execute_dto: ExecuteQueryDTO,
+        bound: BoundParametersDTO = None,
+        after: Optional[list] = None,
+    ) -> QueryResultDTO:
+        """One preview page plus the report's total row count (see get_query_pages)."""
+        return self.get_query_pages(query=query, execute_dto=execute_dto, bound=bound, after=after)[0]
+
+    def get_query_pages(
+        self,
+        query: str,
+        execute_dto: ExecuteQueryDTO,
+        bound: BoundParametersDTO = None,
+        after: Optional[list] = None,
+        pages: int = 1,
+    ) -> List[QueryResultDTO]:
+        """
+        Up to `pages` consecutive preview pages, fetched in one statement.
+
+        Scripts with an 'Order By:' header are paged by keyset: the first page
+        seeks past `after` (the previous page's last ordering values) and each
+        page carries the next_cursor of the one after it. Other scripts fall
+        back to offset paging starting at execute_dto.page. The list stops
+        early at the end of the results but always holds the first page.
+        """
+        order_columns = get_script_metadata(query).order_columns
+        per_page = execute_dto.per_page
+        if order_columns:
+            page_query = keyset_pagination.keyset_query(query, order_columns, after=after is not None)
+            page_params = keyset_pagination.keyset_params(after)
+        else:
+            page_query = keyset_pagination.offset_query(query)
+            page_params = {keyset_pagination.OFFSET_BIND: (execute_dto.page - 1) * per_page}
+        # One extra row tells whether there is a page after the last one fetched
+        page_params[keyset_pagination.LIMIT_BIND] = per_page * pages + 1
+        statement, params, execution_options = self._typed_statement(page_query, execute_dto, bound)
+        results: CursorResult = self.db.execute(
+            statement, dict(params or {}, **page_params), execution_options=execution_options
         )
-        results: CursorResult = self.db.session.execute(
-            text(paginated_query), execute_dto.query_params
+        column_names = list(results.keys())
+        rows = results.fetchall()
+        total_count = self.count_query_results(query=query, execute_dto=execute_dto, bound=bound)
+        fingerprint = keyset_pagination.cursor_fingerprint(
+            execute_dto.query_id, execute_dto.query_params, order_columns
         )
-        return self.to_query_result_dto(results=results)
-
-    def paginate_query(self, query: str, page: int, per_page: int) -> str:
-        query = (
-            "select * \n from(\nselect qy.*, COUNT ( * ) OVER () total from ("
-            + query
-            + "\n )qy \n) \n offset  "
-            + str((page - 1) * per_page)
-            + " rows \nfetch next "
-            + str(per_page)
-            + " rows only"
+
+        query_results = []
+        for index in range(pages):
+            page_rows = rows[index * per_page:(index + 1) * per_page]
+            if index and not page_rows:
+                break
+            query_result = QueryResultDTO(
+                column_names=column_names,
+                rows=page_rows,
+                total_count=total_count,
+            )
+            query_results.append(query_result)
+            if len(rows) <= (index + 1) * per_page:
+                break
+            if order_columns:
+                last_key = keyset_pagination.row_key(page_rows[-1], column_names, order_columns)
+                query_result.next_cursor = keyset_pagination.encode_cursor(fingerprint, last_key)
+        return query_results
+
+    def count_query_results(
+        self, query: str, execute_dto: ExecuteQueryDTO, bound: BoundParametersDTO = None
+    ) -> int:
+        """Total rows of the report, counted once per count_cache TTL."""
+        key = (
+            execute_dto.query_id,
+            tuple(sorted((str(name), str(value)) for name, value in (execute_dto.query_params or {}).items())),
+            query,
         )
-        return query
+        total = self.count_cache.get(key)
+        if total is TTLCache.MISSING:
+            statement, params, execution_options = self._typed_statement(
+                keyset_pagination.count_query(query), execute_dto, bound
+            )
+            total = self.db.execute(statement, params, execution_options=execution_options).scalar()
+            self.count_cache.set(key, total)
+        return total
 
     def get_query_params(self, query: str) -> list:
-        params_name = []
-        if "Parameters:" in query:
-            comment: str = (query.split("Parameters:")[1].split("*/")[0]).splitlines()[
-                0
-            ]
-            params_name = comment.rsplit(",")
-        return params_name
+        """Declared 'label:name' entries from the script's Parameters: header."""
+        return get_script_metadata(query).declared_params
+
+    def get_query_metadata(self, query: str) -> SQLScriptMetadataDTO:
+        return get_script_metadata(query)
 
     def to_query_result_dto(self, results: CursorResult) -> QueryResultDTO:
         rows = results._fetchall_impl()
@@ -113,4 +180,38 @@ class QueryRepo:
             results: CursorResult = self.db.execute(
                 text(query), execute_dto.query_params
             )
-            return self.to_query_result_dto(results=results)
\ No newline at end of file
+            return self.to_query_result_dto(results=results)
+
+    def stream_query(
+        self, query: str, execute_dto: ExecuteQueryDTO, bound: BoundParametersDTO = None
+    ) -> QueryResultDTO:
+        """
+        Execute with a server-side cursor; rows are fetched ORACLE_ARRAYSIZE at a time as they are iterated.
+
+        When bound is given its coerced values are used and the declared types
+        are bound explicitly, so Oracle compares dates and numbers natively.
+        """
+        statement, params, execution_options = self._typed_statement(query, execute_dto, bound)
+        execution_options.update({"stream_results": True, "yield_per": ORACLE_ARRAYSIZE})
+        results: CursorResult = self.db.execute(
+            statement,
+            params,
+            execution_options=execution_options,
+        )
+        return QueryResultDTO(
+            column_names=list(results.keys()),
+            rows=results,
+        )
+
+    def _typed_statement(self, query: str, execute_dto: ExecuteQueryDTO, bound: BoundParametersDTO = None):
+        """text() statement, params and execution options, typed when bound is given."""
+        statement = text(query)
+        params = execute_dto.query_params
+        execution_options = {}
+        if bound:
+            statement = statement.bindparams(
+                *[bindparam(name, type_=bind_type) for name, bind_type in bound.bind_types.items()]
+            )
+            params = bound.values
+            execution_options[INPUT_SIZES_OPTION] = bound.input_sizes
+        return statement, params, execution_options
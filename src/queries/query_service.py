@@ -12,6 +12,11 @@ from werkzeug.datastructures import FileStorage
 from src.database.SQLReader import SQLReader
 from src.queries.dto.execute_query_dto import ExecuteQueryDTO
 from src.nib_user.nib_user_service import NIBUserService
+from src.database.typed_parameters import bind_parameters
+from src.database.dto.bound_parameters_dto import BoundParametersDTO
+from src.queries.dto.query_result_dto import QueryResultDTO
+from src.queries import keyset_pagination
+from src.cache.ttl_cache import TTLCache
 
 
 class QueryService:
@@ -19,6 +24,13 @@ class QueryService:
     base_path = FileRepo.path
     sql_reader = SQLReader()
     nib_user_service = NIBUserService()
+    # Pages fetched ahead of the one requested, in the same statement
+    PREFETCH_PAGES = int(os.environ.get("QUERY_PREFETCH_PAGES", "3"))
+    # Preview pages keyed by (query id, params, page size, cursor or page, script text)
+    page_cache = TTLCache(
+        max_size=int(os.environ.get("QUERY_PAGE_CACHE_MAX_ENTRIES", "256")),
+        ttl=float(os.environ.get("QUERY_PAGE_CACHE_TTL", "120")),
+    )
 
     def _allowed_extensions(self, query_upload: FileStorage) -> bool:
         extensions = {".sql"}
@@ -141,12 +153,48 @@ class QueryService:
         )
         return queries, total
 
-    def get_query_results(self, execute_dto: ExecuteQueryDTO) -> list:
+    def get_query_results(self, execute_dto: ExecuteQueryDTO) -> QueryResultDTO:
         query_dto: QueryDTO = self.get_query_by_id(query_id=execute_dto.query_id)
         if not os.path.isfile(query_dto.file_path):
             raise BadRequest(QueryException.QUERY_FILE_NOT_AVAILABLE.value)
         query = self.sql_reader.getSQL(scriptPath=query_dto.file_path)
-        return self.query_repo.get_query_results(query=query, execute_dto=execute_dto)
+        bound = self._bind_query_params(script=query, query_params=execute_dto.query_params)
+        after = self._decode_cursor(script=query, execute_dto=execute_dto)
+        keyset = bool(self.query_repo.get_query_metadata(query=query).order_columns)
+        position = execute_dto.cursor if keyset else execute_dto.page
+        cached_page = self.page_cache.get(self._page_key(query, execute_dto, position))
+        if cached_page is not TTLCache.MISSING:
+            return cached_page
+
+        pages = self.query_repo.get_query_pages(
+            query=query,
+            execute_dto=execute_dto,
+            bound=bound,
+            after=after,
+            pages=1 + self.PREFETCH_PAGES,
+        )
+        for page in pages:
+            self.page_cache.set(self._page_key(query, execute_dto, position), page)
+            position = page.next_cursor if keyset else position + 1
+        return pages[0]
+
+    def _page_key(self, script: str, execute_dto: ExecuteQueryDTO, position) -> tuple:
+        # The script text is part of the key, so an edited SQL file never serves old pages
+        params = tuple(sorted((str(name), str(value)) for name, value in (execute_dto.query_params or {}).items()))
+        return (execute_dto.query_id, params, execute_dto.per_page, position, script)
+
+    def _decode_cursor(self, script: str, execute_dto: ExecuteQueryDTO):
+        """Ordering values the page seeks past; None for the first page or offset-paged scripts."""
+        order_columns = self.query_repo.get_query_metadata(query=script).order_columns
+        if not execute_dto.cursor or not order_columns:
+            return None
+        fingerprint = keyset_pagination.cursor_fingerprint(
+            execute_dto.query_id, execute_dto.query_params, order_columns
+        )
+        try:
+            return keyset_pagination.decode_cursor(execute_dto.cursor, fingerprint)
+        except ValueError as error:
+            raise BadRequest(f"{QueryException.QUERY_CURSOR_INVALID.value}: {error}")
 
     def to_execute_query_dto(self, query: dict) -> ExecuteQueryDTO:
         execute_query_dto = ExecuteQueryDTO(
@@ -175,9 +223,32 @@ class QueryService:
         )
         return queries, total
     
+    def warm_sql_cache(self) -> int:
+        """Read every registered query script once so first runs skip the network drive."""
+        return self.sql_reader.warm(self.query_repo.get_query_file_paths())
+
     def execute_query_from_rabbitmq(self, query: ExecuteQueryDTO) -> list:
         if not os.path.isfile(query.file_path):
             raise BadRequest(QueryException.QUERY_FILE_NOT_AVAILABLE.value)
         valid_query = self.sql_reader.getSQL(scriptPath=query.file_path)
-        return self.query_repo.execute_query(query=valid_query, execute_dto=query)
+        bound = self._bind_query_params(script=valid_query, query_params=query.query_params)
+        return self.query_repo.stream_query(query=valid_query, execute_dto=query, bound=bound)
+
+    def _bind_query_params(self, script: str, query_params: dict) -> BoundParametersDTO:
+        """Fail before reaching Oracle when a bind has no value or a value doesn't fit its declared type."""
+        metadata = self.query_repo.get_query_metadata(query=script)
+        if metadata.declared_params and (metadata.undeclared_names or metadata.unused_names):
+            # A header out of step with the SQL leaves binds untyped; worth fixing, not failing the run
+            print(
+                f"Script parameters do not match its header: undeclared binds {metadata.undeclared_names}, "
+                f"declared but unused {metadata.unused_names}"
+            )
+        supplied = {name.lower() for name in (query_params or {})}
+        missing = [name for name in metadata.bind_names if name.lower() not in supplied]
+        if missing:
+            raise BadRequest(f"{QueryException.QUERY_PARAMS_MISSING.value}: {', '.join(missing)}")
+        try:
+            return bind_parameters(metadata=metadata, query_params=query_params)
+        except ValueError as error:
+            raise BadRequest(f"{QueryException.QUERY_PARAM_INVALID.value}: {error}")
     
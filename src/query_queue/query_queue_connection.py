@@ -3,13 +3,19 @@ from config import QueueService, Queue
 
 
 class QueryQueueConnection:
-    credentials = pika.PlainCredentials(QueueService.username, QueueService.password)
-    connection_params = pika.ConnectionParameters(
-        host=QueueService.host,
-        port=QueueService.port,
-        credentials=credentials,
-        heartbeat=0,
-    )
-    connection = pika.BlockingConnection(parameters=connection_params)
-    channel = connection.channel()
-    print(" [x] Sent 'Hello World!'")
+    """
+    Broker connection and channel. Connects on instantiation, so every worker
+    process opens its own connection instead of sharing one made at import.
+    """
+
+    def __init__(self):
+        credentials = pika.PlainCredentials(QueueService.username, QueueService.password)
+        self.connection_params = pika.ConnectionParameters(
+            host=QueueService.host,
+            port=QueueService.port,
+            credentials=credentials,
+            heartbeat=0,
+        )
+        self.connection = pika.BlockingConnection(parameters=self.connection_params)
+        self.channel = self.connection.channel()
+        print(" [x] Sent 'Hello World!'")
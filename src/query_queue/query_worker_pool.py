@@ -0,0 +1,57 @@
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+
+class QueryWorkerPool:
+    """
+    Runs report messages on a fixed number of executor threads so the
+    connection thread keeps servicing the broker while Oracle works.
+
+    pika channels are not thread safe, so workers never touch the channel
+    directly: acks and publishes are handed back to the connection thread
+    with add_callback_threadsafe. The handler owns its database unit of
+    work (see session_scope); the scoped Session is per worker thread.
+    """
+
+    WORKER_THREADS = int(os.environ.get("QUERY_WORKER_THREADS", "1"))
+
+    def __init__(self, connection, channel, handler, workers: int = None):
+        """
+        Args:
+            connection: pika BlockingConnection that owns the channel
+            channel: Channel the messages are consumed from
+            handler: Callable(body, publish) that processes one message
+            workers: Number of executor threads (defaults to QUERY_WORKER_THREADS)
+        """
+        self.connection = connection
+        self.channel = channel
+        self.handler = handler
+        self.workers = workers or self.WORKER_THREADS
+        self.executor = ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix="query-worker"
+        )
+
+    def on_message(self, ch, method, properties, body):
+        """pika on_message_callback: hand the message to a worker thread."""
+        self.executor.submit(self._process, method.delivery_tag, body)
+
+    def publish(self, **kwargs):
+        """basic_publish from a worker thread, run on the connection thread."""
+        self._threadsafe(self.channel.basic_publish, **kwargs)
+
+    def shutdown(self):
+        """Wait for in-flight messages, then deliver their pending acks."""
+        self.executor.shutdown(wait=True)
+        if self.connection.is_open:
+            self.connection.process_data_events(time_limit=0)
+
+    def _process(self, delivery_tag, body):
+        try:
+            self.handler(body, publish=self.publish)
+        finally:
+            self._threadsafe(self.channel.basic_ack, delivery_tag=delivery_tag)
+
+    def _threadsafe(self, func, **kwargs):
+        self.connection.add_callback_threadsafe(functools.partial(func, **kwargs))
@@ -0,0 +1,93 @@
+import hashlib
+import hmac
+import json
+import os
+import threading
+from typing import Dict, Optional
+
+# Message fields that identify a person; replaced by keyed hashes in the capture
+_PII_FIELDS = ("email_address", "first_name")
+
+
+class TrafficCapture:
+    """
+    Records every consumed report message for load tests and replay.
+
+    Enabled by QUERY_CAPTURE_PATH. Each message appends one JSON line to that
+    file: when the consumer picked it up, status, duration, per-stage timings,
+    row count, and the message body with personal data removed. Email
+    address, first name and every query parameter value become HMAC-SHA256
+    hashes keyed by QUERY_CAPTURE_SALT, so equal values still hash equal
+    (repeat requests stay visible) but cannot be read back. user_id becomes
+    a stable pseudonymous number. Use benchmarks/replay_traffic.py to replay
+    a capture.
+
+    Without QUERY_CAPTURE_SALT the hashes would be unkeyed and easy to
+    brute-force, so capture stays off until a secret salt is set.
+    """
+
+    PATH = os.environ.get("QUERY_CAPTURE_PATH", "")
+    SALT = os.environ.get("QUERY_CAPTURE_SALT", "")
+
+    _lock = threading.Lock()
+    _warned = False
+
+    @classmethod
+    def enabled(cls) -> bool:
+        if cls.PATH and not cls.SALT:
+            if not cls._warned:
+                cls._warned = True
+                print(" [!] QUERY_CAPTURE_PATH is set but QUERY_CAPTURE_SALT is not; traffic capture disabled")
+            return False
+        return bool(cls.PATH)
+
+    @classmethod
+    def hash_value(cls, value) -> str:
+        digest = hmac.new(cls.SALT.encode("utf-8"), json.dumps(value, default=str).encode("utf-8"), hashlib.sha256)
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def sanitize(cls, body) -> Optional[dict]:
+        """The message with personal data hashed, or None if it is not a JSON object."""
+        try:
+            message = json.loads(body)
+        except (TypeError, ValueError):
+            return None
+        if not isinstance(message, dict):
+            return None
+        for field in _PII_FIELDS:
+            if message.get(field) is not None:
+                message[field] = cls.hash_value(message[field])
+        if message.get("user_id") is not None:
+            message["user_id"] = int(cls.hash_value(message["user_id"])[:8], 16)
+        if isinstance(message.get("query_params"), dict):
+            message["query_params"] = {
+                name: cls.hash_value(value) for name, value in message["query_params"].items()
+            }
+        return message
+
+    @classmethod
+    def record(cls, body, received_at: float, status: str, seconds: float,
+               stages: Dict[str, float], row_count: Optional[int] = None) -> None:
+        """Append one message to the capture; failures are printed, never raised."""
+        entry = {
+            "received_at": round(received_at, 6),
+            "status": status,
+            "seconds": round(seconds, 6),
+            "stages": {stage: round(value, 6) for stage, value in stages.items()},
+            "row_count": row_count,
+            "body_bytes": len(body),
+            "message": cls.sanitize(body),
+            "pid": os.getpid(),
+        }
+        line = (json.dumps(entry, default=str) + "\n").encode("utf-8")
+        try:
+            with cls._lock:
+                # One O_APPEND write per line keeps processes sharing the file from interleaving
+                descriptor = os.open(cls.PATH, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o600)
+                try:
+                    os.write(descriptor, line)
+                finally:
+                    os.close(descriptor)
+        except OSError as e:
+            print(f"Failed to capture message: {e}")
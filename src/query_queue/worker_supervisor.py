@@ -0,0 +1,95 @@
+import multiprocessing
+import os
+import signal
+import time
+
+
+class WorkerSupervisor:
+    """
+    Forks a fixed number of consumer processes and keeps them running.
+
+    Each child runs `target` after fork and is expected to open its own broker
+    connection and database engine. Children that exit unexpectedly are
+    restarted; on SIGTERM/SIGINT every child is sent SIGTERM and given
+    SHUTDOWN_TIMEOUT seconds to finish its in-flight messages.
+    """
+
+    PROCESSES = int(os.environ.get("QUERY_WORKER_PROCESSES", "1"))
+    SHUTDOWN_TIMEOUT = int(os.environ.get("QUERY_WORKER_SHUTDOWN_TIMEOUT", "600"))
+    RESTART_DELAY = 5  # seconds before restarting a child that crashed on start
+    POLL_INTERVAL = 1  # seconds between liveness checks
+
+    def __init__(self, target, processes: int = None):
+        """
+        Args:
+            target: Callable run in each child process
+            processes: Number of children (defaults to QUERY_WORKER_PROCESSES)
+        """
+        self.target = target
+        self.processes = processes or self.PROCESSES
+        self.context = multiprocessing.get_context("fork")
+        self.children = {}
+        self.started_at = {}
+        self.stopping = False
+
+    def run(self) -> None:
+        """Start the children and supervise them until asked to stop."""
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        for slot in range(self.processes):
+            self._spawn(slot)
+        print(f" [*] Supervisor {os.getpid()} started {self.processes} consumer processes")
+
+        while not self.stopping:
+            for slot, process in list(self.children.items()):
+                if not process.is_alive() and not self.stopping:
+                    self._restart(slot, process)
+            time.sleep(self.POLL_INTERVAL)
+
+        self._drain()
+
+    def _spawn(self, slot: int) -> None:
+        process = self.context.Process(
+            target=self._child_main,
+            args=(slot,),
+            name=f"query-consumer-{slot}",
+        )
+        process.start()
+        self.children[slot] = process
+        self.started_at[slot] = time.monotonic()
+
+    def _restart(self, slot: int, process) -> None:
+        print(f" [!] Consumer {process.name} (pid {process.pid}) exited with code {process.exitcode}, restarting")
+        process.join()
+        # Avoid a tight fork loop when a child dies during startup (e.g. broker down)
+        if time.monotonic() - self.started_at[slot] < self.RESTART_DELAY:
+            time.sleep(self.RESTART_DELAY)
+        if not self.stopping:
+            self._spawn(slot)
+
+    def _child_main(self, slot: int) -> None:
+        # The supervisor forwards SIGTERM; ignore the terminal's SIGINT so a
+        # CTRL+C drains children instead of interrupting a running report
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        # Lets per-process resources (e.g. the metrics port) differ by slot
+        os.environ["QUERY_WORKER_SLOT"] = str(slot)
+        self.target()
+
+    def _request_stop(self, signum, frame) -> None:
+        self.stopping = True
+
+    def _drain(self) -> None:
+        print(" [*] Supervisor stopping, draining consumer processes")
+        for process in self.children.values():
+            if process.is_alive():
+                os.kill(process.pid, signal.SIGTERM)
+
+        deadline = time.monotonic() + self.SHUTDOWN_TIMEOUT
+        for process in self.children.values():
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                print(f" [!] Consumer {process.name} (pid {process.pid}) did not stop in time, killing")
+                process.kill()
+                process.join()
@@ -0,0 +1,85 @@
+import unittest
+import sys
+import os
+import json
+import requests
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from benchmarks.in_memory_broker import InMemoryConnection
+from benchmarks.stub_mail_server import StubMailServer
+from benchmarks.replay_traffic import schedule, simulate
+
+
+class TestInMemoryBroker(unittest.TestCase):
+    """Test cases for the benchmark's in-memory pika stand-in"""
+
+    def test_delivers_queued_messages_in_order(self):
+        """Test that start_consuming delivers every queued message and returns when empty"""
+        channel = InMemoryConnection().channel
+        received = []
+
+        def on_message(ch, method, properties, body):
+            received.append(body)
+            ch.basic_ack(delivery_tag=method.delivery_tag)
+
+        channel.basic_consume(queue="reports", on_message_callback=on_message)
+        for body in ("a", "b", "c"):
+            channel.enqueue("reports", body)
+        channel.start_consuming()
+
+        self.assertEqual(received, ["a", "b", "c"])
+        self.assertEqual(channel.acked, {1, 2, 3})
+
+    def test_publish_is_recorded(self):
+        """Test that publishes to queues without a consumer are only recorded"""
+        channel = InMemoryConnection().channel
+
+        channel.basic_publish(exchange="ex", routing_key="cleanup", body="{}")
+
+        self.assertEqual(channel.published["cleanup"], [("{}", None)])
+        self.assertFalse(channel.queues["cleanup"])
+
+
+class TestStubMailServer(unittest.TestCase):
+    """Test cases for the benchmark's stub mail API"""
+
+    def test_counts_requests_and_recipients(self):
+        """Test that posted emails are accepted and their recipients counted"""
+        server = StubMailServer().start()
+        self.addCleanup(server.stop)
+
+        response = requests.post(f"{server.url}/email", data=json.dumps({"email_to": [{}, {}]}), timeout=5)
+
+        self.assertTrue(response.ok)
+        self.assertEqual(server.requests, 1)
+        self.assertEqual(server.recipients, 2)
+
+
+class TestReplayTraffic(unittest.TestCase):
+    """Test cases for replaying a traffic capture"""
+
+    def setUp(self):
+        self.entries = [
+            {"received_at": 100.0, "seconds": 0.02, "message": {}},
+            {"received_at": 100.5, "seconds": 0.02, "message": {}},
+            {"received_at": 102.0, "seconds": 0.02, "message": {}},
+        ]
+
+    def test_schedule_scales_spacing(self):
+        """Test that captured spacing is divided by the speed and max removes it"""
+        self.assertEqual(schedule(self.entries, 2.0), [0.0, 0.25, 1.0])
+        self.assertEqual(schedule(self.entries, 0.0), [0.0, 0.0, 0.0])
+
+    def test_simulate_queues_behind_busy_workers(self):
+        """Test that messages arriving together wait for a single worker"""
+        result = simulate(self.entries, [0.0, 0.0, 0.0], threads=1)
+
+        self.assertEqual(result["messages"], 3)
+        self.assertGreaterEqual(result["max_backlog"], 2)
+        self.assertGreaterEqual(result["latency_p99_ms"], 55)
+
+
+if __name__ == '__main__':
+    unittest.main()
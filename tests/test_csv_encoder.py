@@ -0,0 +1,134 @@
+import unittest
+import csv
+import io
+import os
+import sys
+from collections import namedtuple
+from datetime import date, datetime
+from decimal import Decimal
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.document_save.csv_encoder import CsvEncoder
+from src.document_save.dto.csv_format_dto import CsvFormatDTO
+
+DbType = namedtuple("DbType", ["name"])
+NUMBER = DbType("DB_TYPE_NUMBER")
+DATE = DbType("DB_TYPE_DATE")
+VARCHAR = DbType("DB_TYPE_VARCHAR")
+
+ROWS = [
+    (1, "plain", 1.5, Decimal("12.30"), datetime(2024, 1, 31, 8, 5), None),
+    (-2, 'has "quotes"', 0.1, Decimal("-0.001"), datetime(2024, 2, 1), ""),
+    (3, "comma, here", None, None, None, "multi\nline"),
+    (None, "", 1e20, Decimal("1E+3"), datetime(2024, 3, 1, 0, 0, 0, 500), " padded "),
+]
+
+
+def _description(*types):
+    return [(f"COL{index}", type_code, None, None, None, None, True) for index, type_code in enumerate(types)]
+
+
+class TestCsvEncoder(unittest.TestCase):
+    """Test cases for CsvEncoder"""
+
+    def encode(self, rows, description=None, csv_format=None, column_count=None):
+        file = io.StringIO(newline='')
+        encoder = CsvEncoder(file, column_count=column_count or len(rows[0]), description=description,
+                             csv_format=csv_format or CsvFormatDTO())
+        encoder.write_header([f"COL{index}" for index in range(encoder.column_count)])
+        count = encoder.write_rows(rows)
+        encoder.flush()
+        return file.getvalue(), count
+
+    def expected(self, rows, **dialect):
+        file = io.StringIO(newline='')
+        writer = csv.writer(file, **dialect)
+        writer.writerow([f"COL{index}" for index in range(len(rows[0]))])
+        writer.writerows(rows)
+        return file.getvalue()
+
+    def test_default_output_matches_csv_writer(self):
+        """Test that typed and untyped columns encode exactly like csv.writer"""
+        typed = _description(NUMBER, VARCHAR, NUMBER, NUMBER, DATE, VARCHAR)
+
+        for description in (None, typed):
+            output, count = self.encode(ROWS, description=description)
+            self.assertEqual(output, self.expected(ROWS))
+            self.assertEqual(count, len(ROWS))
+
+    def test_quoting_modes_match_csv_writer(self):
+        """Test that all and nonnumeric quoting match the csv module's constants"""
+        rows = [row[:4] + (True,) for row in ROWS]
+        typed = _description(NUMBER, VARCHAR, NUMBER, NUMBER, None)
+
+        for quoting, constant in (("all", csv.QUOTE_ALL), ("nonnumeric", csv.QUOTE_NONNUMERIC)):
+            for description in (None, typed):
+                output, _ = self.encode(rows, description=description, csv_format=CsvFormatDTO(quoting=quoting))
+                self.assertEqual(output, self.expected(rows, quoting=constant), f"{quoting} {description}")
+
+    def test_single_empty_column_is_quoted(self):
+        """Test that a lone empty field is written as "" rather than a blank line"""
+        rows = [("",), (None,), ("x",)]
+
+        output, _ = self.encode(rows)
+
+        self.assertEqual(output, self.expected(rows))
+
+    def test_custom_dialect_round_trips(self):
+        """Test that a semicolon delimiter and LF line endings are read back by csv.reader"""
+        csv_format = CsvFormatDTO(delimiter=";", line_terminator="\n")
+        rows = [(1, "a;b", "c"), (2, 'd"e', "f\ng")]
+
+        output, _ = self.encode(rows, csv_format=csv_format)
+
+        self.assertNotIn("\r", output)
+        read = list(csv.reader(io.StringIO(output, newline=''), delimiter=";"))
+        self.assertEqual(read[1:], [["1", "a;b", "c"], ["2", 'd"e', "f\ng"]])
+
+    def test_date_and_number_formats(self):
+        """Test that date, datetime and number formats apply to typed and untyped columns"""
+        csv_format = CsvFormatDTO(date_format="%d/%m/%Y", datetime_format="%Y-%m-%d %H:%M", number_format=",.2f")
+        rows = [(1234.5, datetime(2024, 1, 31, 8, 5), date(2024, 2, 1), None)]
+
+        typed, _ = self.encode(rows, description=_description(NUMBER, DATE, DATE, NUMBER), csv_format=csv_format)
+        untyped, _ = self.encode(rows, csv_format=csv_format)
+
+        for output in (typed, untyped):
+            self.assertEqual(output.splitlines()[1], '"1,234.50",2024-01-31 08:05,01/02/2024,')
+
+    def test_buffer_is_written_in_chunks(self):
+        """Test that rows reach the file once the buffer fills, and the rest on flush"""
+        file = io.StringIO(newline='')
+        writes = []
+        original_write = file.write
+        file.write = lambda text: writes.append(text) or original_write(text)
+
+        with patch.object(CsvEncoder, 'BUFFER_SIZE', 100):
+            encoder = CsvEncoder(file, column_count=2, csv_format=CsvFormatDTO())
+            encoder.write_rows((number, "x" * 10) for number in range(50))
+            self.assertTrue(writes)
+            self.assertTrue(all(len(text) >= 100 for text in writes))
+            encoder.flush()
+
+        self.assertEqual(file.getvalue(), "".join(f"{number},{'x' * 10}\r\n" for number in range(50)))
+
+    def test_default_format_from_environment(self):
+        """Test that CSV_* environment variables set the default format"""
+        environment = {"CSV_DELIMITER": "|", "CSV_QUOTING": "ALL", "CSV_LINE_TERMINATOR": "lf",
+                       "CSV_NUMBER_FORMAT": ".1f"}
+        with patch.dict(os.environ, environment):
+            csv_format = CsvEncoder.default_format()
+
+        self.assertEqual(csv_format, CsvFormatDTO(delimiter="|", quoting="all", line_terminator="\n", number_format=".1f"))
+
+    def test_invalid_quoting_is_rejected(self):
+        """Test that an unknown quoting mode raises ValueError"""
+        with self.assertRaises(ValueError):
+            CsvEncoder(io.StringIO(), column_count=1, csv_format=CsvFormatDTO(quoting="sometimes"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import csv
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.document_save.document_save_service import DocumentSaveService
+from src.document_save.dto.csv_format_dto import CsvFormatDTO
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+from src.queries.dto.query_result_dto import QueryResultDTO
+
+
+class TestDocumentSaveService(unittest.TestCase):
+    """Test cases for DocumentSaveService"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        patcher = patch.object(DocumentSaveService, 'base_path', self.temp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(self.temp_dir.cleanup)
+        self.query = ExecuteQueryDTO(
+            first_name="john",
+            query_id=423,
+            name="Active Employer Email",
+            file_path="ActiveEmployerEmail.sql",
+            user_id=31688,
+        )
+
+    def test_streamed_rows_are_written_and_counted(self):
+        """Test that a row iterator is written in full with row and byte counts"""
+        rows = ((number, f"employer-{number}") for number in range(1000))
+        results = QueryResultDTO(column_names=["ID", "NAME"], rows=rows)
+
+        save_path = DocumentSaveService().save_to_csv(results=results, query=self.query)
+
+        with open(save_path, newline='', encoding='utf-8') as file:
+            written = list(csv.reader(file))
+        self.assertEqual(written[0], ["ID", "NAME"])
+        self.assertEqual(written[-1], ["999", "employer-999"])
+        self.assertEqual(results.row_count, 1000)
+        self.assertEqual(results.byte_count, os.path.getsize(save_path))
+
+    def test_pipelined_export_mode(self):
+        """Test that pipelined mode writes the same file and records pipeline stats"""
+        rows = [(number, f"employer-{number}") for number in range(1000)]
+        results = QueryResultDTO(column_names=["ID", "NAME"], rows=iter(rows))
+
+        with patch.object(DocumentSaveService, 'export_mode', 'pipelined'):
+            save_path = DocumentSaveService().save_to_csv(results=results, query=self.query)
+
+        with open(save_path, newline='', encoding='utf-8') as file:
+            written = list(csv.reader(file))
+        self.assertEqual(len(written), 1001)
+        self.assertEqual(results.row_count, 1000)
+        self.assertIsNotNone(results.pipeline_stats)
+
+    def test_csv_format_from_cursor_description(self):
+        """Test that column types come from the cursor description and csv_format is applied"""
+        class Rows(list):
+            pass
+
+        number_type = type("DbType", (), {"name": "DB_TYPE_NUMBER"})()
+        rows = Rows([(1234.5, "a;b"), (None, "c")])
+        rows.cursor = type("Cursor", (), {"description": [("AMOUNT", number_type), ("NAME", None)]})()
+        results = QueryResultDTO(column_names=["AMOUNT", "NAME"], rows=rows)
+        csv_format = CsvFormatDTO(delimiter=";", line_terminator="\n", number_format=".2f")
+
+        save_path = DocumentSaveService().save_to_csv(results=results, query=self.query, csv_format=csv_format)
+
+        with open(save_path, newline='', encoding='utf-8') as file:
+            self.assertEqual(file.read(), 'AMOUNT;NAME\n1234.50;"a;b"\n;c\n')
+        self.assertEqual(results.row_count, 2)
+
+    def test_partial_file_removed_when_stream_fails(self):
+        """Test that a failed fetch does not leave a truncated report"""
+        def failing_rows():
+            yield (1, "first")
+            raise RuntimeError("ORA-01555: snapshot too old")
+
+        results = QueryResultDTO(column_names=["ID", "NAME"], rows=failing_rows())
+
+        with self.assertRaises(RuntimeError):
+            DocumentSaveService().save_to_csv(results=results, query=self.query)
+
+        report_dir = os.path.join(self.temp_dir.name, 'query_results', '31688', '423')
+        self.assertEqual(os.listdir(report_dir), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+import unittest
+import threading
+from unittest.mock import patch, MagicMock
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import requests
+from src.email.circuit_breaker import CircuitBreaker
+from src.email.email_dispatcher import EmailDispatcher
+from src.email.email_service import EmailService
+from src.email.dto.email_request_dto import EmailRequestDTO
+from src.email.dto.recipient_dto import RecipientDTO
+
+
+def make_request() -> EmailRequestDTO:
+    return EmailRequestDTO(
+        email_from="alerts@nib-bahamas.com",
+        email_to=[RecipientDTO(email_address="john@example.com", data={"link": "x"})],
+        subject="NIB Query Tool: Query Report Download",
+        template_id=2,
+    )
+
+
+class TestEmailService(unittest.TestCase):
+    """Test cases for EmailService delivery"""
+
+    def setUp(self):
+        self.session = MagicMock()
+        for patcher in (
+            patch.object(EmailService, 'get_session', return_value=self.session),
+            patch.object(EmailService, 'circuit_breaker', CircuitBreaker(failure_threshold=2, reset_timeout=60)),
+            patch.object(EmailService, 'RETRY_BACKOFF', 0),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_post_uses_timeouts(self):
+        """Test that every request has connect and read timeouts"""
+        self.session.post.return_value = MagicMock(ok=True)
+
+        self.assertTrue(EmailService().send_request(make_request()))
+
+        timeout = self.session.post.call_args.kwargs['timeout']
+        self.assertEqual(timeout, (EmailService.CONNECT_TIMEOUT, EmailService.READ_TIMEOUT))
+
+    def test_connection_errors_are_retried(self):
+        """Test bounded retries on connection failures"""
+        self.session.post.side_effect = [
+            requests.exceptions.ConnectionError("refused"),
+            MagicMock(ok=True),
+        ]
+
+        self.assertTrue(EmailService().send_request(make_request()))
+        self.assertEqual(self.session.post.call_count, 2)
+
+    def test_read_timeout_not_retried(self):
+        """Test that a read timeout is not resent, to avoid duplicate mail"""
+        self.session.post.side_effect = requests.exceptions.ReadTimeout("slow")
+
+        self.assertFalse(EmailService().send_request(make_request()))
+        self.assertEqual(self.session.post.call_count, 1)
+
+    def test_client_error_not_retried(self):
+        """Test that a rejected request is not retried"""
+        self.session.post.return_value = MagicMock(ok=False, status_code=400, text="bad template")
+
+        self.assertFalse(EmailService().send_request(make_request()))
+        self.assertEqual(self.session.post.call_count, 1)
+        self.assertFalse(EmailService.circuit_breaker.is_open)
+
+    def test_circuit_opens_after_repeated_failures(self):
+        """Test that sends are skipped once the circuit is open"""
+        self.session.post.return_value = MagicMock(ok=False, status_code=503, text="down")
+
+        EmailService().send_request(make_request())
+        EmailService().send_request(make_request())
+        calls = self.session.post.call_count
+
+        self.assertTrue(EmailService.circuit_breaker.is_open)
+        self.assertFalse(EmailService().send_request(make_request()))
+        self.assertEqual(self.session.post.call_count, calls)
+
+
+class TestCircuitBreaker(unittest.TestCase):
+    """Test cases for CircuitBreaker"""
+
+    def test_half_open_allows_single_trial(self):
+        """Test that after the cooldown exactly one trial call is allowed"""
+        breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record_success()
+        self.assertTrue(breaker.allow())
+
+
+class TestEmailDispatcher(unittest.TestCase):
+    """Test cases for EmailDispatcher"""
+
+    def test_submit_returns_before_send_completes(self):
+        """Test that the consumer is not blocked by a slow mail API"""
+        release = threading.Event()
+        sent = []
+        sender = MagicMock()
+        sender.circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        sender.send_request.side_effect = lambda request: (release.wait(5), sent.append(request))
+
+        EmailDispatcher.submit(sender=sender, request=make_request())
+        self.assertEqual(sent, [])
+
+        release.set()
+        EmailDispatcher.shutdown(timeout=5)
+        self.assertEqual(len(sent), 1)
+
+    def test_shutdown_with_full_queue_times_out(self):
+        """Test that shutdown returns after its timeout when the queue cannot take the stop signal"""
+        release = threading.Event()
+        sender = MagicMock()
+        sender.circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        sender.send_request.side_effect = lambda request: release.wait(5)
+
+        with patch.object(EmailDispatcher, 'QUEUE_SIZE', 1):
+            EmailDispatcher.submit(sender=sender, request=make_request())
+            EmailDispatcher.submit(sender=sender, request=make_request())
+            finished = threading.Event()
+            threading.Thread(target=lambda: (EmailDispatcher.shutdown(timeout=0.2), finished.set())).start()
+            self.assertTrue(finished.wait(2))
+
+        release.set()
+        EmailDispatcher.shutdown(timeout=5)
+        self.assertEqual(EmailDispatcher.pending(), 0)
+
+    def test_batch_window_merges_deliveries(self):
+        """Test that deliveries within the window go out as one request"""
+        sent = []
+        sender = MagicMock()
+        sender.circuit_breaker = CircuitBreaker(failure_threshold=5, reset_timeout=60)
+        sender.send_request.side_effect = sent.append
+
+        with patch.object(EmailDispatcher, 'BATCH_WINDOW', 0.2):
+            for number in range(3):
+                request = make_request()
+                request.email_to = [RecipientDTO(email_address=f"user{number}@example.com", data={"link": number})]
+                EmailDispatcher.submit(sender=sender, request=request)
+            EmailDispatcher.shutdown(timeout=5)
+
+        self.assertEqual(len(sent), 1)
+        self.assertEqual([recipient.data["link"] for recipient in sent[0].email_to], [0, 1, 2])
+
+    def test_merge_keeps_templates_apart_and_caps_size(self):
+        """Test grouping per template and the recipient cap"""
+        sender = MagicMock()
+        batch = []
+        for number in range(5):
+            request = make_request()
+            request.email_to = [RecipientDTO(email_address=f"user{number}@example.com", data={"n": number})]
+            request.template_id = 2 if number < 4 else 1
+            batch.append((sender, request))
+
+        with patch.object(EmailDispatcher, 'BATCH_SIZE', 3):
+            merged = EmailDispatcher.merge(batch)
+
+        self.assertEqual(
+            [(request.template_id, [recipient.data["n"] for recipient in request.email_to]) for _, request in merged],
+            [(2, [0, 1, 2]), (2, [3]), (1, [4])]
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import unittest
+import sys
+import os
+import tempfile
+import threading
+import sqlalchemy as sa
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src import pool_metrics, session, session_scope
+from src.database.engine_factory import EngineFactory, PoolMetrics, TimedQueuePool
+from src.monitoring.metrics import registry
+
+
+class TestEngineFactory(unittest.TestCase):
+    """Test cases for EngineFactory pool settings and metrics"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        options = EngineFactory.pool_options()
+        options.update(pool_size=1, max_overflow=0, pool_timeout=0.2)
+        self.engine = sa.create_engine(f"sqlite:///{self.directory.name}/test.db", **options)
+        EngineFactory.instrument(self.engine)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_pool_options(self):
+        """Test that the engine uses the timed pool with pre-ping and recycle"""
+        self.assertIsInstance(self.engine.pool, TimedQueuePool)
+        self.assertEqual(self.engine.pool._pre_ping, EngineFactory.POOL_PRE_PING)
+        self.assertEqual(self.engine.pool._recycle, EngineFactory.POOL_RECYCLE)
+        self.assertEqual(EngineFactory.pool_options()["query_cache_size"], EngineFactory.QUERY_CACHE_SIZE)
+
+    def test_checkouts_counted(self):
+        """Test that checkouts and new connections are recorded"""
+        for _ in range(3):
+            with self.engine.connect() as connection:
+                connection.execute(sa.text("select 1"))
+        metrics = EngineFactory.pool_metrics(self.engine)
+        self.assertEqual(metrics.checkouts, 3)
+        self.assertEqual(metrics.connects, 1)
+        self.assertEqual(metrics.waits, 0)
+        self.assertEqual(metrics.checked_out, 0)
+
+    def test_pool_metrics_exported(self):
+        """Test that checkouts reach the metrics registry and gauges read the watched pool"""
+        checkouts = PoolMetrics.CHECKOUT_DURATION._default().snapshot()[0]
+        PoolMetrics.watch(lambda: EngineFactory.pool_metrics(self.engine))
+        self.addCleanup(PoolMetrics.watch, pool_metrics)
+        held = self.engine.connect()
+        try:
+            text = registry.render()
+        finally:
+            held.close()
+
+        self.assertEqual(sum(PoolMetrics.CHECKOUT_DURATION._default().snapshot()[0]), sum(checkouts) + 1)
+        self.assertIn("query_db_pool_checked_out 1", text)
+        self.assertIn("query_db_pool_size 1", text)
+        self.assertIn("query_db_pool_checkout_duration_seconds_count", text)
+
+    def test_wait_and_timeout_recorded(self):
+        """Test that a checkout on an exhausted pool counts as a wait and a timeout"""
+        held = self.engine.connect()
+        try:
+            with self.assertRaises(sa.exc.TimeoutError):
+                self.engine.connect()
+            metrics = EngineFactory.pool_metrics(self.engine)
+            self.assertEqual(metrics.checked_out, 1)
+        finally:
+            held.close()
+        self.assertEqual(metrics.waits, 1)
+        self.assertEqual(metrics.timeouts, 1)
+        self.assertGreaterEqual(metrics.max_wait_seconds, 0.2)
+
+    def test_waiter_served_on_checkin(self):
+        """Test that a blocked checkout succeeds once the connection is returned"""
+        self.engine.pool._timeout = 5
+        held = self.engine.connect()
+        timer = threading.Timer(0.1, held.close)
+        timer.start()
+        with self.engine.connect():
+            pass
+        timer.join()
+        metrics = EngineFactory.pool_metrics(self.engine)
+        self.assertEqual(metrics.waits, 1)
+        self.assertEqual(metrics.timeouts, 0)
+
+
+class TestSessionScope(unittest.TestCase):
+    """Test cases for the per-message session unit of work"""
+
+    def test_session_closed_after_scope(self):
+        """Test that the thread's Session is removed when the scope ends"""
+        with session_scope() as scoped:
+            self.assertIs(scoped, session())
+        self.assertFalse(session.registry.has())
+
+    def test_session_closed_after_error(self):
+        """Test that an error propagates and the Session is still removed"""
+        with self.assertRaises(ValueError):
+            with session_scope():
+                raise ValueError("boom")
+        self.assertFalse(session.registry.has())
+
+
+if __name__ == '__main__':
+    unittest.main()
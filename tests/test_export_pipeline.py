@@ -0,0 +1,96 @@
+import unittest
+import time
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.document_save.export_pipeline import ExportPipeline
+
+
+class FakeCursorResult:
+    """Mimics CursorResult.partitions() (fetchmany batches)"""
+
+    def __init__(self, batches, delay=0.0):
+        self.batches = batches
+        self.delay = delay
+        self.fetched = 0
+
+    def partitions(self, size):
+        for batch in self.batches:
+            time.sleep(self.delay)
+            self.fetched += 1
+            yield batch
+
+
+class TestExportPipeline(unittest.TestCase):
+    """Test cases for ExportPipeline"""
+
+    def test_batches_arrive_in_order(self):
+        """Test that every row is yielded once and in order"""
+        rows = [(number,) for number in range(25)]
+
+        batches = list(ExportPipeline(rows=rows, batch_size=10))
+
+        self.assertEqual([len(batch) for batch in batches], [10, 10, 5])
+        self.assertEqual([row for batch in batches for row in batch], rows)
+
+    def test_uses_cursor_partitions(self):
+        """Test that streamed results are fetched with partitions()"""
+        result = FakeCursorResult([[(1,), (2,)], [(3,)]])
+
+        batches = list(ExportPipeline(rows=result, batch_size=2))
+
+        self.assertEqual(batches, [[(1,), (2,)], [(3,)]])
+        self.assertEqual(result.fetched, 2)
+
+    def test_fetch_error_is_raised_to_writer(self):
+        """Test that a cursor error surfaces on the writing thread"""
+        def failing_rows():
+            yield (1,)
+            raise RuntimeError("ORA-03113: end-of-file on communication channel")
+
+        with self.assertRaises(RuntimeError):
+            list(ExportPipeline(rows=failing_rows(), batch_size=1))
+
+    def test_queue_depth_is_bounded(self):
+        """Test that a slow writer never has more than queue_depth batches buffered"""
+        result = FakeCursorResult([[(number,)] for number in range(20)])
+        pipeline = ExportPipeline(rows=result, batch_size=1, queue_depth=2)
+
+        for batch in pipeline:
+            time.sleep(0.005)
+
+        self.assertLessEqual(pipeline.stats.max_queue_depth, 2)
+        self.assertEqual(pipeline.stats.batches, 20)
+        self.assertGreater(pipeline.stats.write_stall_seconds, 0)
+
+    def test_writer_failure_stops_producer(self):
+        """Test that the producer thread exits when the writer gives up"""
+        result = FakeCursorResult([[(number,)] for number in range(100)])
+        pipeline = ExportPipeline(rows=result, batch_size=1, queue_depth=1)
+        pipeline.POLL_INTERVAL = 0.01
+
+        with self.assertRaises(OSError):
+            for batch in pipeline:
+                raise OSError("No space left on device")
+
+        self.assertFalse(pipeline._producer.is_alive())
+        self.assertLess(result.fetched, 100)
+
+    def test_fetch_and_write_overlap(self):
+        """Test that wall-clock time approaches max(fetch, write), not the sum"""
+        result = FakeCursorResult([[(number,)] for number in range(10)], delay=0.02)
+        pipeline = ExportPipeline(rows=result, batch_size=1, queue_depth=2)
+
+        started = time.perf_counter()
+        for batch in pipeline:
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - started
+
+        self.assertLess(elapsed, 0.35)  # sequential would be ~0.4s
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,134 @@
+import unittest
+import sys
+import os
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import MagicMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.sql_parameters import get_script_metadata, _metadata_cache
+from src.database.dto.order_column_dto import OrderColumnDTO
+from src.queries import keyset_pagination
+from src.queries.query_repo import QueryRepo
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+
+
+SCRIPT = """-- Parameters: Region:region
+-- Order By: registered desc, employer_no
+select employer_no, registered from employer where region = :region"""
+
+
+class TestKeysetPagination(unittest.TestCase):
+    """Test cases for keyset query building and page cursors"""
+
+    def setUp(self):
+        _metadata_cache.clear()
+        self.order_columns = [OrderColumnDTO("registered", True), OrderColumnDTO("employer_no")]
+
+    def test_order_header_parsed(self):
+        """Test that the Order By header yields ordering columns and directions"""
+        self.assertEqual(get_script_metadata(SCRIPT).order_columns, self.order_columns)
+
+    def test_malformed_order_header_ignored(self):
+        """Test that an unsafe ordering entry disables keyset paging"""
+        metadata = get_script_metadata("-- Order By: registered; drop table x\nselect 1 from dual")
+        self.assertEqual(metadata.order_columns, [])
+
+    def test_seek_predicate_respects_directions(self):
+        """Test that each column seeks in its own direction after the earlier columns tie"""
+        sql = keyset_pagination.keyset_query("select 1 from dual", self.order_columns, after=True)
+        self.assertIn("(qy.registered < :page_after_0)", sql)
+        self.assertIn("(qy.registered = :page_after_0 and qy.employer_no > :page_after_1)", sql)
+        self.assertIn("order by qy.registered desc, qy.employer_no asc", sql)
+
+    def test_first_page_has_no_predicate(self):
+        """Test that the first page only orders and limits"""
+        sql = keyset_pagination.keyset_query("select 1 from dual", self.order_columns, after=False)
+        self.assertNotIn("where", sql)
+
+    def test_cursor_round_trip(self):
+        """Test that datetimes and decimals survive the cursor token"""
+        values = [datetime(2024, 3, 1, 12, 30), Decimal("1001.50")]
+        token = keyset_pagination.encode_cursor("abc", values)
+        self.assertEqual(keyset_pagination.decode_cursor(token, "abc"), values)
+
+    def test_cursor_for_other_query_rejected(self):
+        """Test that a cursor issued for other parameters is refused"""
+        first = keyset_pagination.cursor_fingerprint(1, {"region": "NP"}, self.order_columns)
+        other = keyset_pagination.cursor_fingerprint(1, {"region": "GB"}, self.order_columns)
+        token = keyset_pagination.encode_cursor(first, [1])
+        with self.assertRaises(ValueError):
+            keyset_pagination.decode_cursor(token, other)
+        with self.assertRaises(ValueError):
+            keyset_pagination.decode_cursor("not-a-cursor", first)
+
+
+class TestQueryRepoPaging(unittest.TestCase):
+    """Test cases for QueryRepo.get_query_results paging and cached totals"""
+
+    def setUp(self):
+        _metadata_cache.clear()
+        QueryRepo.count_cache.clear()
+        self.db = MagicMock()
+        patcher = patch.object(QueryRepo, 'db', self.db)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.execute_dto = ExecuteQueryDTO(
+            first_name="A", query_id=7, name="employers", file_path="x.sql", user_id=1,
+            query_params={"region": "NP"}, per_page=2,
+        )
+
+    def _page(self, rows):
+        result = MagicMock()
+        result.keys.return_value = ["EMPLOYER_NO", "REGISTERED"]
+        result.fetchall.return_value = rows
+        return result
+
+    def _count(self, total):
+        result = MagicMock()
+        result.scalar.return_value = total
+        return result
+
+    def test_next_cursor_from_last_row(self):
+        """Test that an extra row yields a cursor holding the page's last ordering values"""
+        rows = [(1, datetime(2024, 3, 3)), (2, datetime(2024, 3, 2)), (3, datetime(2024, 3, 1))]
+        self.db.execute.side_effect = [self._page(rows), self._count(3)]
+        result = QueryRepo().get_query_results(query=SCRIPT, execute_dto=self.execute_dto)
+
+        self.assertEqual(result.rows, rows[:2])
+        self.assertEqual(result.total_count, 3)
+        page_params = self.db.execute.call_args_list[0].args[1]
+        self.assertEqual(page_params["page_limit"], 3)
+        fingerprint = keyset_pagination.cursor_fingerprint(7, {"region": "NP"}, get_script_metadata(SCRIPT).order_columns)
+        self.assertEqual(
+            keyset_pagination.decode_cursor(result.next_cursor, fingerprint),
+            [datetime(2024, 3, 2), 2],
+        )
+
+    def test_total_counted_once(self):
+        """Test that later pages reuse the cached total"""
+        self.db.execute.side_effect = [
+            self._page([(1, datetime(2024, 3, 3))]), self._count(1),
+            self._page([(1, datetime(2024, 3, 3))]),
+        ]
+        repo = QueryRepo()
+        repo.get_query_results(query=SCRIPT, execute_dto=self.execute_dto)
+        result = repo.get_query_results(query=SCRIPT, execute_dto=self.execute_dto, after=[datetime(2024, 3, 4), 0])
+
+        self.assertEqual(self.db.execute.call_count, 3)
+        self.assertEqual(result.total_count, 1)
+        self.assertIsNone(result.next_cursor)
+        self.assertEqual(self.db.execute.call_args_list[2].args[1]["page_after_1"], 0)
+
+    def test_offset_paging_without_order_header(self):
+        """Test that scripts without ordering columns page by offset"""
+        self.db.execute.side_effect = [self._page([]), self._count(0)]
+        self.execute_dto.page = 3
+        QueryRepo().get_query_results(query="select 1 from dual", execute_dto=self.execute_dto)
+        self.assertEqual(self.db.execute.call_args_list[0].args[1]["page_offset"], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import sys
+import os
+import pstats
+import tempfile
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.monitoring.message_profiler import MessageProfiler, StackSampler
+
+
+def busy(seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        sum(range(100))
+
+
+class TestMessageProfiler(unittest.TestCase):
+    """Test cases for MessageProfiler per-message profiling"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.settings = (MessageProfiler.QUERY_IDS, MessageProfiler.USER_IDS,
+                         MessageProfiler.SLOW_SECONDS, MessageProfiler.PROFILE_DIR)
+        MessageProfiler.QUERY_IDS = {"7"}
+        MessageProfiler.USER_IDS = set()
+        MessageProfiler.SLOW_SECONDS = 0
+        MessageProfiler.PROFILE_DIR = self.directory.name
+
+    def tearDown(self):
+        (MessageProfiler.QUERY_IDS, MessageProfiler.USER_IDS,
+         MessageProfiler.SLOW_SECONDS, MessageProfiler.PROFILE_DIR) = self.settings
+        self.directory.cleanup()
+
+    def test_targeted_query_writes_pstats(self):
+        """Test that a listed query id is profiled with cProfile under PROFILE_DIR"""
+        profiler = MessageProfiler.start()
+        profiler.identify(query_id=7, user_id=1)
+        busy(0.01)
+
+        path = profiler.finish(name="query_7")
+
+        self.assertEqual(os.path.dirname(path), self.directory.name)
+        self.assertTrue(path.endswith(".prof"))
+        functions = {name for _, _, name in pstats.Stats(path).stats}
+        self.assertIn("busy", functions)
+
+    def test_untargeted_query_writes_nothing(self):
+        """Test that other queries are not profiled when no threshold is set"""
+        profiler = MessageProfiler.start()
+        profiler.identify(query_id=8, user_id=1)
+
+        self.assertIsNone(profiler.finish(name="query_8"))
+        self.assertEqual(os.listdir(self.directory.name), [])
+
+    def test_slow_message_writes_collapsed_stacks(self):
+        """Test that a message over the threshold leaves sampled stacks in PROFILE_DIR"""
+        MessageProfiler.SLOW_SECONDS = 0.05
+        profiler = MessageProfiler.start()
+        profiler.sampler.interval = 0.001
+        busy(0.1)
+
+        path = profiler.finish(name="query_8_log_3")
+
+        self.assertTrue(path.startswith(os.path.join(self.directory.name, "query_8_log_3_")))
+        self.assertTrue(path.endswith(".folded"))
+        with open(path) as profile_file:
+            lines = profile_file.read().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(all(line.startswith("message;") for line in lines))
+        self.assertTrue(any("busy (test_message_profiler.py" in line for line in lines))
+
+    def test_fast_message_discards_samples(self):
+        """Test that a message under the threshold writes no profile"""
+        MessageProfiler.SLOW_SECONDS = 60
+        profiler = MessageProfiler.start()
+
+        self.assertIsNone(profiler.finish(name="query_8"))
+
+    def test_enabled(self):
+        """Test that profiling is off unless a target or threshold is configured"""
+        self.assertTrue(MessageProfiler.enabled())
+        MessageProfiler.QUERY_IDS = set()
+        self.assertFalse(MessageProfiler.enabled())
+
+
+class TestStackSampler(unittest.TestCase):
+    """Test cases for StackSampler collapsed stacks"""
+
+    def test_collapse_orders_root_first(self):
+        """Test that collapsed stacks start with the thread role and end at the leaf"""
+        stack = StackSampler._collapse("message", sys._getframe())
+
+        self.assertTrue(stack.startswith("message;"))
+        self.assertIn("test_collapse_orders_root_first (test_message_profiler.py:", stack.split(";")[-1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,133 @@
+import unittest
+import sys
+import os
+import urllib.request
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.monitoring.metrics import MetricsRegistry, registry
+from src.monitoring.metrics_server import MetricsServer, CONTENT_TYPE
+from src.monitoring.pipeline_metrics import PipelineMetrics
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test cases for the in-process metrics registry"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_renders_total(self):
+        """Test that counters are exposed with the _total suffix"""
+        counter = self.registry.counter("rows", "Rows written.")
+        counter.inc(3)
+        counter.inc()
+
+        text = self.registry.render()
+
+        self.assertIn("# TYPE rows counter", text)
+        self.assertIn("rows_total 4.0", text)
+        self.assertTrue(text.endswith("# EOF\n"))
+
+    def test_counter_rejects_negative(self):
+        """Test that a counter cannot be decremented"""
+        counter = self.registry.counter("rows", "Rows written.")
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+
+    def test_gauge_set_and_function(self):
+        """Test that gauges render a set value or read their function at render time"""
+        self.registry.gauge("queue_depth", "Queue depth.").set(7)
+        checked_out = [2]
+        self.registry.gauge("checked_out", "Checked out.").set_function(lambda: checked_out[0])
+
+        first = self.registry.render()
+        checked_out[0] = 5
+        second = self.registry.render()
+
+        self.assertIn("# TYPE queue_depth gauge", first)
+        self.assertIn("queue_depth 7", first)
+        self.assertIn("checked_out 2", first)
+        self.assertIn("checked_out 5", second)
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that observations land in cumulative le buckets with sum and count"""
+        histogram = self.registry.histogram("latency", "Latency.", labels=("stage",), buckets=(0.1, 1))
+        series = histogram.labels(stage="db.query")
+        for value in (0.05, 0.1, 0.5, 2):
+            series.observe(value)
+
+        text = self.registry.render()
+
+        self.assertIn('latency_bucket{stage="db.query",le="0.1"} 2', text)
+        self.assertIn('latency_bucket{stage="db.query",le="1.0"} 3', text)
+        self.assertIn('latency_bucket{stage="db.query",le="+Inf"} 4', text)
+        self.assertIn('latency_sum{stage="db.query"} 2.65', text)
+        self.assertIn('latency_count{stage="db.query"} 4', text)
+
+    def test_labels_required(self):
+        """Test that a labelled metric cannot be observed without labels"""
+        histogram = self.registry.histogram("latency", "Latency.", labels=("stage",))
+        with self.assertRaises(ValueError):
+            histogram.observe(1)
+
+    def test_label_values_escaped(self):
+        """Test that quotes in label values are escaped"""
+        counter = self.registry.counter("messages", "Messages.", labels=("status",))
+        counter.labels(status='bad"value').inc()
+
+        self.assertIn('messages_total{status="bad\\"value"} 1.0', self.registry.render())
+
+    def test_register_returns_existing(self):
+        """Test that registering the same metric twice returns the first one"""
+        first = self.registry.counter("rows", "Rows written.")
+
+        self.assertIs(first, self.registry.counter("rows", "Rows written."))
+        with self.assertRaises(ValueError):
+            self.registry.histogram("rows", "Rows written.")
+
+
+class TestPipelineMetrics(unittest.TestCase):
+    """Test cases for PipelineMetrics stage timing"""
+
+    def test_time_stage_observes_on_error(self):
+        """Test that a failing stage is still timed"""
+        series = PipelineMetrics.STAGE_DURATION.labels(stage="test.stage")
+        before = sum(series.snapshot()[0])
+
+        with self.assertRaises(RuntimeError):
+            with PipelineMetrics.time_stage("test.stage"):
+                raise RuntimeError("boom")
+
+        self.assertEqual(sum(series.snapshot()[0]), before + 1)
+
+
+class TestMetricsServer(unittest.TestCase):
+    """Test cases for the local OpenMetrics endpoint"""
+
+    def tearDown(self):
+        MetricsServer.stop()
+
+    def test_serves_registry(self):
+        """Test that /metrics returns the process registry in OpenMetrics format"""
+        PipelineMetrics.record_export(row_count=10, byte_count=100)
+        port = MetricsServer.start(port=0)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            body = response.read().decode("utf-8")
+            content_type = response.headers["Content-Type"]
+
+        self.assertEqual(content_type, CONTENT_TYPE)
+        self.assertEqual(body.splitlines()[-1], "# EOF")
+        self.assertIn("query_export_rows_total", body)
+        self.assertIn("query_stage_duration_seconds", registry.render())
+
+    def test_start_is_idempotent(self):
+        """Test that a second start returns the running server's port"""
+        port = MetricsServer.start(port=0)
+
+        self.assertEqual(MetricsServer.start(port=0), port)
+
+
+if __name__ == '__main__':
+    unittest.main()
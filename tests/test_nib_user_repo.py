@@ -0,0 +1,120 @@
+import unittest
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.nib_user.nib_user_repo import NIBUserRepo
+from src.monitoring.metrics import registry
+
+
+class TestNIBUserRepoCache(unittest.TestCase):
+    """Test cases for the NIBUserRepo lookup cache"""
+
+    def setUp(self):
+        NIBUserRepo.clear_cache()
+        self.addCleanup(NIBUserRepo.clear_cache)
+        self.calls = []
+        self.roles = {1: ["Manager", "IT"], 2: []}
+        self.users = {5: SimpleNamespace(id=50, user_id=5, user_name="jsmith", first_name="John",
+                                         last_name="Smith", middle_name=None, email="jsmith@example.com")}
+        for name, loader in (
+            ('_get_user_roles', lambda repo, user_id: self._load("roles", list(self.roles.get(user_id, [])))),
+            ('_get_user_local_office', lambda repo, user_id: self._load("office", 12)),
+            ('_get_role', lambda repo, role: self._load("role", role if role == "Manager" else None)),
+            ('_find_by_user_id', lambda repo, user_id: self._load("user", self.users.get(user_id))),
+        ):
+            patcher = patch.object(NIBUserRepo, name, autospec=True, side_effect=loader)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _load(self, kind, value):
+        self.calls.append(kind)
+        return value
+
+    def test_repeat_lookups_hit_cache(self):
+        """Test that a second lookup does not reach the database"""
+        repo = NIBUserRepo()
+        hits = NIBUserRepo.cache_stats()["hits"]
+        self.assertEqual(repo.get_user_roles(user_id=1), ["Manager", "IT"])
+        self.assertEqual(NIBUserRepo().get_user_roles(user_id=1), ["Manager", "IT"])
+        self.assertEqual(repo.get_user_local_office(user_id=1), 12)
+        repo.get_user_local_office(user_id=1)
+
+        self.assertEqual(self.calls, ["roles", "office"])
+        self.assertEqual(NIBUserRepo.cache_stats()["hits"], hits + 2)
+
+    def test_cached_list_not_shared(self):
+        """Test that changing a returned role list does not change the cache"""
+        NIBUserRepo().get_user_roles(user_id=1).append("Admin")
+        self.assertEqual(NIBUserRepo().get_user_roles(user_id=1), ["Manager", "IT"])
+
+    def test_cached_user_not_shared(self):
+        """Test that changing a returned user DTO does not change the cache"""
+        NIBUserRepo().find_by_user_id(user_id=5).email = "changed@example.com"
+
+        self.assertEqual(NIBUserRepo().find_by_user_id(user_id=5).email, "jsmith@example.com")
+        self.assertEqual(self.calls, ["user"])
+
+    def test_hits_and_misses_exported(self):
+        """Test that cache hits and misses reach the metrics registry"""
+        hits = NIBUserRepo.CACHE_LOOKUPS.labels(lookup="local_office", result="hit")
+        misses = NIBUserRepo.CACHE_LOOKUPS.labels(lookup="local_office", result="miss")
+        before = (hits.value, misses.value)
+        for _ in range(3):
+            NIBUserRepo().get_user_local_office(user_id=1)
+
+        self.assertEqual((hits.value, misses.value), (before[0] + 2, before[1] + 1))
+        text = registry.render()
+        self.assertIn('query_nib_user_cache_lookups_total{lookup="local_office",result="hit"}', text)
+        self.assertIn("query_nib_user_cache_entries 1", text)
+
+    def test_misses_cached(self):
+        """Test that missing users, roles and empty role lists are cached as well"""
+        repo = NIBUserRepo()
+        for _ in range(2):
+            self.assertIsNone(repo.find_by_user_id(user_id=99))
+            self.assertIsNone(repo.get_role(role="Nope"))
+            self.assertEqual(repo.get_user_roles(user_id=2), [])
+        self.assertEqual(self.calls, ["user", "role", "roles"])
+
+    def test_negative_entries_expire_sooner(self):
+        """Test that misses use the negative TTL"""
+        with patch.object(NIBUserRepo.lookup_cache, 'set', wraps=NIBUserRepo.lookup_cache.set) as cache_set:
+            NIBUserRepo().get_role(role="Nope")
+            NIBUserRepo().get_role(role="Manager")
+        self.assertEqual(cache_set.call_args_list[0].kwargs["ttl"], NIBUserRepo.NEGATIVE_CACHE_TTL)
+        self.assertEqual(cache_set.call_args_list[1].kwargs["ttl"], NIBUserRepo.CACHE_TTL)
+
+    def test_invalidate_user(self):
+        """Test that invalidating a user reloads only that user's lookups"""
+        repo = NIBUserRepo()
+        repo.get_user_roles(user_id=1)
+        repo.get_user_roles(user_id=2)
+        repo.get_role(role="Manager")
+
+        self.assertEqual(NIBUserRepo.invalidate_user(user_id=1), 1)
+        self.roles[1] = ["Manager"]
+        self.assertEqual(repo.get_user_roles(user_id=1), ["Manager"])
+        repo.get_user_roles(user_id=2)
+        repo.get_role(role="Manager")
+        self.assertEqual(self.calls, ["roles", "roles", "role", "roles"])
+
+
+    def test_invalidate_user_either_id_type(self):
+        """Test that a user id given as a string or an int shares one entry and invalidation"""
+        repo = NIBUserRepo()
+        repo.get_user_local_office(user_id=1)
+        repo.get_user_local_office(user_id="1")
+        self.assertEqual(self.calls, ["office"])
+
+        self.assertEqual(NIBUserRepo.invalidate_user(user_id="1"), 1)
+        repo.get_user_local_office(user_id=1)
+        self.assertEqual(NIBUserRepo.invalidate_user(user_id=1), 1)
+        self.assertEqual(self.calls, ["office", "office"])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,73 @@
+import unittest
+import contextlib
+import json
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.monitoring.sentry_service import SentryService
+from src.document_save.result_cache_service import ResultCacheService
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+
+with patch.object(SentryService, 'initialize'):
+    import app
+
+
+class TestProcessMessage(unittest.TestCase):
+    """Test cases for the consumer's per-message pipeline"""
+
+    def setUp(self):
+        self.query_dto = ExecuteQueryDTO(
+            first_name="john",
+            query_id=423,
+            name="Active Employer Email",
+            file_path="/scripts/ActiveEmployerEmail.sql",
+            user_id=31688,
+            query_params={"status": "A"},
+            email="john@example.com",
+        )
+        self.query_log_service = MagicMock()
+        self.export_report = MagicMock(return_value=("/reports/31688/report.csv", 2))
+        for patcher in (
+            patch.object(app, 'session_scope', contextlib.nullcontext),
+            patch.object(app, 'prepare_models'),
+            patch.object(app, 'QueryService'),
+            patch.object(app, 'DocumentSaveService'),
+            patch.object(app, 'query_report_delivered'),
+            patch.object(app, 'QueryLogService', return_value=self.query_log_service),
+            patch.object(app, 'export_report', self.export_report),
+            patch.object(SentryService, 'capture_exception'),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        app.QueryService.return_value.to_execute_query_dto.return_value = self.query_dto
+
+    def _process(self):
+        body = json.dumps({"id": 423, "query_log_id": 7}).encode()
+        publish = MagicMock()
+        app.process_message(body, publish=publish)
+        return publish
+
+    def test_cache_lookup_failure_runs_report(self):
+        """Test that a failing cache lookup is treated as a miss and the report still succeeds"""
+        with patch.object(ResultCacheService, 'lookup', side_effect=ValueError("corrupt entry")), \
+                patch.object(ResultCacheService, 'discard') as discard:
+            publish = self._process()
+
+        discard.assert_called_once_with(query=self.query_dto)
+        SentryService.capture_exception.assert_called_once()
+        self.export_report.assert_called_once()
+        self.query_log_service.update_query_log.assert_called_once_with(
+            log_id=7, status='SUCCESS', write_behind=True
+        )
+        self.assertEqual(
+            json.loads(publish.call_args.kwargs["body"]),
+            {"save_path": "/reports/31688/report.csv"},
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+import tempfile
+from datetime import date, datetime
+from unittest.mock import patch
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from config import OracleDB
+from src.database.reflection import CachedReflection
+from src.admin.query_log.query_log_repo import QueryLogRepo
+from src.admin.query_log.dto.query_log_search_criteria_dto import QueryLogSearchCriteriaDTO
+from src.admin.query_log.dto.date_range_dto import DateRangeDTO
+
+
+class TestQueryLogSearch(unittest.TestCase):
+    """Test cases for paginated query log search"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        schemas = {OracleDB().userName: "app.db", "nib_admin_auth": "auth.db"}
+        cls.engine = sa.create_engine(f"sqlite:///{cls.directory.name}/main.db")
+
+        @sa.event.listens_for(cls.engine, "connect")
+        def attach(dbapi_connection, connection_record):
+            for schema, file_name in schemas.items():
+                dbapi_connection.execute(f"attach database '{cls.directory.name}/{file_name}' as \"{schema}\"")
+
+        app = OracleDB().userName
+        with cls.engine.begin() as connection:
+            connection.execute(sa.text(f'create table "{app}".query_table (id integer primary key, name varchar(40), file_path varchar(200), department varchar(40))'))
+            connection.execute(sa.text(f'create table "{app}".query_log_table (id integer primary key, user_id integer, query_id integer, user_name varchar(40), status varchar(20), inserted_by varchar(40), inserted_date datetime)'))
+            connection.execute(sa.text('create table nib_admin_auth.nib_users (id integer primary key, user_id integer, user_name varchar(40), first_name varchar(40), last_name varchar(40), middle_name varchar(40), email varchar(80))'))
+            for user_id, user_name in ((1, "jsmith"), (2, "jsmythe"), (3, "ajones"), (4, "j_doe")):
+                connection.execute(sa.text("insert into nib_admin_auth.nib_users (id, user_id, user_name) values (:id, :id, :name)"), {"id": user_id, "name": user_name})
+            for query_id in (1, 2):
+                connection.execute(sa.text(f'insert into "{app}".query_table (id, name) values (:id, :name)'), {"id": query_id, "name": f"query {query_id}"})
+            # Log 13 belongs to a query that has since been deleted
+            for log_id in range(1, 14):
+                connection.execute(
+                    sa.text(f'insert into "{app}".query_log_table values (:id, :user_id, :query_id, :name, \'SUCCESS\', :name, :inserted)'),
+                    {"id": log_id, "user_id": log_id % 4 + 1, "query_id": log_id % 2 + 1 if log_id < 13 else 99, "name": "x",
+                     "inserted": datetime(2024, 1, log_id, 15, 30)},
+                )
+
+        with patch.object(CachedReflection, 'CACHE_PATH', os.path.join(cls.directory.name, "reflection.pickle")):
+            CachedReflection.prepare_once(cls.engine)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.dispose()
+        cls.directory.cleanup()
+
+    def setUp(self):
+        self.session = orm.Session(bind=self.engine)
+        self.addCleanup(self.session.close)
+        patcher = patch.object(QueryLogRepo, 'db', self.session)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_page_and_separate_total(self):
+        """Test that a page holds per_page logs in date order and the total counts all matches"""
+        logs, total = QueryLogRepo().filter_query_log(QueryLogSearchCriteriaDTO(page=2, per_page=5))
+        self.assertEqual(total, 12)
+        self.assertEqual([log.id for log in logs], [6, 7, 8, 9, 10])
+
+    def test_logs_of_deleted_queries_excluded(self):
+        """Test that logs whose query no longer exists are left out of the listing and export"""
+        criteria = QueryLogSearchCriteriaDTO(per_page=50)
+        logs, total = QueryLogRepo().filter_query_log(criteria)
+
+        self.assertEqual(total, 12)
+        self.assertNotIn(13, [log.id for log in logs])
+        self.assertNotIn(13, [log.id for log in QueryLogRepo().iter_query_log(criteria)])
+
+    def test_user_name_prefix_match(self):
+        """Test that user names match by prefix and case-insensitively"""
+        logs, total = QueryLogRepo().filter_query_log(QueryLogSearchCriteriaDTO(user_name="JSM"))
+        self.assertEqual(total, 6)
+        self.assertTrue(all(log.user_id in (1, 2) for log in logs))
+
+        _, total = QueryLogRepo().filter_query_log(QueryLogSearchCriteriaDTO(user_name="smith"))
+        self.assertEqual(total, 0)
+
+    def test_like_wildcards_escaped(self):
+        """Test that '_' in a search is literal, not a one-character wildcard"""
+        _, total = QueryLogRepo().filter_query_log(QueryLogSearchCriteriaDTO(user_name="j_"))
+        self.assertEqual(total, 3)
+
+    def test_date_range_includes_whole_end_day(self):
+        """Test that the date criteria filter inserted_date, end day inclusive"""
+        criteria = QueryLogSearchCriteriaDTO(date=DateRangeDTO(start=date(2024, 1, 3), end=date(2024, 1, 5)))
+        logs, total = QueryLogRepo().filter_query_log(criteria)
+        self.assertEqual(total, 3)
+        self.assertEqual([log.id for log in logs], [3, 4, 5])
+
+    def test_query_id_filter(self):
+        """Test that logs filter on their own query_id"""
+        _, total = QueryLogRepo().filter_query_log(QueryLogSearchCriteriaDTO(query_id=2))
+        self.assertEqual(total, 6)
+
+    def test_iterator_streams_every_match(self):
+        """Test that the export iterator yields all matches across chunks"""
+        logs = list(QueryLogRepo().iter_query_log(QueryLogSearchCriteriaDTO(query_id=1), chunk_size=2))
+        self.assertEqual([log.id for log in logs], [2, 4, 6, 8, 10, 12])
+
+
+if __name__ == '__main__':
+    unittest.main()
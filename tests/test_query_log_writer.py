@@ -0,0 +1,139 @@
+import unittest
+import threading
+import time
+from unittest.mock import patch
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.admin.query_log.query_log_repo import QueryLogRepo
+from src.admin.query_log.query_log_writer import QueryLogWriter
+
+
+class TestQueryLogWriter(unittest.TestCase):
+    """Test cases for write-behind query log updates"""
+
+    def setUp(self):
+        self.writes = []
+        self.failures = 0
+        self.hold_write = None
+        for patcher in (
+            patch.object(QueryLogRepo, 'update_query_log_statuses', autospec=True, side_effect=self._write),
+            patch.object(QueryLogWriter, 'FLUSH_INTERVAL', 60),
+            patch.object(QueryLogWriter, 'BATCH_SIZE', 50),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(QueryLogWriter.shutdown)
+
+    def _write(self, repo, statuses):
+        if self.hold_write:
+            writing, release = self.hold_write
+            writing.set()
+            release.wait(5)
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("ORA-03113")
+        self.writes.append(dict(statuses))
+
+    def test_flush_writes_before_returning(self):
+        """Test that flush returns only once the ticket's update is written"""
+        ticket = QueryLogWriter.update(log_id=1, status='SUCCESS')
+        self.assertEqual(self.writes, [])
+
+        QueryLogWriter.flush(through=ticket)
+        self.assertEqual(self.writes, [{1: 'SUCCESS'}])
+
+    def test_updates_batched_latest_status_wins(self):
+        """Test that buffered updates go out in one write with each log's last status"""
+        QueryLogWriter.update(log_id=1, status='SUCCESS')
+        QueryLogWriter.update(log_id=2, status='SUCCESS')
+        ticket = QueryLogWriter.update(log_id=1, status='FAILED')
+
+        QueryLogWriter.flush(through=ticket)
+        self.assertEqual(self.writes, [{1: 'FAILED', 2: 'SUCCESS'}])
+
+    def test_concurrent_flushes_share_a_write(self):
+        """Test that worker threads flushing together cost one round trip"""
+        tickets = [QueryLogWriter.update(log_id=log_id, status='SUCCESS') for log_id in range(4)]
+        threads = [threading.Thread(target=QueryLogWriter.flush, kwargs={"through": t}) for t in tickets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(self.writes), 1)
+        self.assertEqual(len(self.writes[0]), 4)
+
+    def test_interval_flush(self):
+        """Test that buffered updates are written once the interval passes"""
+        with patch.object(QueryLogWriter, 'FLUSH_INTERVAL', 0.05):
+            QueryLogWriter.update(log_id=1, status='SUCCESS')
+            deadline = time.monotonic() + 5
+            while not self.writes and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(self.writes, [{1: 'SUCCESS'}])
+
+    def test_batch_size_triggers_write(self):
+        """Test that a full batch is written without waiting for the interval"""
+        with patch.object(QueryLogWriter, 'BATCH_SIZE', 3):
+            for log_id in range(3):
+                QueryLogWriter.update(log_id=log_id, status='SUCCESS')
+            deadline = time.monotonic() + 5
+            while not self.writes and time.monotonic() < deadline:
+                time.sleep(0.01)
+        self.assertEqual(len(self.writes[0]), 3)
+
+    def test_failed_write_raises_and_keeps_updates(self):
+        """Test that a failed write is reported to the flusher and retried later"""
+        self.failures = 1
+        ticket = QueryLogWriter.update(log_id=1, status='SUCCESS')
+        with self.assertRaises(RuntimeError):
+            QueryLogWriter.flush(through=ticket)
+
+        with patch.object(QueryLogWriter, 'FLUSH_INTERVAL', 0.01):
+            QueryLogWriter.flush(through=ticket)
+        self.assertEqual(self.writes, [{1: 'SUCCESS'}])
+
+    def test_failed_write_only_raises_to_its_flushers(self):
+        """Test that a flusher whose update was not in the failed batch waits for the retry"""
+        self.failures = 1
+        writing, release = threading.Event(), threading.Event()
+        self.hold_write = (writing, release)
+        errors = {}
+
+        def flush(name, ticket):
+            try:
+                QueryLogWriter.flush(through=ticket)
+                errors[name] = None
+            except RuntimeError as e:
+                errors[name] = e
+
+        with patch.object(QueryLogWriter, 'FLUSH_INTERVAL', 0.01):
+            first = threading.Thread(target=flush, args=("first", QueryLogWriter.update(log_id=1, status='SUCCESS')))
+            first.start()
+            self.assertTrue(writing.wait(5))
+            # Buffered while the first batch is being written, so not part of it
+            self.hold_write = None
+            second = threading.Thread(target=flush, args=("second", QueryLogWriter.update(log_id=2, status='SUCCESS')))
+            second.start()
+            release.set()
+            first.join(5)
+            second.join(5)
+
+        self.assertIsInstance(errors["first"], RuntimeError)
+        self.assertIsNone(errors["second"])
+        self.assertEqual(self.writes, [{1: 'SUCCESS', 2: 'SUCCESS'}])
+
+    def test_shutdown_writes_pending(self):
+        """Test that shutdown writes everything still buffered"""
+        QueryLogWriter.update(log_id=9, status='FAILED')
+        QueryLogWriter.shutdown()
+        self.assertEqual(self.writes, [{9: 'FAILED'}])
+        self.assertEqual(QueryLogWriter.pending(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
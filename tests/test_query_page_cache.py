@@ -0,0 +1,114 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import MagicMock, patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.sql_parameters import _metadata_cache
+from src.queries.query_repo import QueryRepo
+from src.queries.query_service import QueryService
+from src.queries.dto.query_dto import QueryDTO
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+
+
+KEYSET_SCRIPT = "-- Order By: employer_no\nselect employer_no from employer"
+OFFSET_SCRIPT = "select employer_no from employer"
+
+
+class TestQueryPageCache(unittest.TestCase):
+    """Test cases for preview page prefetching and caching"""
+
+    def setUp(self):
+        _metadata_cache.clear()
+        QueryRepo.count_cache.clear()
+        QueryService.page_cache.clear()
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.script_path = os.path.join(self.directory.name, "employers.sql")
+        self._write_script(KEYSET_SCRIPT)
+
+        self.db = MagicMock()
+        self.db.execute.side_effect = self._execute
+        for patcher in (
+            patch.object(QueryRepo, 'db', self.db),
+            patch.object(QueryService, 'PREFETCH_PAGES', 2),
+            patch.object(QueryService, 'get_query_by_id',
+                         return_value=QueryDTO(id=7, name="employers", file_path=self.script_path, department=None)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.page_statements = 0
+
+    def _write_script(self, script):
+        with open(self.script_path, "w") as script_file:
+            script_file.write(script)
+        # Move the mtime on so SQLReader sees the edit even within the same tick
+        stat = os.stat(self.script_path)
+        os.utime(self.script_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    def _execute(self, statement, params, execution_options=None):
+        result = MagicMock()
+        if "count(*)" in str(statement):
+            result.scalar.return_value = 10
+            return result
+        self.page_statements += 1
+        start = params.get("page_offset", 0)
+        if "page_after_0" in params:
+            start = params["page_after_0"]
+        rows = [(number,) for number in range(start + 1, 11)][:params["page_limit"]]
+        result.keys.return_value = ["EMPLOYER_NO"]
+        result.fetchall.return_value = rows
+        return result
+
+    def _dto(self, **kwargs):
+        return ExecuteQueryDTO(first_name="A", query_id=7, name="employers", file_path=self.script_path,
+                               user_id=1, query_params={}, per_page=2, **kwargs)
+
+    def test_next_pages_served_from_prefetch(self):
+        """Test that the pages fetched ahead answer the following requests"""
+        service = QueryService()
+        first = service.get_query_results(self._dto())
+        second = service.get_query_results(self._dto(cursor=first.next_cursor))
+        third = service.get_query_results(self._dto(cursor=second.next_cursor))
+
+        self.assertEqual([row[0] for row in third.rows], [5, 6])
+        self.assertEqual(self.page_statements, 1)
+        self.assertEqual(self.db.execute.call_args_list[0].args[1]["page_limit"], 7)
+
+        fourth = service.get_query_results(self._dto(cursor=third.next_cursor))
+        self.assertEqual([row[0] for row in fourth.rows], [7, 8])
+        self.assertEqual(self.page_statements, 2)
+
+    def test_offset_pages_prefetched(self):
+        """Test that offset-paged scripts cache the following page numbers"""
+        self._write_script(OFFSET_SCRIPT)
+        service = QueryService()
+        service.get_query_results(self._dto(page=1))
+        page = service.get_query_results(self._dto(page=3))
+
+        self.assertEqual([row[0] for row in page.rows], [5, 6])
+        self.assertEqual(self.page_statements, 1)
+
+    def test_edited_script_not_served_from_cache(self):
+        """Test that changing the SQL file bypasses pages cached for the old text"""
+        service = QueryService()
+        service.get_query_results(self._dto())
+        self._write_script(KEYSET_SCRIPT + " where 1 = 1")
+        service.get_query_results(self._dto())
+
+        self.assertEqual(self.page_statements, 2)
+
+    def test_last_page_has_no_cursor(self):
+        """Test that prefetching stops at the end of the results"""
+        pages = QueryRepo().get_query_pages(query=KEYSET_SCRIPT, execute_dto=self._dto(), after=[6], pages=3)
+
+        self.assertEqual([[row[0] for row in page.rows] for page in pages], [[7, 8], [9, 10]])
+        self.assertIsNotNone(pages[0].next_cursor)
+        self.assertIsNone(pages[1].next_cursor)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,91 @@
+import unittest
+import threading
+from unittest.mock import MagicMock
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.query_queue.query_worker_pool import QueryWorkerPool
+
+
+class FakeConnection:
+    """Records callbacks scheduled from worker threads like BlockingConnection"""
+
+    def __init__(self):
+        self.is_open = True
+        self.callbacks = []
+        self.scheduled_from = []
+
+    def add_callback_threadsafe(self, callback):
+        self.scheduled_from.append(threading.current_thread().name)
+        self.callbacks.append(callback)
+
+    def process_data_events(self, time_limit=None):
+        while self.callbacks:
+            self.callbacks.pop(0)()
+
+
+class TestQueryWorkerPool(unittest.TestCase):
+    """Test cases for QueryWorkerPool"""
+
+    def setUp(self):
+        self.connection = FakeConnection()
+        self.channel = MagicMock()
+
+    def test_messages_run_on_worker_threads(self):
+        """Test that handlers run off the connection thread"""
+        handler_threads = []
+
+        def handler(body, publish):
+            handler_threads.append(threading.current_thread().name)
+
+        pool = QueryWorkerPool(self.connection, self.channel, handler, workers=2)
+        pool.on_message(self.channel, MagicMock(delivery_tag=1), None, b'{}')
+        pool.shutdown()
+
+        self.assertEqual(len(handler_threads), 1)
+        self.assertTrue(handler_threads[0].startswith("query-worker"))
+
+    def test_ack_is_marshalled_to_connection_thread(self):
+        """Test that acks are scheduled, not sent from the worker"""
+        def handler(body, publish):
+            self.channel.basic_ack.assert_not_called()
+
+        pool = QueryWorkerPool(self.connection, self.channel, handler, workers=2)
+        pool.on_message(self.channel, MagicMock(delivery_tag=7), None, b'{}')
+        pool.executor.shutdown(wait=True)
+
+        self.channel.basic_ack.assert_not_called()
+        self.connection.process_data_events()
+        self.channel.basic_ack.assert_called_once_with(delivery_tag=7)
+
+    def test_ack_sent_when_handler_fails(self):
+        """Test that a failing handler still acknowledges the message"""
+        def handler(body, publish):
+            raise RuntimeError("boom")
+
+        pool = QueryWorkerPool(self.connection, self.channel, handler, workers=1)
+        pool.on_message(self.channel, MagicMock(delivery_tag=3), None, b'{}')
+        pool.shutdown()
+
+        self.channel.basic_ack.assert_called_once_with(delivery_tag=3)
+
+    def test_publish_is_marshalled_to_connection_thread(self):
+        """Test that publishes from handlers go through the connection thread"""
+        def handler(body, publish):
+            publish(exchange="ex", routing_key="cleanup", body="{}")
+
+        pool = QueryWorkerPool(self.connection, self.channel, handler, workers=1)
+        pool.on_message(self.channel, MagicMock(delivery_tag=1), None, b'{}')
+        pool.shutdown()
+
+        self.channel.basic_publish.assert_called_once_with(
+            exchange="ex", routing_key="cleanup", body="{}"
+        )
+        self.assertTrue(all(name.startswith("query-worker") for name in self.connection.scheduled_from))
+
+
+if __name__ == '__main__':
+    unittest.main()
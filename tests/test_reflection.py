@@ -0,0 +1,108 @@
+import unittest
+import sys
+import os
+import tempfile
+from unittest.mock import patch
+import sqlalchemy as sa
+from sqlalchemy.orm import declarative_base
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.reflection import CachedReflection
+
+
+class TestCachedReflection(unittest.TestCase):
+    """Test cases for lazy, disk-cached model reflection"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.engine = sa.create_engine(f"sqlite:///{self.directory.name}/test.db")
+        with self.engine.begin() as connection:
+            connection.execute(sa.text("create table report (id integer primary key, name varchar(40))"))
+            connection.execute(sa.text("insert into report values (1, 'Claims')"))
+        self.cache_path = os.path.join(self.directory.name, "reflection.pickle")
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def _declare(self):
+        """Declare a fresh model so each call starts unmapped, like a new process"""
+        class Reflected(CachedReflection):
+            __abstract__ = True
+            CACHE_PATH = self.cache_path
+
+        class Report(Reflected, declarative_base()):
+            __tablename__ = 'report'
+
+        return Reflected, Report
+
+    def test_declaring_model_does_not_connect(self):
+        """Test that importing a model leaves it pending without touching the database"""
+        with patch.object(self.engine, 'connect', side_effect=AssertionError("connected")):
+            Reflected, Report = self._declare()
+        self.assertEqual(len(Reflected.pending()), 1)
+
+    def test_first_prepare_reflects_and_writes_cache(self):
+        """Test that a cold start reflects, maps the model and writes the cache file"""
+        Reflected, Report = self._declare()
+        self.assertFalse(Reflected.prepare_once(self.engine))
+        self.assertEqual(Reflected.pending(), [])
+        self.assertTrue(os.path.exists(self.cache_path))
+        with self.engine.connect() as connection:
+            row = connection.execute(sa.select(Report.name).where(Report.id == 1)).one()
+        self.assertEqual(row.name, 'Claims')
+
+    def test_warm_start_maps_from_cache_without_connecting(self):
+        """Test that a later start maps from the cache file without reflecting"""
+        Reflected, _ = self._declare()
+        Reflected.prepare_once(self.engine)
+
+        Reflected, Report = self._declare()
+        with patch.object(self.engine, 'connect', side_effect=AssertionError("connected")):
+            self.assertTrue(Reflected.prepare_once(self.engine))
+        self.assertEqual(list(Report.__table__.columns.keys()), ['id', 'name'])
+        self.assertEqual(list(Report.__table__.primary_key.columns.keys()), ['id'])
+
+    def test_schema_version_change_reflects_again(self):
+        """Test that a new schema version ignores the cached tables"""
+        Reflected, _ = self._declare()
+        Reflected.prepare_once(self.engine)
+
+        Reflected, _ = self._declare()
+        with patch.object(Reflected, 'SCHEMA_VERSION', 'next'):
+            self.assertFalse(Reflected.prepare_once(self.engine))
+
+    def test_corrupt_cache_ignored(self):
+        """Test that an unreadable cache file falls back to reflection"""
+        with open(self.cache_path, "wb") as cache_file:
+            cache_file.write(b"not a pickle")
+        Reflected, _ = self._declare()
+        self.assertFalse(Reflected.prepare_once(self.engine))
+        self.assertEqual(Reflected.pending(), [])
+
+    def test_cache_writable_by_others_ignored(self):
+        """Test that a cache file other users could have planted is not loaded"""
+        Reflected, _ = self._declare()
+        Reflected.prepare_once(self.engine)
+        os.chmod(self.cache_path, 0o666)
+
+        Reflected, _ = self._declare()
+        with patch('src.database.reflection.pickle.load') as load:
+            self.assertFalse(Reflected.prepare_once(self.engine))
+        load.assert_not_called()
+        self.assertEqual(Reflected.pending(), [])
+
+    def test_cache_written_owner_only(self):
+        """Test that the cache directory and file are created for this user only"""
+        self.cache_path = os.path.join(self.directory.name, "cache", "reflection.pickle")
+        Reflected, _ = self._declare()
+        Reflected.prepare_once(self.engine)
+
+        self.assertEqual(os.stat(os.path.dirname(self.cache_path)).st_mode & 0o777, 0o700)
+        self.assertEqual(os.stat(self.cache_path).st_mode & 0o777, 0o600)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,189 @@
+import unittest
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from dataclasses import replace
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.document_save.document_save_service import DocumentSaveService
+from src.document_save.request_coalescing_service import RequestCoalescingService
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+
+
+class TestRequestCoalescingService(unittest.TestCase):
+    """Test cases for RequestCoalescingService"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        for patcher in (
+            patch.object(DocumentSaveService, 'base_path', self.temp_dir.name),
+            patch.object(RequestCoalescingService, 'ENABLED', True),
+            patch.object(RequestCoalescingService, 'POLL_INTERVAL', 0.01),
+            patch.object(RequestCoalescingService, 'WAIT_TIMEOUT', 5),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        sql_path = os.path.join(self.temp_dir.name, 'MonthEnd.sql')
+        with open(sql_path, 'w') as sql_file:
+            sql_file.write("select * from contributions where period = :period")
+        self.query = ExecuteQueryDTO(
+            first_name="john",
+            query_id=17,
+            name="Month End",
+            file_path=sql_path,
+            user_id=31688,
+            query_params={"period": "202610"},
+        )
+
+    def _follow_in_thread(self, query=None):
+        followed = []
+        follower = threading.Thread(
+            target=lambda: followed.append(RequestCoalescingService().acquire(query=query or self.query))
+        )
+        follower.start()
+        time.sleep(0.1)
+        return follower, followed
+
+    def _write_leader_report(self) -> str:
+        save_path = DocumentSaveService().build_file_path(query=self.query)
+        os.makedirs(os.path.dirname(save_path), exist_ok=True)
+        with open(save_path, 'w') as report:
+            report.write("ID\n1\n")
+        return save_path
+
+    def test_first_request_takes_lease(self):
+        """Test that the first request owns the lease"""
+        lease = RequestCoalescingService().acquire(query=self.query)
+
+        self.assertTrue(lease.owned)
+        self.assertIsNone(lease.save_path)
+
+    def test_follower_gets_own_copy_of_leaders_file(self):
+        """Test that a waiting request gets its own file in its own user folder"""
+        coalescer = RequestCoalescingService()
+        lease = coalescer.acquire(query=self.query)
+        other_query = replace(self.query, user_id=100)
+        follower, followed = self._follow_in_thread(query=other_query)
+
+        leader_path = self._write_leader_report()
+        coalescer.complete(lease=lease, save_path=leader_path, row_count=42)
+        follower.join(timeout=5)
+
+        self.assertFalse(followed[0].owned)
+        self.assertNotEqual(followed[0].save_path, leader_path)
+        self.assertIn(os.sep + '100' + os.sep, followed[0].save_path)
+        self.assertEqual(followed[0].row_count, 42)
+        # The leader's cleanup must not take the follower's report with it
+        os.remove(leader_path)
+        with open(followed[0].save_path) as report:
+            self.assertEqual(report.read(), "ID\n1\n")
+
+    def test_follower_runs_report_when_leaders_file_is_gone(self):
+        """Test that a result whose file was already cleaned up is not handed out"""
+        coalescer = RequestCoalescingService()
+        lease = coalescer.acquire(query=self.query)
+        follower, followed = self._follow_in_thread()
+
+        coalescer.complete(lease=lease, save_path=os.path.join(self.temp_dir.name, 'gone.csv'), row_count=42)
+        follower.join(timeout=5)
+
+        self.assertTrue(followed[0].owned)
+        self.assertIsNone(followed[0].save_path)
+
+    def test_follower_uses_result_when_lease_vanishes_before_read(self):
+        """Test that a leader completing between _try_create and the lease read is still followed"""
+        coalescer = RequestCoalescingService()
+        lease = coalescer.acquire(query=self.query)
+        leader_path = self._write_leader_report()
+
+        def leader_completes_first(service, key):
+            # The lease exists when we try to create it, then is gone when we read it
+            coalescer.complete(lease=lease, save_path=leader_path, row_count=42)
+            return None
+
+        with patch.object(RequestCoalescingService, '_try_create', side_effect=leader_completes_first,
+                          autospec=True):
+            followed = RequestCoalescingService().acquire(query=self.query)
+
+        self.assertFalse(followed.owned)
+        self.assertEqual(followed.row_count, 42)
+        self.assertNotEqual(followed.save_path, leader_path)
+
+    def test_follower_takes_over_when_leader_fails(self):
+        """Test that a released lease without a result is taken by a follower"""
+        coalescer = RequestCoalescingService()
+        lease = coalescer.acquire(query=self.query)
+        follower, followed = self._follow_in_thread()
+
+        coalescer.release(lease=lease)
+        follower.join(timeout=5)
+
+        self.assertTrue(followed[0].owned)
+        self.assertIsNone(followed[0].save_path)
+
+    def test_expired_lease_is_taken_over(self):
+        """Test that a lease abandoned by a dead worker does not block forever"""
+        coalescer = RequestCoalescingService()
+        lease = coalescer.acquire(query=self.query)
+        with open(coalescer._lease_file(lease.key), 'w') as lease_file:
+            json.dump({"lease_id": lease.lease_id, "owner": "dead:1", "expires": time.time() - 1}, lease_file)
+
+        takeover = coalescer.acquire(query=self.query)
+
+        self.assertTrue(takeover.owned)
+        self.assertNotEqual(takeover.lease_id, lease.lease_id)
+
+    def test_new_request_after_completion_runs_again(self):
+        """Test that a finished result is not reused by later requests"""
+        coalescer = RequestCoalescingService()
+        lease = coalescer.acquire(query=self.query)
+        coalescer.complete(lease=lease, save_path="/reports/month-end.csv", row_count=42)
+
+        later = coalescer.acquire(query=self.query)
+
+        self.assertTrue(later.owned)
+
+    def test_expired_results_are_removed(self):
+        """Test that old result files are deleted when a leader completes"""
+        coalescer = RequestCoalescingService()
+        stale_file = os.path.join(coalescer.lease_path, 'stale.result')
+        os.makedirs(coalescer.lease_path, exist_ok=True)
+        with open(stale_file, 'w') as result_file:
+            json.dump({"lease_id": "old", "save_path": "/reports/old.csv", "row_count": 1}, result_file)
+        old = time.time() - RequestCoalescingService.RESULT_TTL - 1
+        os.utime(stale_file, (old, old))
+
+        lease = coalescer.acquire(query=self.query)
+        coalescer.complete(lease=lease, save_path="/reports/month-end.csv", row_count=42)
+
+        self.assertFalse(os.path.exists(stale_file))
+        self.assertTrue(os.path.exists(coalescer._result_file(lease.key)))
+
+    def test_missing_script_skips_coalescing(self):
+        """Test that an unreadable script is left for the query service to reject"""
+        self.query.file_path = os.path.join(self.temp_dir.name, 'Missing.sql')
+
+        lease = RequestCoalescingService().acquire(query=self.query)
+
+        self.assertFalse(lease.owned)
+        self.assertIsNone(lease.save_path)
+
+    def test_disabled(self):
+        """Test that coalescing can be switched off"""
+        with patch.object(RequestCoalescingService, 'ENABLED', False):
+            lease = RequestCoalescingService().acquire(query=self.query)
+
+        self.assertFalse(lease.owned)
+        self.assertIsNone(lease.save_path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+import unittest
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.document_save.document_save_service import DocumentSaveService
+from src.document_save.result_cache_service import ResultCacheService, _parse_ttls
+from src.queries.dto.execute_query_dto import ExecuteQueryDTO
+from src.queries.dto.query_result_dto import QueryResultDTO
+
+
+class TestResultCacheService(unittest.TestCase):
+    """Test cases for ResultCacheService"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        for patcher in (
+            patch.object(DocumentSaveService, 'base_path', self.temp_dir.name),
+            patch.object(ResultCacheService, 'DEFAULT_TTL', 3600),
+            patch.object(ResultCacheService, 'QUERY_TTLS', {}),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        self.sql_path = os.path.join(self.temp_dir.name, 'ActiveEmployerEmail.sql')
+        with open(self.sql_path, 'w') as sql_file:
+            sql_file.write("select * from employer where status = :status")
+
+        self.query = self._make_query(user_id=31688, params={"status": "A"})
+
+    def _make_query(self, user_id: int, params: dict) -> ExecuteQueryDTO:
+        return ExecuteQueryDTO(
+            first_name="john",
+            query_id=423,
+            name="Active Employer Email",
+            file_path=self.sql_path,
+            user_id=user_id,
+            query_params=params,
+        )
+
+    def _write_report(self) -> str:
+        results = QueryResultDTO(column_names=["ID"], rows=iter([(1,), (2,)]))
+        save_path = DocumentSaveService().save_to_csv(results=results, query=self.query)
+        ResultCacheService().store(query=self.query, save_path=save_path, results=results)
+        return save_path
+
+    def test_miss_when_nothing_cached(self):
+        """Test that lookup misses before any report is stored"""
+        self.assertIsNone(ResultCacheService().lookup(query=self.query))
+
+    def test_hit_reuses_file_for_other_user(self):
+        """Test that another user's identical request gets its own copy"""
+        self._write_report()
+        other_query = self._make_query(user_id=100, params={"status": "A "})
+
+        entry = ResultCacheService().lookup(query=other_query)
+        save_path = ResultCacheService().reuse(entry=entry, query=other_query)
+
+        self.assertEqual(entry.row_count, 2)
+        self.assertIn(os.sep + '100' + os.sep, save_path)
+        with open(save_path) as report:
+            self.assertEqual(report.read().splitlines(), ["ID", "1", "2"])
+
+    def test_repeat_within_same_second_gets_own_file(self):
+        """Test that a same-second repeat by the same user does not reuse the original path"""
+        with patch('src.document_save.document_save_service.datetime') as clock:
+            clock.now.return_value = datetime(2025, 12, 1, 22, 41, 6)
+            save_path = self._write_report()
+
+            entry = ResultCacheService().lookup(query=self.query)
+            first_reuse = ResultCacheService().reuse(entry=entry, query=self.query)
+            second_reuse = ResultCacheService().reuse(entry=entry, query=self.query)
+
+        self.assertEqual(len({save_path, first_reuse, second_reuse}), 3)
+        os.remove(save_path)
+        for reused_path in (first_reuse, second_reuse):
+            with open(reused_path) as report:
+                self.assertEqual(report.read().splitlines(), ["ID", "1", "2"])
+
+    def test_concurrent_hits_update_entry(self):
+        """Test that worker threads hitting the same entry do not trip over each other's writes"""
+        self._write_report()
+        errors = []
+
+        def hit():
+            try:
+                for _ in range(50):
+                    ResultCacheService().lookup(query=self.query)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=hit) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(10)
+
+        self.assertEqual(errors, [])
+        self.assertIsNotNone(ResultCacheService().lookup(query=self.query))
+
+    def test_cached_copy_survives_report_cleanup(self):
+        """Test that deleting the original report keeps the cache entry valid"""
+        save_path = self._write_report()
+        os.remove(save_path)
+
+        self.assertIsNotNone(ResultCacheService().lookup(query=self.query))
+
+    def test_different_params_miss(self):
+        """Test that other parameter values are a different key"""
+        self._write_report()
+
+        other_query = self._make_query(user_id=31688, params={"status": "I"})
+
+        self.assertIsNone(ResultCacheService().lookup(query=other_query))
+
+    def test_sql_change_invalidates(self):
+        """Test that editing the .sql file invalidates the entry"""
+        self._write_report()
+        with open(self.sql_path, 'a') as sql_file:
+            sql_file.write(" and region = 'NP'")
+
+        self.assertIsNone(ResultCacheService().lookup(query=self.query))
+
+    def test_expired_entry_misses(self):
+        """Test that entries older than the query's TTL are not reused"""
+        self._write_report()
+
+        with patch.object(ResultCacheService, 'QUERY_TTLS', {423: 60}), \
+                patch('src.document_save.result_cache_service.time.time', return_value=time.time() + 120):
+            self.assertIsNone(ResultCacheService().lookup(query=self.query))
+
+    def test_caching_disabled_with_zero_ttl(self):
+        """Test that a TTL of 0 stores nothing"""
+        with patch.object(ResultCacheService, 'QUERY_TTLS', {423: 0}):
+            self._write_report()
+            self.assertIsNone(ResultCacheService().lookup(query=self.query))
+
+    def test_least_recently_used_evicted(self):
+        """Test that MAX_ENTRIES keeps only the most recently used entries"""
+        with patch.object(ResultCacheService, 'MAX_ENTRIES', 1):
+            self._write_report()
+            self.query = self._make_query(user_id=31688, params={"status": "I"})
+            self._write_report()
+
+            cache_files = os.listdir(ResultCacheService().cache_path)
+
+        self.assertEqual(len([name for name in cache_files if name.endswith(".json")]), 1)
+        self.assertIsNotNone(ResultCacheService().lookup(query=self.query))
+
+    def test_discard_removes_entry(self):
+        """Test that a bad entry can be dropped so the next run rebuilds it"""
+        self._write_report()
+        cache = ResultCacheService()
+        entry_path = cache._entry_path(cache.make_key(self.query))
+        with open(entry_path, 'w') as entry_file:
+            entry_file.write('{"key": ')
+
+        cache.discard(query=self.query)
+
+        self.assertFalse(os.path.exists(entry_path))
+        self.assertIsNone(cache.lookup(query=self.query))
+
+    def test_parse_ttls(self):
+        """Test parsing of per-query TTL configuration"""
+        self.assertEqual(_parse_ttls("423:3600, 17:600"), {423: 3600, 17: 600})
+        self.assertEqual(_parse_ttls(""), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,7 @@ import os
 # Add src to path for imports
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.monitoring.sentry_service import SentryService
+from src.monitoring.sentry_service import SentryService, _parse_thresholds
 from config import SentryDevConfig
 
 
@@ -105,5 +105,93 @@ class TestSentryIntegration(unittest.TestCase):
         mock_sentry.set_context.assert_called_once_with("query", None)
 
 
+class TestTailSampling(unittest.TestCase):
+    """Test cases for SentryService tail-based trace sampling"""
+
+    def setUp(self):
+        self.settings = (SentryService.TAIL_SAMPLING, SentryService._sample_rate, SentryService.SLOW_SECONDS_BY_QUERY)
+        SentryService.TAIL_SAMPLING = True
+        SentryService._sample_rate = 0.0
+        SentryService.SLOW_SECONDS_BY_QUERY = {}
+
+    def tearDown(self):
+        SentryService.TAIL_SAMPLING, SentryService._sample_rate, SentryService.SLOW_SECONDS_BY_QUERY = self.settings
+
+    def _run_message(self, mock_sentry, fail=False, status="ok"):
+        transaction = MagicMock(status=status, sampled=True)
+        mock_sentry.start_transaction.return_value = transaction
+        with SentryService.start_transaction(name="process_query_message", op="rabbitmq.consumer"):
+            SentryService.set_query_context(query_id=7, query_name="Test Query")
+            SentryService.add_breadcrumb(message="Received message", category="rabbitmq")
+            SentryService.capture_message(message="Query completed successfully", level="info")
+            if fail:
+                SentryService.capture_exception(exception=ValueError("Test error"))
+        return transaction
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_fast_success_is_dropped(self, mock_sentry):
+        """Test that a fast successful message sends nothing"""
+        transaction = self._run_message(mock_sentry)
+
+        self.assertIs(transaction.sampled, False)
+        mock_sentry.add_breadcrumb.assert_not_called()
+        mock_sentry.capture_message.assert_not_called()
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_failure_is_kept(self, mock_sentry):
+        """Test that a failed message sends its breadcrumbs before the error"""
+        transaction = self._run_message(mock_sentry, fail=True)
+
+        self.assertIs(transaction.sampled, True)
+        transaction.set_tag.assert_called_with("sampling.reason", "error")
+        mock_sentry.add_breadcrumb.assert_called_once()
+        mock_sentry.capture_exception.assert_called_once()
+        mock_sentry.capture_message.assert_called_once()
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_error_status_is_kept(self, mock_sentry):
+        """Test that a transaction marked internal_error is kept"""
+        transaction = self._run_message(mock_sentry, status="internal_error")
+
+        transaction.set_tag.assert_called_with("sampling.reason", "error")
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_slow_query_is_kept(self, mock_sentry):
+        """Test that a message over its query's latency threshold is kept"""
+        SentryService.SLOW_SECONDS_BY_QUERY = {"7": 0}
+
+        transaction = self._run_message(mock_sentry)
+
+        transaction.set_tag.assert_called_with("sampling.reason", "slow")
+        mock_sentry.capture_message.assert_called_once()
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_random_sample_is_kept(self, mock_sentry):
+        """Test that a message winning the random sample is kept"""
+        SentryService._sample_rate = 1.0
+
+        transaction = self._run_message(mock_sentry)
+
+        transaction.set_tag.assert_called_with("sampling.reason", "sampled")
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_breadcrumbs_do_not_leak_into_next_message(self, mock_sentry):
+        """Test that breadcrumbs flushed for a kept message are cleared from the scope"""
+        self._run_message(mock_sentry, fail=True)
+
+        mock_sentry.get_isolation_scope.return_value.clear_breadcrumbs.assert_called_once()
+
+    @patch('src.monitoring.sentry_service.sentry_sdk')
+    def test_breadcrumbs_outside_message_sent_directly(self, mock_sentry):
+        """Test that breadcrumbs outside a transaction are not buffered"""
+        SentryService.add_breadcrumb(message="Startup", category="app")
+
+        mock_sentry.add_breadcrumb.assert_called_once()
+
+    def test_parse_thresholds(self):
+        """Test parsing per-query latency thresholds"""
+        self.assertEqual(_parse_thresholds("12:300, 15:900.5,"), {"12": 300.0, "15": 900.5})
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,86 @@
+import unittest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.sql_parameters import tokenize, get_script_metadata, _metadata_cache
+
+
+SCRIPT = """/*
+ Active employers by region
+ Parameters: Start Date:start_date,End Date:end_date,Region:region
+*/
+select e.employer_no,
+       to_char(e.registered, 'YYYY-MM-DD HH24:MI:SS') registered, -- not a :bind
+       q'[it's :not_a_bind]' note
+  from employer e
+ where e.registered between :start_date and :end_date
+   and e.status = 'A:B'
+   and e.registered > :start_date
+"""
+
+
+class TestSQLParameters(unittest.TestCase):
+    """Test cases for SQL bind parameter extraction"""
+
+    def setUp(self):
+        _metadata_cache.clear()
+
+    def test_binds_found_in_order(self):
+        """Test that each bind is reported once in order of appearance"""
+        binds, _ = tokenize(SCRIPT)
+        self.assertEqual(binds, ["start_date", "end_date"])
+
+    def test_literals_and_comments_skipped(self):
+        """Test that colons in strings, q-quotes and comments are not binds"""
+        binds, comments = tokenize(SCRIPT)
+        self.assertNotIn("MI", binds)
+        self.assertNotIn("not_a_bind", binds)
+        self.assertNotIn("bind", binds)
+        self.assertEqual(len(comments), 2)
+
+    def test_cast_and_assignment_are_not_binds(self):
+        """Test '::' and ':=' false positives"""
+        binds, _ = tokenize("begin x := :value; y := z::text; end;")
+        self.assertEqual(binds, ["value"])
+
+    def test_escaped_quotes(self):
+        """Test doubled quotes inside string literals"""
+        binds, _ = tokenize("select 'O''Brien :x' from dual where id = :id")
+        self.assertEqual(binds, ["id"])
+
+    def test_header_checked_against_binds(self):
+        """Test declared vs used parameters"""
+        metadata = get_script_metadata(SCRIPT)
+
+        self.assertEqual(
+            metadata.declared_params,
+            ["Start Date:start_date", "End Date:end_date", "Region:region"]
+        )
+        self.assertEqual(metadata.unused_names, ["region"])
+        self.assertEqual(metadata.undeclared_names, [])
+
+    def test_undeclared_bind(self):
+        """Test binds missing from the header are reported"""
+        metadata = get_script_metadata("/* Parameters: Year:year */ select * from t where y = :year and m = :month")
+        self.assertEqual(metadata.undeclared_names, ["month"])
+
+    def test_no_header(self):
+        """Test scripts without a Parameters: header"""
+        metadata = get_script_metadata("select * from dual")
+        self.assertEqual(metadata.declared_params, [])
+
+    def test_metadata_cached_per_script(self):
+        """Test that repeat calls do not re-parse"""
+        first = get_script_metadata(SCRIPT)
+        hits = _metadata_cache.hits
+        second = get_script_metadata(SCRIPT)
+
+        self.assertIs(first, second)
+        self.assertEqual(_metadata_cache.hits, hits + 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
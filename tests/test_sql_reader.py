@@ -0,0 +1,68 @@
+import unittest
+import os
+import sys
+import tempfile
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache.ttl_cache import TTLCache
+from src.database.SQLReader import SQLReader
+
+
+class TestSQLReader(unittest.TestCase):
+    """Test cases for SQLReader script caching"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.temp_dir.cleanup)
+        patcher = patch.object(SQLReader, 'script_cache', TTLCache(max_size=10))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.script_path = self._write("get_user_roles.sql", "select 1 from dual")
+
+    def _write(self, name: str, sql: str) -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        with open(path, "w") as sql_file:
+            sql_file.write(sql)
+        return path
+
+    def test_repeat_reads_come_from_cache(self):
+        """Test that the file is only opened once while unchanged"""
+        reader = SQLReader()
+        reader.getSQL(self.script_path)
+
+        with patch('builtins.open', side_effect=AssertionError("file reopened")):
+            self.assertEqual(reader.getSQL(self.script_path), "select 1 from dual")
+
+        self.assertEqual(SQLReader.script_cache.hits, 1)
+
+    def test_edited_script_is_reread(self):
+        """Test mtime/size based invalidation"""
+        reader = SQLReader()
+        reader.getSQL(self.script_path)
+        self._write("get_user_roles.sql", "select 2 from dual where 1 = 1")
+
+        self.assertEqual(reader.getSQL(self.script_path), "select 2 from dual where 1 = 1")
+
+    def test_cache_shared_between_readers(self):
+        """Test that repositories subclassing SQLReader share one cache"""
+        SQLReader().getSQL(self.script_path)
+        SQLReader().getSQL(self.script_path)
+
+        self.assertEqual(SQLReader.script_cache.hits, 1)
+
+    def test_warm_skips_missing_files(self):
+        """Test that warming loads what it can"""
+        other = self._write("get_role.sql", "select 3 from dual")
+        missing = os.path.join(self.temp_dir.name, "missing.sql")
+
+        loaded = SQLReader().warm([self.script_path, other, missing])
+
+        self.assertEqual(loaded, 2)
+        self.assertEqual(len(SQLReader.script_cache), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
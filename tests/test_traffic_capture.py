@@ -0,0 +1,96 @@
+import unittest
+import sys
+import os
+import json
+import tempfile
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.query_queue.traffic_capture import TrafficCapture
+from src.monitoring.pipeline_metrics import PipelineMetrics
+
+
+class TestTrafficCapture(unittest.TestCase):
+    """Test cases for TrafficCapture message recording"""
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.path = os.path.join(self.directory.name, "capture.jsonl")
+        patcher = patch.multiple(TrafficCapture, PATH=self.path, SALT="salt")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.body = json.dumps({
+            "id": 423,
+            "name": "Active Employers",
+            "user_id": 31688,
+            "first_name": "Jane",
+            "email_address": "jane@example.com",
+            "query_params": {"start_date": "2024-01-01", "employer": "ACME"},
+            "query_log_id": 9,
+        })
+
+    def test_sanitize_hashes_personal_data(self):
+        """Test that names, emails, user ids and parameter values are not captured in clear"""
+        message = TrafficCapture.sanitize(self.body)
+
+        self.assertEqual(message["id"], 423)
+        self.assertEqual(set(message["query_params"]), {"start_date", "employer"})
+        captured = json.dumps(message)
+        for secret in ("Jane", "jane@example.com", "31688", "2024-01-01", "ACME"):
+            self.assertNotIn(secret, captured)
+
+    def test_hashes_are_stable(self):
+        """Test that equal values hash equally, so repeat requests stay visible"""
+        self.assertEqual(TrafficCapture.sanitize(self.body), TrafficCapture.sanitize(self.body))
+        salted = TrafficCapture.hash_value("ACME")
+        with patch.object(TrafficCapture, 'SALT', "other"):
+            self.assertNotEqual(TrafficCapture.hash_value("ACME"), salted)
+
+    def test_capture_requires_salt(self):
+        """Test that capture stays disabled without a secret salt"""
+        self.assertTrue(TrafficCapture.enabled())
+        with patch.object(TrafficCapture, 'SALT', ""):
+            self.assertFalse(TrafficCapture.enabled())
+
+    def test_sanitize_ignores_non_json(self):
+        """Test that a malformed body is captured without its content"""
+        self.assertIsNone(TrafficCapture.sanitize(b"not json"))
+
+    def test_record_appends_line(self):
+        """Test that each message appends one JSON line with its timings"""
+        for status in ("success", "failed"):
+            TrafficCapture.record(
+                body=self.body, received_at=1700000000.5, status=status,
+                seconds=1.25, stages={"db.query": 1.0}, row_count=10
+            )
+
+        with open(self.path) as capture_file:
+            entries = [json.loads(line) for line in capture_file]
+        self.assertEqual([entry["status"] for entry in entries], ["success", "failed"])
+        self.assertEqual(entries[0]["stages"], {"db.query": 1.0})
+        self.assertEqual(entries[0]["message"]["query_log_id"], 9)
+
+
+class TestStageCollection(unittest.TestCase):
+    """Test cases for collecting one message's stage timings"""
+
+    def test_stages_collected_between_begin_and_end(self):
+        """Test that stage timings are summed per message and not collected afterwards"""
+        PipelineMetrics.begin_message()
+        with PipelineMetrics.time_stage("db.query"):
+            pass
+        with PipelineMetrics.time_stage("db.query"):
+            pass
+        stages = PipelineMetrics.end_message()
+
+        self.assertEqual(list(stages), ["db.query"])
+        with PipelineMetrics.time_stage("db.query"):
+            pass
+        self.assertEqual(PipelineMetrics.end_message(), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
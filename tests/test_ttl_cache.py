@@ -0,0 +1,84 @@
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.cache.ttl_cache import TTLCache
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test cases for TTLCache"""
+
+    def test_get_and_set(self):
+        """Test basic caching with hit and miss counters"""
+        cache = TTLCache(max_size=10)
+
+        self.assertIs(cache.get("a"), TTLCache.MISSING)
+        cache.set("a", 1)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_none_values_are_cached(self):
+        """Test that None is a cacheable value, distinct from a miss"""
+        cache = TTLCache(max_size=10)
+        cache.set("user", None)
+
+        self.assertIsNone(cache.get("user"))
+
+    def test_least_recently_used_evicted(self):
+        """Test LRU eviction once max_size is reached"""
+        cache = TTLCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIs(cache.get("b"), TTLCache.MISSING)
+        self.assertEqual(cache.evictions, 1)
+
+    @patch('src.cache.ttl_cache.time.monotonic')
+    def test_entries_expire(self, mock_monotonic):
+        """Test default and per-entry TTLs"""
+        mock_monotonic.return_value = 100.0
+        cache = TTLCache(max_size=10, ttl=60)
+        cache.set("default", 1)
+        cache.set("short", 2, ttl=5)
+
+        mock_monotonic.return_value = 110.0
+        self.assertEqual(cache.get("default"), 1)
+        self.assertIs(cache.get("short"), TTLCache.MISSING)
+
+        mock_monotonic.return_value = 161.0
+        self.assertIs(cache.get("default"), TTLCache.MISSING)
+        self.assertEqual(len(cache), 0)
+
+    def test_invalidate_where(self):
+        """Test targeted invalidation by key predicate"""
+        cache = TTLCache(max_size=10)
+        cache.set(("roles", 1), ["A"])
+        cache.set(("roles", 2), ["B"])
+        cache.set(("office", 1), 7)
+
+        removed = cache.invalidate_where(lambda key: key[1] == 1)
+
+        self.assertEqual(removed, 2)
+        self.assertEqual(cache.get(("roles", 2)), ["B"])
+
+    def test_stats_hit_rate(self):
+        """Test hit rate reporting"""
+        cache = TTLCache(max_size=10)
+        cache.set("a", 1)
+        cache.get("a")
+        cache.get("a")
+        cache.get("b")
+        cache.get("c")
+
+        self.assertEqual(cache.stats()["hit_rate"], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
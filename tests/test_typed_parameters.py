@@ -0,0 +1,161 @@
+import unittest
+import sys
+import os
+import io
+import json
+from contextlib import redirect_stdout
+from datetime import datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.database.sql_parameters import get_script_metadata, parse_parameter, _metadata_cache
+from src.database.typed_parameters import bind_parameters, set_input_sizes, INPUT_SIZES_OPTION
+from src.queries.query_service import QueryService
+from werkzeug.exceptions import BadRequest
+
+
+SCRIPT = """-- Parameters: Start Date:start_date:date,Amount:amt:number,Region:region:varchar2(3),Branch:branch
+select c.claim_no
+  from claim c
+ where c.paid_date >= :START_DATE
+   and c.amount > :amt
+   and c.region = :region
+   and c.branch = :branch
+"""
+
+
+class TestTypedParameters(unittest.TestCase):
+    """Test cases for typed bind parameters declared in the SQL header"""
+
+    def setUp(self):
+        _metadata_cache.clear()
+        self.metadata = get_script_metadata(SCRIPT)
+
+    def test_header_types_parsed(self):
+        """Test that type annotations and lengths are read from the header"""
+        types = {p.name: (p.type_name, p.length) for p in self.metadata.parameters}
+        self.assertEqual(types["start_date"], ("date", None))
+        self.assertEqual(types["amt"], ("number", None))
+        self.assertEqual(types["region"], ("varchar", 3))
+        self.assertEqual(types["branch"], (None, None))
+        self.assertEqual(self.metadata.declared_names, ["start_date", "amt", "region", "branch"])
+
+    def test_unknown_type_left_untyped(self):
+        """Test that an unrecognised annotation binds the value as text"""
+        parameter = parse_parameter("Flag:flag:boolean")
+        self.assertEqual(parameter.name, "flag")
+        self.assertIsNone(parameter.type_name)
+
+    def test_values_coerced(self):
+        """Test that string values become datetime and Decimal keyed by the SQL bind name"""
+        bound = bind_parameters(self.metadata, {
+            "start_date": "2024-03-01", "amt": "1,250.50", "region": "NP", "branch": "7",
+        })
+        self.assertEqual(bound.values["START_DATE"], datetime(2024, 3, 1))
+        self.assertNotIn("start_date", bound.values)
+        self.assertEqual(bound.values["amt"], Decimal("1250.50"))
+        self.assertEqual(bound.values["region"], "NP")
+        self.assertEqual(bound.values["branch"], "7")
+        self.assertEqual(bound.input_sizes, {
+            "START_DATE": "DB_TYPE_DATE", "amt": "DB_TYPE_NUMBER", "region": 3,
+        })
+        self.assertNotIn("branch", bound.bind_types)
+
+    def test_parameter_names_match_case_insensitively(self):
+        """Test that message keys differing in case from the SQL binds are accepted and re-keyed"""
+        bound = QueryService()._bind_query_params(script=SCRIPT, query_params={
+            "Start_Date": "2024-03-01", "AMT": "1", "Region": "NP", "BRANCH": "7",
+        })
+
+        self.assertEqual(bound.values["START_DATE"], datetime(2024, 3, 1))
+        self.assertEqual(bound.values["branch"], "7")
+        self.assertNotIn("BRANCH", bound.values)
+
+    def test_missing_parameter_rejected(self):
+        """Test that a bind without a value raises BadRequest naming it"""
+        with self.assertRaises(BadRequest) as context:
+            QueryService()._bind_query_params(script=SCRIPT, query_params={"start_date": "2024-03-01"})
+
+        self.assertIn("amt", str(context.exception.description))
+
+    def test_header_mismatch_reported(self):
+        """Test that undeclared binds and unused header entries are reported"""
+        script = "-- Parameters: Start Date:start_date:date,Region:region\nselect 1 from dual where d = :start_date and m = :month"
+        output = io.StringIO()
+        with redirect_stdout(output):
+            QueryService()._bind_query_params(script=script, query_params={"start_date": "2024-03-01", "month": "3"})
+
+        self.assertIn("undeclared binds ['month']", output.getvalue())
+        self.assertIn("declared but unused ['region']", output.getvalue())
+
+    def test_empty_value_bound_as_null(self):
+        """Test that an empty string for a typed parameter binds NULL"""
+        bound = bind_parameters(self.metadata, {"start_date": "", "amt": "1", "region": "NP", "branch": "1"})
+        self.assertIsNone(bound.values["START_DATE"])
+
+    def test_invalid_values_rejected(self):
+        """Test that values not fitting their declared type raise ValueError naming the parameter"""
+        base = {"start_date": "2024-03-01", "amt": "1", "region": "NP", "branch": "1"}
+        for key, value in (("start_date", "not a date"), ("amt", "12abc"), ("region", "LONG")):
+            with self.assertRaises(ValueError) as context:
+                bind_parameters(self.metadata, dict(base, **{key: value}))
+            self.assertIn(key, str(context.exception))
+
+    def test_list_header_parsed(self):
+        """Test that list<...> annotations keep the element type and mark the parameter as a list"""
+        parameter = parse_parameter("Employers:employers:list<varchar2(10)>")
+        self.assertEqual((parameter.type_name, parameter.length, parameter.is_list), ("varchar", 10, True))
+        self.assertFalse(parse_parameter("Amount:amt:number").is_list)
+
+    def test_list_bound_as_json_array(self):
+        """Test that separated strings, JSON arrays and lists all become one JSON CLOB bind"""
+        metadata = get_script_metadata(
+            "-- Parameters: Employers:employers:list<number>\n"
+            "select 1 from employer where employer_no in "
+            "(select value from json_table(:employers, '$[*]' columns (value number path '$')))"
+        )
+        for value in ("101, 102,\n103", "[101, 102, 103]", [101, "102", 103]):
+            bound = bind_parameters(metadata, {"employers": value})
+            self.assertEqual(bound.values["employers"], "[101,102,103]")
+            self.assertEqual(bound.input_sizes["employers"], "DB_TYPE_CLOB")
+
+    def test_large_list_is_one_bind(self):
+        """Test that lists beyond Oracle's 1000-item IN limit still bind as one value"""
+        metadata = get_script_metadata("-- Parameters: NIB Numbers:nib:list<varchar(12)>\nselect :nib from dual")
+        numbers = [f"NIB{index:06d}" for index in range(20000)]
+        bound = bind_parameters(metadata, {"nib": ",".join(numbers)})
+        self.assertEqual(json.loads(bound.values["nib"]), numbers)
+
+    def test_invalid_list_item_rejected(self):
+        """Test that a bad item is reported with its position"""
+        metadata = get_script_metadata("-- Parameters: Ids:ids:list<integer>\nselect :ids from dual")
+        with self.assertRaises(ValueError) as context:
+            bind_parameters(metadata, {"ids": "1,2,x"})
+        self.assertIn("item 3", str(context.exception))
+
+    def test_listener_sets_input_sizes(self):
+        """Test that the cursor listener resolves driver types from the execution option"""
+        dbapi = SimpleNamespace(DB_TYPE_DATE="date-type")
+        context = SimpleNamespace(
+            execution_options={INPUT_SIZES_OPTION: {"start_date": "DB_TYPE_DATE", "region": 3}},
+            dialect=SimpleNamespace(dbapi=dbapi),
+            compiled=SimpleNamespace(escaped_bind_names={}),
+        )
+        cursor = MagicMock()
+        set_input_sizes(None, cursor, "", {}, context, False)
+        cursor.setinputsizes.assert_called_once_with(start_date="date-type", region=3)
+
+    def test_listener_ignores_untyped_statements(self):
+        """Test that statements without declared sizes leave the cursor untouched"""
+        context = SimpleNamespace(execution_options={}, dialect=None, compiled=None)
+        cursor = MagicMock()
+        set_input_sizes(None, cursor, "", {}, context, False)
+        cursor.setinputsizes.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
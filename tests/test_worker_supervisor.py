@@ -0,0 +1,75 @@
+import unittest
+import signal
+import time
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from src.query_queue.worker_supervisor import WorkerSupervisor
+
+
+def drain_on_sigterm():
+    """Consumer stand-in that exits cleanly once asked to stop"""
+    stopping = []
+    signal.signal(signal.SIGTERM, lambda signum, frame: stopping.append(signum))
+    while not stopping:
+        time.sleep(0.01)
+
+
+def crash():
+    """Consumer stand-in that dies straight away"""
+    os._exit(3)
+
+
+class FastSupervisor(WorkerSupervisor):
+    RESTART_DELAY = 0
+    POLL_INTERVAL = 0.01
+    SHUTDOWN_TIMEOUT = 5
+
+
+class TestWorkerSupervisor(unittest.TestCase):
+    """Test cases for WorkerSupervisor"""
+
+    def test_children_are_separate_processes(self):
+        """Test that one child process is forked per slot"""
+        supervisor = FastSupervisor(target=drain_on_sigterm, processes=2)
+        for slot in range(supervisor.processes):
+            supervisor._spawn(slot)
+
+        pids = {process.pid for process in supervisor.children.values()}
+        supervisor._drain()
+
+        self.assertEqual(len(pids), 2)
+        self.assertNotIn(os.getpid(), pids)
+
+    def test_drain_lets_children_exit_cleanly(self):
+        """Test that SIGTERM is forwarded and children exit on their own"""
+        supervisor = FastSupervisor(target=drain_on_sigterm, processes=2)
+        for slot in range(supervisor.processes):
+            supervisor._spawn(slot)
+        time.sleep(0.2)
+
+        supervisor._drain()
+
+        for process in supervisor.children.values():
+            self.assertEqual(process.exitcode, 0)
+
+    def test_crashed_child_is_restarted(self):
+        """Test that a child that exits is replaced in the same slot"""
+        supervisor = FastSupervisor(target=crash, processes=1)
+        supervisor._spawn(0)
+        crashed = supervisor.children[0]
+        crashed.join()
+
+        supervisor._restart(0, crashed)
+        replacement = supervisor.children[0]
+        replacement.join()
+
+        self.assertEqual(crashed.exitcode, 3)
+        self.assertNotEqual(replacement.pid, crashed.pid)
+
+
+if __name__ == '__main__':
+    unittest.main()